@@ -9,18 +9,31 @@ Requisitos: Python 3.10+
 
 from __future__ import annotations
 
+import time
+
+_STARTUP_T0 = time.perf_counter()
+
 import os
 import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from utils.startup import StartupReport
+
+STARTUP = StartupReport(_STARTUP_T0)
+STARTUP.mark("imports: stdlib/tkinter")
+
 from db import Database
-# Removido: geração automática de ícone; usamos ativos fixos em assets
+# Ícones: cache pré-renderizado (Pillow só é importado se o cache faltar)
+from utils.icons import icon_cache
 from views.login_view import LoginFrame
 from views.product_view import ProductFrame
 from views.sales_view import SalesFrame
 from views.reports_view import ReportsFrame
 from views.fulfillment_view import FulfillmentFrame
+from views.lazy import LazyTab
+
+STARTUP.mark("imports: app")
 
 
 class App(tk.Tk):
@@ -31,11 +44,16 @@ class App(tk.Tk):
         self.title("Controle de Estoque e Vendas")
         self.geometry("1000x640")
         self.minsize(960, 600)
+        STARTUP.mark("tk init")
+
+        # Ícones pré-renderizados: {tamanho: caminho PNG} (vazio se indisponível)
+        self._icon_paths = icon_cache()
 
         # Ícone da janela (GUI):
         # - Windows: tenta aplicar um .ico (barra de título / taskbar) via iconbitmap.
-        # - Todas as plataformas: aplica PNG via iconphoto (suporta multi-tamanho com Pillow).
-        # - A logo no cabeçalho também reutiliza o mesmo PNG, redimensionado conforme DPI.
+        # - Todas as plataformas: aplica os PNGs do cache via iconphoto (multi-tamanho,
+        #   lidos direto pelo Tk, sem Pillow nem redimensionamento em runtime).
+        # - A logo no cabeçalho reutiliza o mesmo cache, no tamanho adequado ao DPI.
         try:
             # Em Windows, definir AppUserModelID ajuda a fixar o ícone na barra de tarefas
             if sys.platform == "win32":
@@ -61,33 +79,32 @@ class App(tk.Tk):
                     pass
             # Se nenhum ICO existir, seguimos apenas com PNG via iconphoto
 
-            # 2) Aplica PNG base em diferentes tamanhos (iconphoto)
+            # 2) Aplica os PNGs do cache em diferentes tamanhos (iconphoto)
             base_png = os.path.abspath(os.path.join("assets", "logo.png"))
-            if os.path.exists(base_png):
-                try:
-                    from PIL import Image, ImageTk  # type: ignore
-                    sizes = [16, 24, 32, 48, 64, 128, 256]
-                    base_img = Image.open(base_png).convert("RGBA")
+            try:
+                if self._icon_paths:
                     self._icon_photos = [
-                        ImageTk.PhotoImage(base_img.copy().resize((s, s))) for s in sizes
+                        tk.PhotoImage(file=str(self._icon_paths[s])) for s in sorted(self._icon_paths)
                     ]
                     self.iconphoto(True, *self._icon_photos)
-                except Exception:
-                    # Fallback sem Pillow: usa a própria imagem
-                    try:
-                        self._icon_photo = tk.PhotoImage(file=base_png)
-                        self.iconphoto(True, self._icon_photo)
-                    except Exception:
-                        pass
+                elif os.path.exists(base_png):
+                    # Fallback sem cache: usa a própria imagem
+                    self._icon_photo = tk.PhotoImage(file=base_png)
+                    self.iconphoto(True, self._icon_photo)
+            except Exception:
+                pass
         except Exception:
             # Ícone é opcional; se falhar, seguimos sem definir
             pass
+        STARTUP.mark("icons")
 
         # Barra superior com logo e título
         self._build_header()
+        STARTUP.mark("header")
 
         # Instância central do banco de dados
         self.db = Database("data/estoque.db")
+        STARTUP.mark("database")
 
         # Container principal; iniciamos com a tela de login
         self._main_container = ttk.Frame(self)
@@ -101,6 +118,12 @@ class App(tk.Tk):
 
         # Exibe a tela de login somente agora (menus e atributos já prontos)
         self.show_login()
+        STARTUP.mark("menu + login")
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self) -> None:
+        STARTUP.mark("first paint")
+        STARTUP.emit()
 
     def _build_header(self) -> None:
         """Cria barra superior com logo e título."""
@@ -125,26 +148,17 @@ class App(tk.Tk):
         candidates = [32, 40, 48, 64]
         pick = min(candidates, key=lambda s: abs(s - size))
         base_png = os.path.join("assets", "logo.png")
-        try:
-            from PIL import Image, ImageTk  # type: ignore
-            if os.path.exists(base_png):
-                im = Image.open(base_png).convert("RGBA")
-                if im.width != pick or im.height != pick:
-                    im = im.resize((pick, pick))
-                self._logo_img = ImageTk.PhotoImage(im)
+        # Usa o PNG do cache no tamanho exato; sem cache, o PNG original
+        logo_path = self._icon_paths.get(pick)
+        path = str(logo_path) if logo_path else base_png
+        if os.path.exists(path):
+            try:
+                self._logo_img = tk.PhotoImage(file=path)
                 tk.Label(bar, image=self._logo_img, bg=dark_bg, bd=0).pack(
                     side=tk.LEFT, padx=(10, 8), pady=6
                 )
-        except Exception:
-            # Fallback sem Pillow
-            if os.path.exists(base_png):
-                try:
-                    self._logo_img = tk.PhotoImage(file=base_png)
-                    tk.Label(bar, image=self._logo_img, bg=dark_bg, bd=0).pack(
-                        side=tk.LEFT, padx=(10, 8), pady=6
-                    )
-                except Exception:
-                    pass
+            except Exception:
+                pass
 
         tk.Label(
             bar,
@@ -195,18 +209,34 @@ class App(tk.Tk):
         # Cria notebook com as principais funcionalidades
         self.notebook = ttk.Notebook(self._main_container)
 
-        # Abas: Produtos, Vendas, Pedidos, Relatórios
-        self.products_tab = ProductFrame(self.notebook, self.db)
-        self.sales_tab = SalesFrame(self.notebook, self.db)
-        self.fulfillment_tab = FulfillmentFrame(self.notebook, self.db)
-        self.reports_tab = ReportsFrame(self.notebook, self.db)
+        # Abas: Produtos, Vendas, Pedidos, Relatórios.
+        # Cada aba é um LazyTab: a tela real (e suas consultas) só é criada
+        # quando a aba aparece pela primeira vez.
+        self.products_tab = LazyTab(self.notebook, lambda parent: ProductFrame(parent, self.db))
+        self.sales_tab = LazyTab(self.notebook, lambda parent: SalesFrame(parent, self.db))
+        self.fulfillment_tab = LazyTab(self.notebook, lambda parent: FulfillmentFrame(parent, self.db))
+        self.reports_tab = LazyTab(self.notebook, lambda parent: ReportsFrame(parent, self.db))
 
         self.notebook.add(self.products_tab, text="Produtos")
         self.notebook.add(self.sales_tab, text="Vendas")
         self.notebook.add(self.fulfillment_tab, text="Pedidos")
         self.notebook.add(self.reports_tab, text="Relatórios")
 
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
         self.notebook.pack(fill=tk.BOTH, expand=True)
+        # Constrói a aba inicial depois do primeiro desenho da janela
+        self.after_idle(self._on_tab_changed)
+
+    def _on_tab_changed(self, _event=None) -> None:
+        """Constrói a aba selecionada na primeira vez em que é exibida."""
+        if self.notebook is None:
+            return
+        try:
+            tab = self.nametowidget(self.notebook.select())
+        except (KeyError, tk.TclError):
+            return
+        if isinstance(tab, LazyTab):
+            tab.ensure_built()
 
     def logout(self) -> None:
         """Efetua logout retornando à tela de login."""
@@ -6,6 +6,8 @@ SaÃ­das:
 - assets/logo_small.png (128x128)
 - assets/logo_32.png (32x32)
 - assets/icon.ico (16, 24, 32, 48, 64, 128, 256)
+- data/icon_cache/logo_<N>.png + manifest.json (cache de ícones do app;
+  só o cache: python assets/generate_logo.py --icon-cache)
 
 Requer: Pillow
 """
@@ -46,7 +48,40 @@ def draw_logo(size: int = 512):
     return img
 
 
+# Tamanhos usados em runtime (iconphoto da janela + logo do cabeçalho por DPI)
+ICON_SIZES = (16, 24, 32, 40, 48, 64, 128, 256)
+
+
+def render_icon_cache(src: Path, cache_dir: Path, sizes: tuple[int, ...] = ICON_SIZES) -> dict[int, Path]:
+    """Pré-renderiza `src` nos tamanhos de ícone e grava `manifest.json`.
+
+    O manifesto guarda o mtime da origem: enquanto `src` não mudar, o app lê os
+    PNGs prontos com `tk.PhotoImage` e nem importa o Pillow (ver utils/icons.py).
+    """
+    import json
+    from PIL import Image  # type: ignore
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    base = Image.open(src).convert("RGBA")
+    out: dict[int, Path] = {}
+    for sz in sizes:
+        path = cache_dir / f"logo_{sz}.png"
+        base.resize((sz, sz), Image.LANCZOS).save(path)
+        out[sz] = path
+    manifest = {"source": str(src), "source_mtime_ns": src.stat().st_mtime_ns, "sizes": list(sizes)}
+    (cache_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    return out
+
+
 def main() -> None:
+    import sys
+
+    # Apenas (re)gera o cache de ícones a partir da logo existente
+    if "--icon-cache" in sys.argv:
+        out = render_icon_cache(Path("assets") / "logo.png", Path("data") / "icon_cache")
+        print(f"Cache de ícones gerado em data/icon_cache ({', '.join(str(s) for s in out)})")
+        return
+
     try:
         from PIL import Image  # type: ignore
     except Exception as e:
@@ -66,6 +101,9 @@ def main() -> None:
     base = draw_logo(256).convert("RGBA")
     base.save(out_dir / "icon.ico", format="ICO", sizes=[(s, s) for s in sizes])
 
+    # Cache de ícones pré-renderizados (lido pelo app sem Pillow)
+    render_icon_cache(out_dir / "logo.png", Path("data") / "icon_cache")
+
     print("Logo gerada em assets/logo.png, assets/logo_small.png e assets/logo_32.png")
     print("Ãcone gerado em data/icon.ico (16..256)")
 
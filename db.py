@@ -4,38 +4,234 @@ Camada de acesso a dados (SQLite) para o sistema de Controle de Estoque e Vendas
 Responsável por:
 - Conexão com o banco (arquivo .db no diretório data/)
 - Criação automática das tabelas (users, products, sales, sale_items)
+- Registro de alterações por trigger (change_log/change_counters) para as telas
 - Fornecer conexões para os models
+- Transações de escrita com lock imediato e nova tentativa (vários caixas)
+- Leitura em fluxo (`iter_query`/`fetch_batches`): linhas em blocos, memória constante
+
+Concorrência
+    O SQLite aceita um escritor por vez. Transação "deferred" (padrão do
+    Python) lê primeiro e só pede o lock de escrita no primeiro INSERT/UPDATE;
+    se outro processo escreveu no meio, a troca de lock falha com
+    "database is locked". `Database.transaction()` abre com BEGIN IMMEDIATE
+    (o lock vem antes da primeira leitura) e `run_in_transaction()` repete a
+    unidade de trabalho inteira, com espera aleatória crescente, quando o lock
+    não sai dentro do busy timeout.
 """
 
 from __future__ import annotations
 
+import itertools
 import os
+import queue
+import random
 import sqlite3
-from contextlib import closing
+import threading
+import time
+from contextlib import closing, contextmanager
 from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+BUSY_TIMEOUT_ENV = "STOCK_BUSY_TIMEOUT"  # segundos; padrão 5 (igual ao sqlite3)
+
+# Tabelas com registro de alterações (change_log/change_counters via triggers)
+TRACKED_TABLES = ("products", "orders", "sales", "promotions")
+CHANGE_LOG_KEEP = 100_000  # entradas mantidas em change_log (poda na abertura e pelo ChangeFeed)
+STREAM_BATCH = 1000  # linhas por fetchmany nos geradores `iter_*`
+
+
+def fetch_batches(cur: sqlite3.Cursor, batch_size: int = STREAM_BATCH) -> Iterator[Any]:
+    """Gera as linhas de um cursor já executado, `batch_size` por vez (fetchmany)."""
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def is_busy_error(e: BaseException) -> bool:
+    """True para "database is locked"/"database is busy" (vale tentar de novo)."""
+    if not isinstance(e, sqlite3.OperationalError):
+        return False
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def prune_change_log(conn: sqlite3.Connection, keep: int = CHANGE_LOG_KEEP) -> int:
+    """Mantém só as `keep` entradas mais recentes de change_log (leitores atrasados recarregam tudo)."""
+    return conn.execute(
+        "DELETE FROM change_log WHERE id <= (SELECT MAX(id) FROM change_log) - ?;", (keep,)
+    ).rowcount
+
+
+class LockMetrics:
+    """Contadores de contenção de lock (thread-safe), expostos por `lock_metrics()`.
+
+    - wait: tempo no BEGIN IMMEDIATE (espera pelo lock de escrita)
+    - commit: tempo do COMMIT
+    - busy_errors: transações que não conseguiram o lock dentro do timeout
+    - retries / retry_sleep: novas tentativas e tempo dormindo entre elas
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.transactions = 0
+        self.busy_errors = 0
+        self.retries = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.commit_total = 0.0
+        self.commit_max = 0.0
+        self.retry_sleep = 0.0
+
+    def record(self, wait: float, commit: float) -> None:
+        with self._lock:
+            self.transactions += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.commit_total += commit
+            self.commit_max = max(self.commit_max, commit)
+
+    def record_busy(self, sleep: float | None) -> None:
+        with self._lock:
+            self.busy_errors += 1
+            if sleep is not None:
+                self.retries += 1
+                self.retry_sleep += sleep
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            n = self.transactions or 1
+            return {
+                "transactions": self.transactions,
+                "busy_errors": self.busy_errors,
+                "retries": self.retries,
+                "retry_sleep_s": round(self.retry_sleep, 4),
+                "lock_wait_total_s": round(self.wait_total, 4),
+                "lock_wait_mean_ms": round(self.wait_total / n * 1000, 3),
+                "lock_wait_max_ms": round(self.wait_max * 1000, 3),
+                "commit_mean_ms": round(self.commit_total / n * 1000, 3),
+                "commit_max_ms": round(self.commit_max * 1000, 3),
+            }
 
 
 class Database:
     """Abstrai as operações SQLite e garante criação de tabelas."""
 
-    def __init__(self, db_path: str) -> None:
+    # Nova tentativa de `run_in_transaction` (backoff exponencial com jitter total)
+    RETRY_ATTEMPTS = 5
+    RETRY_BASE_DELAY = 0.02  # s
+    RETRY_MAX_DELAY = 0.5    # s
+
+    def __init__(self, db_path: str, busy_timeout: float | None = None, init_schema: bool = True,
+                 read_only: bool = False) -> None:
         # Garante que a pasta de dados exista
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
         self.db_path = db_path
+        # Somente leitura: `mode=ro` e nada de criar/migrar tabelas
+        self.read_only = read_only
+        # Quanto cada conexão espera por um lock antes de "database is locked"
+        if busy_timeout is None:
+            busy_timeout = float(os.environ.get(BUSY_TIMEOUT_ENV) or 5.0)
+        self.busy_timeout = float(busy_timeout)
+        self.metrics = LockMetrics()
         # Inicializa o banco e cria tabelas quando necessário
-        self._init_db()
+        if init_schema and not read_only:
+            self._init_db()
 
     # ---------------------- Utilitários internos ----------------------
     def _connect(self) -> sqlite3.Connection:
         """Retorna uma conexão SQLite com verificação de integridade ligada."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._open_sqlite()
         conn.row_factory = sqlite3.Row  # acesso por nome de coluna
         conn.execute("PRAGMA foreign_keys = ON;")
         return conn
 
+    def _open_sqlite(self, **kwargs) -> sqlite3.Connection:
+        """`sqlite3.connect` com o busy timeout; `mode=ro` quando somente leitura."""
+        if self.read_only:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            return sqlite3.connect(uri, uri=True, timeout=self.busy_timeout, **kwargs)
+        return sqlite3.connect(self.db_path, timeout=self.busy_timeout, **kwargs)
+
+    # -------------------------- Transações ----------------------------
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Conexão dentro de uma transação: COMMIT ao sair, ROLLBACK em erro.
+
+        immediate=True pega o lock de escrita já no BEGIN, antes das leituras
+        de validação (estoque, status, próximo número) — o que foi lido não
+        muda até o COMMIT e não há troca de lock no meio da transação.
+        """
+        with closing(self._connect()) as conn:
+            t0 = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE;" if immediate else "BEGIN;")
+            wait = time.perf_counter() - t0
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            t1 = time.perf_counter()
+            conn.commit()
+            self.metrics.record(wait, time.perf_counter() - t1)
+
+    def run_in_transaction(self, work: Callable[[sqlite3.Connection], T],
+                           attempts: int | None = None) -> T:
+        """Executa `work(conn)` numa transação IMMEDIATE, repetindo se o lock não sair.
+
+        `work` precisa ser idempotente como unidade: em caso de "database is
+        locked" tudo é desfeito (ROLLBACK) e a função roda de novo do zero —
+        não faça efeitos fora do banco dentro dela. Erros de regra
+        (ValueError etc.) não são repetidos.
+        """
+        attempts = attempts or self.RETRY_ATTEMPTS
+        for attempt in itertools.count(1):
+            try:
+                with self.transaction() as conn:
+                    return work(conn)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt >= attempts:
+                    if is_busy_error(e):
+                        self.metrics.record_busy(None)
+                    raise
+                cap = min(self.RETRY_MAX_DELAY, self.RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                delay = random.uniform(0, cap)
+                self.metrics.record_busy(delay)
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def iter_query(self, sql: str, params: Any = (), row_factory: Callable[[sqlite3.Cursor, tuple], Any] | None = None,
+                   batch_size: int = STREAM_BATCH) -> Iterator[Any]:
+        """Gera as linhas de `sql` em blocos, com memória constante.
+
+        A conexão fica aberta enquanto o gerador estiver em uso e é fechada ao
+        terminar — inclusive num `break` do chamador (parada antecipada).
+        Enquanto aberta, a leitura segura um lock SHARED (em journal DELETE,
+        segura o COMMIT dos caixas): consuma sem pausas longas.
+        """
+        with closing(self._connect()) as conn:
+            cur = conn.cursor()
+            if row_factory is not None:
+                cur.row_factory = row_factory
+            try:
+                yield from fetch_batches(cur.execute(sql, params), batch_size)
+            finally:
+                cur.close()
+
+    def lock_metrics(self) -> dict[str, float]:
+        """Retrato das métricas de lock deste Database (para logs/endpoint)."""
+        return dict(self.metrics.snapshot(), busy_timeout_s=self.busy_timeout)
+
     def _init_db(self) -> None:
         """Cria tabelas se não existirem e garante usuário padrão."""
         with closing(self._connect()) as conn, conn:
+            # Bancos novos: páginas livres podem ser devolvidas aos poucos
+            # (`services.maintenance`); sem efeito em arquivo que já tem tabelas
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
             # Migração de esquemas antigos (se necessário)
             self._migrate_schema(conn)
             # Tabela de usuários (login simples)
@@ -155,6 +351,7 @@ class Database:
             # Índices úteis
             conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at);")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id);")
 
             # Movimentações de estoque (ledger)
             conn.execute(
@@ -171,8 +368,190 @@ class Database:
                 );
                 """
             )
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_mov_product ON stock_movements(product_id);")
+            # (product_id, id, change) cobre a conciliação (`services.reconcile`):
+            # soma por produto lendo só o índice, sem ir à tabela
+            conn.execute("DROP INDEX IF EXISTS idx_mov_product;")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_mov_product_id ON stock_movements(product_id, id, change);")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_mov_created ON stock_movements(created_at);")
+            # Vendas por data (relatórios e arquivamento) e itens por venda
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_datetime ON sales(datetime);")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id);")
+
+            # Saldo consolidado das movimentações já arquivadas (services.archive):
+            # estoque esperado = qty + soma das movimentações com id > through_movement_id
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS stock_baselines (
+                    product_id INTEGER PRIMARY KEY,
+                    qty INTEGER NOT NULL DEFAULT 0,
+                    through_movement_id INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT
+                );
+                """
+            )
+            # Estoque inicial de cada produto novo vira o seu baseline
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_products_baseline AFTER INSERT ON products
+                BEGIN
+                    INSERT OR IGNORE INTO stock_baselines (product_id, qty, through_movement_id, updated_at)
+                    VALUES (NEW.id, NEW.stock_qty, 0, NEW.created_at);
+                END;
+                """
+            )
+
+            # Promoções (models.promotions): desconto automático no carrinho
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS promotions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    kind TEXT NOT NULL CHECK(kind IN ('PERCENT','TIER','BXGY')),
+                    scope TEXT NOT NULL CHECK(scope IN ('SKU','CATEGORY','GROUP','ALL')),
+                    target TEXT,               -- SKU/categoria/grupo (NULL em ALL)
+                    percent REAL,              -- PERCENT
+                    tiers TEXT,                -- TIER: "qtd:perc;qtd:perc" (ex.: "10:5;50:8")
+                    buy_qty INTEGER,           -- BXGY: leve buy_qty + get_qty, pague buy_qty
+                    get_qty INTEGER,
+                    starts_at TEXT,            -- vigência (ISO; opcionais)
+                    ends_at TEXT,
+                    days TEXT,                 -- dias da semana, 0=segunda (ex.: "01234")
+                    hours TEXT,                -- faixa diária "HH:MM-HH:MM"
+                    active INTEGER NOT NULL DEFAULT 1,
+                    created_at TEXT
+                );
+                """
+            )
+
+            # "Comprados juntos" (models.basket_model): pares nos dois sentidos;
+            # o índice entrega os parceiros de um produto já ordenados
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS product_pairs (
+                    product_id INTEGER NOT NULL,
+                    other_id INTEGER NOT NULL,
+                    baskets INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, other_id)
+                ) WITHOUT ROWID;
+                """
+            )
+            # A reconstrução em lote troca a tabela inteira e leva o índice com
+            # outro nome; só cria este se a tabela estiver sem índice
+            if not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = 'product_pairs' AND sql IS NOT NULL;"
+            ).fetchone():
+                conn.execute("CREATE INDEX idx_pairs_rank ON product_pairs(product_id, baskets DESC, other_id);")
+
+            # Resumos incrementais do livro-razão (models/rollup_model.py):
+            # rollup_state guarda o último id de origem já somado em cada resumo
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rollup_state (
+                    name TEXT PRIMARY KEY,
+                    last_id INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS movement_daily (
+                    product_id INTEGER NOT NULL,
+                    day TEXT NOT NULL,                      -- aaaa-mm-dd (UTC)
+                    out_qty INTEGER NOT NULL DEFAULT 0,     -- envios de pedido (ORDER_SHIP)
+                    in_qty INTEGER NOT NULL DEFAULT 0,      -- recebimentos (RECEIPT)
+                    adjust_qty INTEGER NOT NULL DEFAULT 0,  -- saldo de ajustes e contagens
+                    PRIMARY KEY (product_id, day)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_movement_daily_day ON movement_daily(day, product_id, out_qty);")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sales_daily (
+                    product_id INTEGER NOT NULL,
+                    day TEXT NOT NULL,                      -- aaaa-mm-dd (UTC, de sales.datetime)
+                    qty INTEGER NOT NULL DEFAULT 0,
+                    revenue REAL NOT NULL DEFAULT 0,        -- soma de subtotal_net
+                    PRIMARY KEY (product_id, day)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_day ON sales_daily(day, product_id, qty, revenue);")
+
+            # Compras: pedidos de compra e recebimentos (movimentos usam ref_type RECEIPT)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS purchase_orders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    supplier TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    received_at TEXT,
+                    notes TEXT
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS purchase_order_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    po_id INTEGER NOT NULL,
+                    product_id INTEGER NOT NULL,
+                    sku TEXT NOT NULL,
+                    qty_ordered INTEGER NOT NULL CHECK(qty_ordered > 0),
+                    qty_received INTEGER NOT NULL DEFAULT 0,
+                    unit_cost REAL NOT NULL CHECK(unit_cost >= 0),
+                    FOREIGN KEY(po_id) REFERENCES purchase_orders(id),
+                    FOREIGN KEY(product_id) REFERENCES products(id)
+                );
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_po_items_po ON purchase_order_items(po_id);")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS receipts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    po_id INTEGER,
+                    received_at TEXT NOT NULL,
+                    lines_count INTEGER NOT NULL,
+                    total_qty INTEGER NOT NULL,
+                    total_cost REAL NOT NULL,
+                    notes TEXT,
+                    FOREIGN KEY(po_id) REFERENCES purchase_orders(id)
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS receipt_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    receipt_id INTEGER NOT NULL,
+                    product_id INTEGER NOT NULL,
+                    qty INTEGER NOT NULL CHECK(qty > 0),
+                    unit_cost REAL,
+                    FOREIGN KEY(receipt_id) REFERENCES receipts(id),
+                    FOREIGN KEY(product_id) REFERENCES products(id)
+                );
+                """
+            )
+
+            # Sessões de contagem de inventário (movimentos usam ref_type COUNT)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS count_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,
+                    started_at TEXT NOT NULL,
+                    posted_at TEXT,
+                    lines_count INTEGER NOT NULL DEFAULT 0,
+                    adjusted_count INTEGER NOT NULL DEFAULT 0,
+                    notes TEXT
+                );
+                """
+            )
+
+            self._create_change_tracking(conn)
 
             # Garante um usuário padrão caso a tabela esteja vazia
             cur = conn.execute("SELECT COUNT(*) AS n FROM users;")
@@ -185,6 +564,48 @@ class Database:
                     "INSERT INTO users (username, password_hash, criado_em) VALUES (?, ?, ?);",
                     ("admin", hash_password("admin"), datetime.utcnow().isoformat()),
                 )
+
+    def _create_change_tracking(self, conn: sqlite3.Connection) -> None:
+        """Registro de alterações para as telas (ver `services.changes`).
+
+        - change_log: uma linha por linha inserida/alterada/excluída (I/U/D).
+        - change_counters: versão por tabela; o leitor compara as versões e só
+          lê change_log das tabelas que mudaram.
+        Os triggers gravam na mesma transação da alteração — vale para qualquer
+        processo ou ferramenta que escreva no arquivo.
+        """
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS change_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                op TEXT NOT NULL
+            );
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS change_counters (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        for table in TRACKED_TABLES:
+            conn.execute("INSERT OR IGNORE INTO change_counters (table_name, version) VALUES (?, 0);", (table,))
+            for event, op, ref in (("INSERT", "I", "NEW"), ("UPDATE", "U", "NEW"), ("DELETE", "D", "OLD")):
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_chg_{op.lower()} AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {ref}.id, '{op}');
+                        UPDATE change_counters SET version = version + 1 WHERE table_name = '{table}';
+                    END;
+                    """
+                )
+        prune_change_log(conn)
+
     # --------------------------- Usuários -----------------------------
     def validate_user(self, username: str, password_hash: str) -> bool:
         """Valida usuário/senha pelo hash informado."""
@@ -280,3 +701,74 @@ class Database:
                     conn.execute("ALTER TABLE orders ADD COLUMN customer_address TEXT;")
                 except sqlite3.DatabaseError:
                     pass
+
+
+class _PooledConnection:
+    """Conexão emprestada do pool: `close()` devolve ao pool em vez de fechar.
+
+    Mantém o uso dos models (`with closing(db._connect()) as conn, conn:`)
+    sem alteração; o resto é delegado à conexão real.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, pool: "PooledDatabase") -> None:
+        self._conn = conn
+        self._pool = pool
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    def __enter__(self) -> "_PooledConnection":
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return self._conn.__exit__(*exc)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool._release(conn)
+
+
+class PooledDatabase(Database):
+    """Database que reaproveita conexões (para servidores com várias threads).
+
+    - pool_size: conexões ociosas mantidas; acima disso, novas conexões são
+      criadas sob demanda e fechadas ao devolver (nunca bloqueia).
+    - read_only: abre com `mode=ro` e não roda criação/migração de tabelas —
+      use para leitores, com o esquema já criado por um `Database` normal.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 4, read_only: bool = False) -> None:
+        self.pool_size = int(pool_size)
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        # Leitores não criam/migram: o esquema já existe
+        super().__init__(db_path, read_only=read_only)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = self._open_sqlite(check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        return _PooledConnection(conn, self)  # type: ignore[return-value]
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()  # nunca devolve transação pendente ao pool
+        if self._idle.qsize() < self.pool_size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,163 @@
+"""
+Módulo: models/basket_model.py
+
+Visão geral
+    "Comprados juntos": em quantas vendas cada par de produtos apareceu. A
+    tabela `product_pairs` guarda os dois sentidos — (a, b) e (b, a) — para
+    que os parceiros de um produto sejam uma faixa do índice
+    (product_id, baskets DESC, other_id), já na ordem do ranking.
+
+Manutenção
+    - record_basket: soma 1 nos pares de uma venda, na transação da própria
+      venda (`SaleModel.sale_writer`).
+    - count_pairs + replace_pairs: reconstrução em lote (services.basket),
+      com contagem esparsa — só pares que existem ocupam memória.
+    Cestas com mais de MAX_BASKET produtos distintos (pedidos de atacado)
+    não contam pares: geram n² pares e não dizem o que "vai junto".
+
+Consulta no caixa
+    `PairIndex` mantém o top-K de cada produto consultado em memória (LRU
+    com validade) e lê o que falta numa conexão própria: uma consulta é um
+    acesso a dict (µs) ou uma busca no índice na primeira vez.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from db import Database
+
+MAX_BASKET = 40        # produtos distintos por venda para contar pares
+TOP_K = 10             # parceiros guardados em memória por produto
+INDEX_TTL = 300.0      # segundos até reler o top-K de um produto
+INDEX_MAX_PRODUCTS = 50_000
+
+Pair = tuple[int, int]  # (outro produto, nº de vendas juntos)
+
+_UPSERT_SQL = """
+INSERT INTO product_pairs (product_id, other_id, baskets) VALUES (?, ?, 1)
+ON CONFLICT(product_id, other_id) DO UPDATE SET baskets = baskets + 1;
+"""
+
+
+def _basket_ids(product_ids: Iterable[int]) -> list[int]:
+    ids = sorted({int(p) for p in product_ids})
+    return ids if 2 <= len(ids) <= MAX_BASKET else []
+
+
+def record_basket(conn: sqlite3.Connection, product_ids: Iterable[int]) -> int:
+    """Soma a venda nos pares (na transação do chamador). Retorna as linhas tocadas."""
+    ids = _basket_ids(product_ids)
+    rows = [(a, b) for a in ids for b in ids if a != b]
+    if rows:
+        conn.executemany(_UPSERT_SQL, rows)
+    return len(rows)
+
+
+def count_pairs(baskets: Iterable[Iterable[int]], counts: dict[int, int] | None = None) -> dict[int, int]:
+    """Contagem esparsa: chave (a << 32) | b com a < b -> nº de cestas."""
+    counts = {} if counts is None else counts
+    get = counts.get
+    for basket in baskets:
+        ids = _basket_ids(basket)
+        for i, a in enumerate(ids):
+            hi = a << 32
+            for b in ids[i + 1:]:
+                key = hi | b
+                counts[key] = get(key, 0) + 1
+    return counts
+
+
+def iter_baskets(rows: Iterable[tuple[int, int]]) -> Iterable[list[int]]:
+    """(sale_id, product_id) ordenado por sale_id -> produtos de cada venda."""
+    current, basket = None, []
+    for sale_id, product_id in rows:
+        if sale_id != current:
+            if basket:
+                yield basket
+            current, basket = sale_id, []
+        basket.append(product_id)
+    if basket:
+        yield basket
+
+
+def pair_rows(counts: dict[int, int], min_count: int = 1) -> Iterable[tuple[int, int, int]]:
+    """Linhas de `product_pairs` (os dois sentidos) a partir de `count_pairs`."""
+    mask = (1 << 32) - 1
+    for key, n in counts.items():
+        if n >= min_count:
+            a, b = key >> 32, key & mask
+            yield a, b, n
+            yield b, a, n
+
+
+class PairIndex:
+    """Top-K por produto em memória, sobre `product_pairs`."""
+
+    def __init__(self, db: Database, k: int = TOP_K, ttl: float = INDEX_TTL,
+                 max_products: int = INDEX_MAX_PRODUCTS) -> None:
+        self.db = db
+        self.k = k
+        self.ttl = ttl
+        self.max_products = max_products
+        self._cache: OrderedDict[int, tuple[float, tuple[Pair, ...]]] = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def top(self, product_id: int) -> tuple[Pair, ...]:
+        """Parceiros do produto, do mais frequente ao menos (até k)."""
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(product_id)
+            if hit is not None and now - hit[0] < self.ttl:
+                self._cache.move_to_end(product_id)
+                return hit[1]
+            if self._conn is None:
+                self._conn = self.db._open_sqlite(check_same_thread=False)
+                self._conn.execute("PRAGMA query_only = ON;")
+            pairs = tuple(self._conn.execute(
+                "SELECT other_id, baskets FROM product_pairs WHERE product_id = ?"
+                " ORDER BY baskets DESC, other_id LIMIT ?;", (product_id, self.k)))
+            self._cache[product_id] = (now, pairs)
+            self._cache.move_to_end(product_id)
+            if len(self._cache) > self.max_products:
+                self._cache.popitem(last=False)
+            return pairs
+
+    def also_bought(self, product_ids: Iterable[int], limit: int = TOP_K) -> list[Pair]:
+        """Ranking para uma cesta: soma das vendas em comum com cada item, sem os que já estão nela."""
+        basket = {int(p) for p in product_ids}
+        scores: dict[int, int] = {}
+        for pid in basket:
+            for other, n in self.top(pid):
+                if other not in basket:
+                    scores[other] = scores.get(other, 0) + n
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cache.clear()
+
+
+_indexes: dict[str, PairIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def pair_index(db: Database) -> PairIndex:
+    """Índice compartilhado por arquivo de banco (telas, serviço e servidor)."""
+    with _indexes_lock:
+        idx = _indexes.get(db.db_path)
+        if idx is None:
+            idx = _indexes[db.db_path] = PairIndex(db)
+        return idx
@@ -0,0 +1,276 @@
+"""
+Módulo: models/bulk_model.py
+
+Visão geral
+    Operações em lote sobre produtos: reajuste de preço (percentual ou valor
+    absoluto) por categoria/grupo e correção de estoque para muitos SKUs.
+    Substitui N chamadas a `ProductModel.update`/`adjust_stock` (cada uma com
+    sua conexão e leitura-modificação-escrita) por UPDATEs em conjunto numa
+    única transação, com prévia (dry-run).
+
+Livro-razão (ledger)
+    Toda alteração de estoque gera uma linha em `stock_movements`. O helper
+    `post_stock_deltas` é compartilhado com contagem de inventário e
+    recebimento de compras: quem chama preenche `temp._stock_deltas` com
+    `stage_stock_deltas` e o post aplica tudo com dois comandos SQL.
+
+Mapa rápido
+    - BulkModel.reprice: reajuste de `sale_price` para um conjunto filtrado.
+    - BulkModel.adjust_stock_many: lista de (SKU, delta) -> estoque + movimentos.
+    - stage_stock_deltas/post_stock_deltas: núcleo set-based de baixa/entrada.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, TypeVar
+
+from db import Database
+
+T = TypeVar("T")
+
+
+@dataclass
+class PriceChange:
+    product_id: int
+    sku: str
+    name: str
+    cost_price: float
+    old_price: float
+    new_price: float
+    error: str | None = None
+
+
+@dataclass
+class RepriceResult:
+    changes: list[PriceChange] = field(default_factory=list)
+    applied: int = 0
+    dry_run: bool = False
+
+    @property
+    def errors(self) -> list[PriceChange]:
+        return [c for c in self.changes if c.error]
+
+
+@dataclass
+class StockChange:
+    product_id: int | None
+    sku: str
+    name: str
+    old_qty: int
+    delta: int
+    error: str | None = None
+
+    @property
+    def new_qty(self) -> int:
+        return self.old_qty + self.delta
+
+
+@dataclass
+class StockAdjustResult:
+    changes: list[StockChange] = field(default_factory=list)
+    applied: int = 0
+    dry_run: bool = False
+
+    @property
+    def errors(self) -> list[StockChange]:
+        return [c for c in self.changes if c.error]
+
+
+# ------------------------- Núcleo set-based (estoque) -------------------------
+def stage_stock_deltas(conn: sqlite3.Connection, deltas: Iterable[tuple[int, int]]) -> None:
+    """Cria/zera `temp._stock_deltas` e carrega (product_id, delta).
+
+    Deltas repetidos para o mesmo produto são somados.
+    """
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS _stock_deltas (product_id INTEGER PRIMARY KEY, delta INTEGER NOT NULL);"
+    )
+    conn.execute("DELETE FROM temp._stock_deltas;")
+    conn.executemany(
+        """
+        INSERT INTO temp._stock_deltas (product_id, delta) VALUES (?, ?)
+        ON CONFLICT(product_id) DO UPDATE SET delta = delta + excluded.delta;
+        """,
+        ((int(pid), int(d)) for pid, d in deltas),
+    )
+
+
+def post_stock_deltas(conn: sqlite3.Connection, reason: str, ref_type: str,
+                      ref_id: int | None = None) -> int:
+    """Aplica `temp._stock_deltas` em `products` e registra os movimentos.
+
+    Deve rodar dentro da transação do chamador. Deltas zero são ignorados.
+    Quem chama é responsável por remover antes os deltas que deixariam o
+    estoque negativo (a CHECK de `products` abortaria a transação inteira).
+    Retorna o número de produtos alterados.
+    """
+    now = datetime.utcnow().isoformat()
+    conn.execute("DELETE FROM temp._stock_deltas WHERE delta = 0;")
+    cur = conn.execute(
+        """
+        UPDATE products
+           SET stock_qty = stock_qty + (SELECT d.delta FROM temp._stock_deltas d WHERE d.product_id = products.id),
+               updated_at = ?
+         WHERE id IN (SELECT product_id FROM temp._stock_deltas);
+        """,
+        (now,),
+    )
+    changed = cur.rowcount
+    conn.execute(
+        """
+        INSERT INTO stock_movements (product_id, change, reason, ref_type, ref_id, created_at)
+        SELECT product_id, delta, ?, ?, ?, ? FROM temp._stock_deltas ORDER BY product_id;
+        """,
+        (reason, ref_type, ref_id, now),
+    )
+    return int(changed)
+
+
+class BulkModel:
+    """Reajuste de preços e ajustes de estoque em lote (uma transação)."""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    # ----------------------------- Preços -----------------------------
+    def reprice(self, mode: str, value: float, category: str | None = None,
+                group_code: str | None = None, sku_prefix: str | None = None,
+                all_products: bool = False, dry_run: bool = False) -> RepriceResult:
+        """Reajusta `sale_price` dos produtos filtrados.
+
+        - mode "percent": novo = preço * (1 + value/100)  (ex.: 10 ou -5)
+        - mode "absolute": novo = preço + value            (ex.: 2.50 ou -1)
+        Filtros são por igualdade (categoria, grupo) e prefixo de SKU; sem
+        filtro, é preciso confirmar com `all_products=True`.
+        Produtos cujo novo preço ficaria abaixo do custo (ou negativo) não são
+        alterados e aparecem com `error` na prévia.
+        """
+        if mode == "percent":
+            if float(value) <= -100:
+                raise ValueError("Percentual deve ser maior que -100")
+            expr = "ROUND(sale_price * (1 + ? / 100.0), 2)"
+        elif mode == "absolute":
+            expr = "ROUND(sale_price + ?, 2)"
+        else:
+            raise ValueError("Modo de reajuste inválido (use 'percent' ou 'absolute')")
+        where, params = self._filters(category, group_code, sku_prefix, all_products)
+
+        def work(conn: sqlite3.Connection) -> RepriceResult:
+            result = RepriceResult(dry_run=dry_run)
+            cur = conn.execute(
+                f"SELECT id, sku, name, cost_price, sale_price, {expr} AS new_price FROM products"
+                f" WHERE {where} ORDER BY name;",
+                [float(value), *params],
+            )
+            for r in cur.fetchall():
+                new_price = float(r["new_price"])
+                error = None
+                if new_price < 0:
+                    error = "Preço de venda ficaria negativo"
+                elif new_price < float(r["cost_price"]):
+                    error = "Preço de venda não pode ser menor que o preço de custo"
+                result.changes.append(
+                    PriceChange(int(r["id"]), r["sku"], r["name"], float(r["cost_price"]),
+                                float(r["sale_price"]), new_price, error)
+                )
+            if dry_run:
+                return result
+            cur = conn.execute(
+                f"UPDATE products SET sale_price = {expr}, updated_at = ?"
+                f" WHERE {where} AND {expr} >= cost_price;",
+                [float(value), datetime.utcnow().isoformat(), *params, float(value)],
+            )
+            result.applied = int(cur.rowcount)
+            return result
+
+        return self._run(work, dry_run)
+
+    def _run(self, work: Callable[[sqlite3.Connection], T], dry_run: bool) -> T:
+        """Prévia: só leitura. Aplicação: BEGIN IMMEDIATE (prévia e escrita veem o mesmo estado)."""
+        if dry_run:
+            with closing(self.db._connect()) as conn:
+                return work(conn)
+        return self.db.run_in_transaction(work)
+
+    @staticmethod
+    def _filters(category: str | None, group_code: str | None, sku_prefix: str | None,
+                 all_products: bool) -> tuple[str, list[object]]:
+        where: list[str] = []
+        params: list[object] = []
+        if category and category.strip():
+            where.append("category = ?")
+            params.append(category.strip())
+        if group_code and group_code.strip():
+            where.append("group_code = ?")
+            params.append(group_code.strip())
+        if sku_prefix and sku_prefix.strip():
+            where.append("sku LIKE ?")
+            params.append(sku_prefix.strip().upper() + "%")
+        if not where:
+            if not all_products:
+                raise ValueError("Informe categoria, grupo ou prefixo de SKU (ou all_products=True)")
+            where.append("1 = 1")
+        return " AND ".join(where), params
+
+    # ----------------------------- Estoque ----------------------------
+    def adjust_stock_many(self, deltas: Iterable[tuple[str, int]], reason: str = "Ajuste em lote",
+                          ref_type: str = "ADJUST", dry_run: bool = False) -> StockAdjustResult:
+        """Aplica uma lista de (SKU, delta) numa transação.
+
+        Deltas do mesmo SKU são somados. SKUs inexistentes e ajustes que
+        deixariam o estoque negativo são reportados e não aplicados; os demais
+        entram em `products` e `stock_movements` (ref_type ADJUST).
+        """
+        deltas = [(str(sku).strip().upper(), int(d)) for sku, d in deltas]  # reusada se a transação repetir
+
+        def work(conn: sqlite3.Connection) -> StockAdjustResult:
+            result = StockAdjustResult(dry_run=dry_run)
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS _sku_deltas (sku TEXT PRIMARY KEY, delta INTEGER NOT NULL);"
+            )
+            conn.execute("DELETE FROM temp._sku_deltas;")
+            conn.executemany(
+                """
+                INSERT INTO temp._sku_deltas (sku, delta) VALUES (?, ?)
+                ON CONFLICT(sku) DO UPDATE SET delta = delta + excluded.delta;
+                """,
+                deltas,
+            )
+            # (1) SKUs sem produto
+            cur = conn.execute(
+                """
+                SELECT d.sku, d.delta FROM temp._sku_deltas d
+                 WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.sku = d.sku) ORDER BY d.sku;
+                """
+            )
+            for r in cur.fetchall():
+                result.changes.append(StockChange(None, r[0], "", 0, int(r[1]), "Produto inexistente"))
+            # (2) Prévia com estoque atual e validação de negativo
+            cur = conn.execute(
+                """
+                SELECT p.id, p.sku, p.name, p.stock_qty, d.delta
+                  FROM temp._sku_deltas d JOIN products p ON p.sku = d.sku
+                 WHERE d.delta <> 0 ORDER BY p.sku;
+                """
+            )
+            valid: list[tuple[int, int]] = []
+            for r in cur.fetchall():
+                ch = StockChange(int(r[0]), r[1], r[2], int(r[3]), int(r[4]))
+                if ch.new_qty < 0:
+                    ch.error = "Ajuste resultaria em estoque negativo"
+                else:
+                    valid.append((ch.product_id, ch.delta))
+                result.changes.append(ch)
+            conn.execute("DROP TABLE temp._sku_deltas;")
+            if dry_run:
+                return result
+            # (3) Aplicação set-based + ledger
+            stage_stock_deltas(conn, valid)
+            result.applied = post_stock_deltas(conn, reason or "Ajuste em lote", ref_type)
+            return result
+
+        return self._run(work, dry_run)
@@ -0,0 +1,339 @@
+"""
+Carrinho e cálculo de preços: uma única regra para tela, vendas e pedidos.
+
+Regra por linha (Decimal, 2 casas, arredondamento half-up — `round2`):
+    bruto    = round2(preço unitário) × qtd
+    promoção = oferta da melhor promoção da linha (models.promotions), ≤ bruto
+    desconto = promoção + round2((bruto − promoção) × desconto% / 100)
+    líquido  = bruto − desconto
+
+`price_line` aplica a regra a uma linha; `Cart` mantém as linhas e os totais
+atualizados de forma incremental (cada alteração soma/subtrai só a diferença
+da linha: O(1), mesmo com milhares de linhas) e avisa os assinantes com um
+`CartChange` por linha — a tela mexe só na linha alterada.
+
+Promoções
+    Com um `PromotionBook`, cada linha guarda as regras vigentes em `Cart.at`
+    que casam com ela (SKU/categoria/grupo). Uma alteração de quantidade ou de
+    linhas recalcula só essas regras; as demais linhas daquelas regras que
+    mudarem de preço (faixa atingida, unidade grátis) também geram "update".
+    Sem livro, `promo_discount` informado em `add` é usado como está (pedido
+    gerado a partir de uma venda já precificada).
+
+Usado por:
+- views/sales_view.py (carrinho da tela de Vendas)
+- models/sale_model.py (`SaleModel.sale_writer`) e models/order_model.py
+  (totais gravados em sales/orders) — os mesmos centavos da tela.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Protocol
+
+from utils.formatting import round2, validate_percent
+
+if TYPE_CHECKING:
+    from models.promotions import PromotionBook, Rule
+
+ZERO = Decimal("0.00")
+HUNDRED = Decimal(100)
+
+
+@dataclass(frozen=True, slots=True)
+class LinePrice:
+    gross: Decimal
+    discount: Decimal
+    net: Decimal
+
+
+def price_line(unit_price: Decimal | float | int | str, qty: int,
+               discount_percent: Decimal | float | int | str = 0,
+               promo_discount: Decimal | float | int | str = 0) -> LinePrice:
+    """Bruto, desconto (promoção + manual) e líquido de uma linha (mesma conta em todo o sistema)."""
+    gross = round2(round2(unit_price) * int(qty))
+    promo = min(round2(promo_discount), gross)
+    discount = promo + round2((gross - promo) * round2(discount_percent) / HUNDRED)
+    return LinePrice(gross, discount, gross - discount)
+
+
+class LineInput(Protocol):
+    """Qualquer item com estes campos (SaleItemInput, OrderItemInput...)."""
+
+    product_id: int
+    sku: str
+    name: str
+    qty: int
+    unit_price: Decimal | float
+    discount_percent: Decimal | float
+
+
+@dataclass(slots=True)
+class CartLine:
+    key: int                 # identificador estável da linha no carrinho
+    product_id: int
+    sku: str
+    name: str
+    qty: int
+    unit_price: Decimal
+    discount_percent: Decimal
+    category: str | None = None
+    group_code: str | None = None
+    promo_discount: Decimal = ZERO
+    promotion_id: int | None = None
+    gross: Decimal = ZERO
+    discount: Decimal = ZERO  # promoção + desconto manual
+    net: Decimal = ZERO
+
+    def _reprice(self) -> None:
+        p = price_line(self.unit_price, self.qty, self.discount_percent, self.promo_discount)
+        self.gross, self.discount, self.net = p.gross, p.discount, p.net
+
+
+@dataclass(frozen=True, slots=True)
+class CartChange:
+    kind: str                # "add" | "update" | "remove" | "clear"
+    line: CartLine | None    # None em "clear"
+
+
+CartListener = Callable[[CartChange], None]
+
+
+class Cart:
+    """Linhas + totais correntes; cada operação custa O(1) mais as regras da linha."""
+
+    def __init__(self, promotions: PromotionBook | None = None, at: datetime | None = None) -> None:
+        self._lines: dict[int, CartLine] = {}   # ordem de inserção
+        self._keys = itertools.count(1)
+        self._qty_by_product: dict[int, int] = {}
+        self.gross = ZERO
+        self.discount = ZERO
+        self.net = ZERO
+        self._listeners: list[CartListener] = []
+        self.promotions = promotions
+        self.at = at or datetime.now()          # instante de referência das vigências
+        # Estado das promoções, por id de regra
+        self._line_rules: dict[int, tuple[Rule, ...]] = {}   # chave da linha -> regras
+        self._members: dict[int, dict[int, CartLine]] = {}
+        self._rule_qty: dict[int, int] = {}
+        self._rule_perc: dict[int, Decimal] = {}
+        self._offers: dict[int, dict[int, Decimal]] = {}      # regra -> {chave: oferta}
+        self._cheapest: dict[int, list[tuple[Decimal, int]]] = {}  # BXGY: (preço, chave) ordenado
+
+    @classmethod
+    def from_items(cls, items: Iterable[LineInput], promotions: PromotionBook | None = None,
+                   at: datetime | None = None) -> "Cart":
+        cart = cls(promotions, at)
+        for it in items:
+            cart.add(it.product_id, it.sku, it.name, it.qty, it.unit_price, it.discount_percent,
+                     category=getattr(it, "category", None), group_code=getattr(it, "group_code", None),
+                     promo_discount=getattr(it, "promo_discount", 0))
+        return cart
+
+    # ---------------------------- Leitura ------------------------------
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[CartLine]:
+        return iter(self._lines.values())
+
+    def get(self, key: int) -> CartLine | None:
+        return self._lines.get(key)
+
+    def qty_for(self, product_id: int) -> int:
+        """Quantidade do produto já no carrinho (todas as linhas)."""
+        return self._qty_by_product.get(product_id, 0)
+
+    def promotion_of(self, line: CartLine) -> Rule | None:
+        """Regra aplicada na linha (None sem promoção)."""
+        return self.promotions.get(line.promotion_id) if self.promotions is not None else None
+
+    # -------------------------- Assinaturas ----------------------------
+    def subscribe(self, listener: CartListener) -> Callable[[], None]:
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def _emit(self, kind: str, line: CartLine | None) -> None:
+        change = CartChange(kind, line)
+        for listener in list(self._listeners):
+            listener(change)
+
+    def _emit_repriced(self, keys: Iterable[int], skip: int) -> None:
+        """"update" das outras linhas que mudaram de preço por causa de uma regra."""
+        for key in sorted(keys):
+            line = self._lines.get(key)
+            if key != skip and line is not None:
+                self._emit("update", line)
+
+    # --------------------------- Alterações ----------------------------
+    def add(self, product_id: int, sku: str, name: str, qty: int, unit_price: Decimal | float | str,
+            discount_percent: Decimal | float | str = 0, category: str | None = None,
+            group_code: str | None = None, promo_discount: Decimal | float | str = 0) -> CartLine:
+        if int(qty) <= 0:
+            raise ValueError("Quantidade deve ser >= 1")
+        line = CartLine(next(self._keys), int(product_id), str(sku), str(name), int(qty),
+                        round2(unit_price), validate_percent(discount_percent), category, group_code)
+        if self.promotions is None:
+            line.promo_discount = round2(promo_discount)
+        line._reprice()
+        self._lines[line.key] = line
+        self._account(line, +1)
+        repriced: set[int] = set()
+        if self.promotions is not None:
+            rules = self.promotions.rules_for(line.sku, category, group_code, self.at)
+            if rules:
+                self._line_rules[line.key] = rules
+                for rule in rules:
+                    self._members.setdefault(rule.id, {})[line.key] = line
+                    self._rule_qty[rule.id] = self._rule_qty.get(rule.id, 0) + line.qty
+                    if rule.kind == "BXGY":
+                        bisect.insort(self._cheapest.setdefault(rule.id, []), (line.unit_price, line.key))
+                repriced = self._refresh(rules, line.key)
+        self._emit("add", line)
+        self._emit_repriced(repriced, line.key)
+        return line
+
+    def update(self, key: int, qty: int | None = None,
+               discount_percent: Decimal | float | str | None = None) -> CartLine:
+        line = self._lines[key]
+        if qty is not None and int(qty) <= 0:
+            raise ValueError("Quantidade deve ser >= 1")
+        perc = validate_percent(discount_percent) if discount_percent is not None else None
+        old_qty = line.qty
+        self._account(line, -1)
+        if qty is not None:
+            line.qty = int(qty)
+        if perc is not None:
+            line.discount_percent = perc
+        line._reprice()
+        self._account(line, +1)
+        repriced: set[int] = set()
+        rules = self._line_rules.get(key, ())
+        if rules and line.qty != old_qty:  # desconto manual não muda as ofertas
+            for rule in rules:
+                self._rule_qty[rule.id] += line.qty - old_qty
+            repriced = self._refresh(rules, key)
+        self._emit("update", line)
+        self._emit_repriced(repriced, key)
+        return line
+
+    def remove(self, key: int) -> CartLine | None:
+        line = self._lines.pop(key, None)
+        if line is None:
+            return None
+        self._account(line, -1)
+        rules = self._line_rules.pop(key, ())
+        for rule in rules:
+            self._members[rule.id].pop(key, None)
+            self._rule_qty[rule.id] -= line.qty
+            if rule.kind == "BXGY":
+                order = self._cheapest[rule.id]
+                del order[bisect.bisect_left(order, (line.unit_price, key))]
+        repriced = self._refresh(rules, key)
+        self._emit("remove", line)
+        self._emit_repriced(repriced, key)
+        return line
+
+    def clear(self) -> None:
+        self._lines.clear()
+        self._qty_by_product.clear()
+        for state in (self._line_rules, self._members, self._rule_qty, self._rule_perc, self._offers,
+                      self._cheapest):
+            state.clear()
+        self.gross = self.discount = self.net = ZERO
+        self._emit("clear", None)
+
+    def restart(self, promotions: PromotionBook | None = None, at: datetime | None = None) -> None:
+        """Nova venda: esvazia e troca o livro de promoções e o instante de referência."""
+        self.promotions = promotions
+        self.at = at or datetime.now()
+        self.clear()
+
+    def apply_discount(self, discount_percent: Decimal | float | str) -> None:
+        """Desconto geral: o mesmo percentual em todas as linhas (um evento por linha)."""
+        perc = validate_percent(discount_percent)
+        for key in list(self._lines):
+            self.update(key, discount_percent=perc)
+
+    # --------------------------- Promoções -----------------------------
+    def _refresh(self, rules: Iterable[Rule], changed: int) -> set[int]:
+        """Recalcula as ofertas de `rules` após mudar a linha `changed`.
+
+        Devolve as chaves das linhas (existentes) cujo preço mudou.
+        """
+        dirty: set[int] = {changed}
+        for rule in rules:
+            dirty |= self._refresh_rule(rule, changed)
+        repriced = set()
+        for key in dirty:
+            line = self._lines.get(key)
+            if line is not None and self._settle(line):
+                repriced.add(key)
+        return repriced
+
+    def _refresh_rule(self, rule: Rule, changed: int) -> set[int]:
+        """Ofertas de uma regra; devolve as chaves cuja oferta mudou."""
+        members = self._members.get(rule.id)
+        old = self._offers.get(rule.id, {})
+        if not members:
+            for state in (self._members, self._rule_qty, self._rule_perc, self._offers, self._cheapest):
+                state.pop(rule.id, None)
+            return set(old)
+        qty = self._rule_qty[rule.id]
+        if rule.kind == "BXGY":
+            # Unidades grátis: as mais baratas primeiro (percorre só até esgotar)
+            new: dict[int, Decimal] = {}
+            free = rule.free_units(qty)
+            for _price, key in self._cheapest[rule.id]:
+                if free <= 0:
+                    break
+                line = members[key]
+                units = min(free, line.qty)
+                new[line.key] = round2(line.unit_price * units)
+                free -= units
+        else:
+            perc = rule.percent_for(qty)
+            if perc == self._rule_perc.get(rule.id):
+                # Mesma faixa: só a oferta da linha alterada muda
+                line = members.get(changed)
+                offer = round2(line.gross * perc / HUNDRED) if line is not None and perc else None
+                if offer:
+                    old[changed] = offer
+                else:
+                    old.pop(changed, None)
+                self._offers[rule.id] = old
+                return {changed}
+            self._rule_perc[rule.id] = perc
+            new = {k: round2(ln.gross * perc / HUNDRED) for k, ln in members.items()} if perc else {}
+            new = {k: v for k, v in new.items() if v}
+        self._offers[rule.id] = new
+        return {k for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+
+    def _settle(self, line: CartLine) -> bool:
+        """Aplica a melhor oferta na linha; True se o preço mudou."""
+        best, best_id = ZERO, None
+        for rule in self._line_rules.get(line.key, ()):  # em ordem de id: empate fica com a mais antiga
+            offer = self._offers.get(rule.id, {}).get(line.key, ZERO)
+            if offer > best:
+                best, best_id = offer, rule.id
+        if best == line.promo_discount and best_id == line.promotion_id:
+            return False
+        self._account(line, -1)
+        line.promo_discount, line.promotion_id = best, best_id
+        line._reprice()
+        self._account(line, +1)
+        return True
+
+    def _account(self, line: CartLine, sign: int) -> None:
+        self.gross += sign * line.gross
+        self.discount += sign * line.discount
+        self.net += sign * line.net
+        left = self._qty_by_product.get(line.product_id, 0) + sign * line.qty
+        if left:
+            self._qty_by_product[line.product_id] = left
+        else:
+            self._qty_by_product.pop(line.product_id, None)
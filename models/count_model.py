@@ -0,0 +1,232 @@
+"""
+Módulo: models/count_model.py
+
+Visão geral
+    Contagem física de inventário (cycle count) em sessão: o operador digita,
+    bipa ou importa pares SKU/quantidade; ao final, todas as diferenças são
+    lançadas de uma vez em `products` e `stock_movements` (ref_type COUNT).
+
+Regra da variação
+    O estoque do sistema é fotografado no início da sessão (snapshot).
+    variação = contado - estoque_no_início. O ajuste lançado é essa variação,
+    aplicada sobre o estoque ATUAL — assim vendas/envios feitos durante a
+    contagem não são desfeitos.
+
+Mapa rápido
+    - CountSession.start: cria a sessão e tira o snapshot (uma consulta).
+    - CountSession.add / set_count / load_file: bufferizam as contagens (memória).
+    - CountSession.variances: prévia das diferenças.
+    - CountSession.post: uma transação com UPDATE/INSERT em conjunto.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from db import Database
+from models.bulk_model import post_stock_deltas, stage_stock_deltas
+from models.product_import import _parse_int
+
+
+def _is_int(value: str) -> bool:
+    try:
+        _parse_int(value)
+    except ValueError:
+        return False
+    return True
+
+
+@dataclass
+class CountVariance:
+    product_id: int
+    sku: str
+    name: str
+    expected: int  # estoque no início da sessão
+    counted: int
+
+    @property
+    def variance(self) -> int:
+        return self.counted - self.expected
+
+
+@dataclass
+class CountPostResult:
+    session_id: int
+    adjusted: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)  # (SKU, mensagem)
+
+
+class CountSession:
+    """Sessão de contagem: buffer em memória + lançamento em lote."""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.session_id: int | None = None
+        self.status = "NOVA"
+        # sku -> (product_id, name, stock_qty no início)
+        self._snapshot: dict[str, tuple[int, str, int]] = {}
+        self._counts: dict[str, int] = {}
+
+    # ------------------------------ Sessão ------------------------------
+    def start(self, notes: str = "") -> int:
+        """Abre a sessão e fotografa o estoque atual de todos os produtos."""
+        def work(conn: sqlite3.Connection) -> tuple[int, dict[str, tuple[int, str, int]]]:
+            cur = conn.execute(
+                "INSERT INTO count_sessions (status, started_at, notes) VALUES ('ABERTA', ?, ?);",
+                (datetime.utcnow().isoformat(), notes),
+            )
+            session_id = int(cur.lastrowid)
+            cur = conn.execute("SELECT sku, id, name, stock_qty FROM products;")
+            return session_id, {r[0]: (int(r[1]), r[2], int(r[3])) for r in cur}
+
+        self.session_id, self._snapshot = self.db.run_in_transaction(work)
+        self.status = "ABERTA"
+        self._counts.clear()
+        return self.session_id
+
+    @property
+    def counts(self) -> dict[str, int]:
+        return dict(self._counts)
+
+    # ----------------------------- Contagem -----------------------------
+    def add(self, sku: str, qty: int = 1) -> int:
+        """Soma `qty` ao SKU (uso típico: cada bipe do leitor). Retorna o total."""
+        sku = self._check_sku(sku)
+        if qty < 0:
+            raise ValueError("Quantidade deve ser >= 0")
+        self._counts[sku] = self._counts.get(sku, 0) + int(qty)
+        return self._counts[sku]
+
+    def set_count(self, sku: str, qty: int) -> None:
+        """Define a quantidade contada (digitação direta substitui a anterior)."""
+        sku = self._check_sku(sku)
+        if qty < 0:
+            raise ValueError("Quantidade deve ser >= 0")
+        self._counts[sku] = int(qty)
+
+    def remove(self, sku: str) -> None:
+        self._counts.pop(sku.strip().upper(), None)
+
+    def load_file(self, file_path: str | Path) -> list[tuple[int, str]]:
+        """Importa pares SKU/quantidade de CSV (`sku;qtd`) ou JSONL.
+
+        As quantidades são somadas ao que já foi contado. Retorna a lista de
+        erros (nº da linha, mensagem); linhas válidas são sempre aproveitadas.
+        """
+        p = Path(file_path)
+        errors: list[tuple[int, str]] = []
+        with p.open("r", newline="", encoding="utf-8-sig") as f:
+            if p.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+                rows = []
+                for line_no, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        obj = json.loads(line)
+                        rows.append((line_no, obj.get("sku"), obj.get("qty", obj.get("qtd"))))
+                    except (json.JSONDecodeError, AttributeError):
+                        errors.append((line_no, "JSON inválido"))
+            else:
+                first = f.readline()
+                delimiter = ";" if first.count(";") >= first.count(",") else ","
+                head = next(csv.reader([first], delimiter=delimiter), [])
+                rows = []
+                # Cabeçalho é opcional: se a 2ª coluna for numérica, é dado
+                if len(head) >= 2 and head[1].strip() and _is_int(head[1]):
+                    rows.append((1, head[0], head[1]))
+                for line_no, row in enumerate(csv.reader(f, delimiter=delimiter), start=2):
+                    if row:
+                        rows.append((line_no, row[0], row[1] if len(row) > 1 else "1"))
+        for line_no, sku, qty in rows:
+            try:
+                self.add(str(sku or ""), _parse_int(qty))
+            except ValueError as e:
+                errors.append((line_no, str(e) if "Produto" in str(e) else f"Quantidade inválida: {e}"))
+        return errors
+
+    def _check_sku(self, sku: str) -> str:
+        if self.status != "ABERTA":
+            raise ValueError("Sessão de contagem não está aberta")
+        sku = (sku or "").strip().upper()
+        if sku not in self._snapshot:
+            raise ValueError(f"Produto inexistente: {sku}")
+        return sku
+
+    # ----------------------------- Resultado ----------------------------
+    def variances(self, zero_uncounted: bool = False, only_differences: bool = True) -> list[CountVariance]:
+        """Diferenças entre o contado e o estoque do início da sessão.
+
+        - zero_uncounted: contagem completa — produtos não bipados contam como 0.
+        """
+        res: list[CountVariance] = []
+        skus = self._snapshot.keys() if zero_uncounted else self._counts.keys()
+        for sku in skus:
+            pid, name, expected = self._snapshot[sku]
+            v = CountVariance(pid, sku, name, expected, self._counts.get(sku, 0))
+            if v.variance or not only_differences:
+                res.append(v)
+        res.sort(key=lambda v: v.sku)
+        return res
+
+    def post(self, zero_uncounted: bool = False, reason: str = "Contagem de inventário") -> CountPostResult:
+        """Lança todas as variações numa única transação (ref_type COUNT).
+
+        Variações que deixariam o estoque atual negativo (ex.: vendas após o
+        início da contagem) não são lançadas e voltam em `errors`.
+        """
+        if self.status != "ABERTA" or self.session_id is None:
+            raise ValueError("Sessão de contagem não está aberta")
+        diffs = self.variances(zero_uncounted=zero_uncounted)
+
+        def work(conn: sqlite3.Connection) -> CountPostResult:
+            result = CountPostResult(session_id=self.session_id)
+            stage_stock_deltas(conn, ((v.product_id, v.variance) for v in diffs))
+            # (1) Remove ajustes que ficariam negativos sobre o estoque atual
+            cur = conn.execute(
+                """
+                SELECT p.sku FROM temp._stock_deltas d JOIN products p ON p.id = d.product_id
+                 WHERE p.stock_qty + d.delta < 0 ORDER BY p.sku;
+                """
+            )
+            result.errors = [(r[0], "Ajuste resultaria em estoque negativo") for r in cur.fetchall()]
+            # Produto excluído depois do início da contagem: a variação não tem onde ser lançada
+            cur = conn.execute("SELECT product_id FROM temp._stock_deltas WHERE product_id NOT IN (SELECT id FROM products);")
+            gone = {int(r[0]) for r in cur.fetchall()}
+            result.errors += sorted((v.sku, "Produto excluído durante a contagem") for v in diffs if v.product_id in gone)
+            conn.execute(
+                """
+                DELETE FROM temp._stock_deltas
+                 WHERE product_id NOT IN (SELECT id FROM products)
+                    OR product_id IN (SELECT p.id FROM products p JOIN temp._stock_deltas d ON d.product_id = p.id
+                                       WHERE p.stock_qty + d.delta < 0);
+                """
+            )
+            # (2) Produtos + ledger em conjunto
+            result.adjusted = post_stock_deltas(conn, reason, "COUNT", self.session_id)
+            conn.execute(
+                """
+                UPDATE count_sessions SET status = 'LANCADA', posted_at = ?, lines_count = ?, adjusted_count = ?
+                 WHERE id = ?;
+                """,
+                (datetime.utcnow().isoformat(), len(self._counts), result.adjusted, self.session_id),
+            )
+            return result
+
+        # BEGIN IMMEDIATE: o estoque lido para validar é o mesmo que recebe os deltas
+        result = self.db.run_in_transaction(work)
+        self.status = "LANCADA"
+        return result
+
+    def cancel(self) -> None:
+        if self.session_id is None or self.status != "ABERTA":
+            return
+        session_id = self.session_id
+        self.db.run_in_transaction(
+            lambda conn: conn.execute("UPDATE count_sessions SET status = 'CANCELADA' WHERE id = ?;", (session_id,))
+        )
+        self.status = "CANCELADA"
@@ -13,17 +13,33 @@ Status e transições:
 
 Timestamps:
 - prepared_at, ready_at, shipped_at, canceled_at são marcados quando a transição ocorre.
+
+Consultas:
+- list devolve OrderRecord (objeto com __slots__ montado direto da tupla do
+  cursor) que também se comporta como dict: o["status"], o.get("notes"), dict(o).
+- iter_list/iter_items geram as linhas em blocos (memória constante).
+
+Criação em lote:
+- create_many recebe um iterável de OrderInput (ex.: dump de marketplace) e grava
+  em transações por bloco, com números de pedido pré-alocados e falhas por pedido.
 """
 
 from __future__ import annotations
 
+import sqlite3
+import time
+from collections.abc import Iterator, Mapping
 from contextlib import closing
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Iterable, Optional
-
-from db import Database
-from utils.ids import next_order_number
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Iterable, Optional
+
+from db import STREAM_BATCH, Database, is_busy_error
+from models.cart import HUNDRED, ZERO, Cart, price_line
+from utils.formatting import round2, to_decimal
+from utils.ids import format_order_number, last_order_suffix, next_order_number
 from utils.time import now_iso
 
 
@@ -34,6 +50,68 @@ ALLOWED_TRANSITIONS = {
 }
 
 
+ORDER_COLUMNS = (
+    "id", "order_number", "customer_name", "customer_address", "customer_phone", "customer_email",
+    "shipping_method", "shipping_cost", "status", "created_at", "prepared_at", "ready_at", "shipped_at",
+    "canceled_at", "total_gross", "total_discount", "total_net", "notes",
+)
+
+
+class OrderRecord(Mapping):
+    """Linha de `orders` com __slots__ e leitura estilo dict (o["id"], o.get(...)).
+
+    Ocupa bem menos que um dict por pedido e é criada direto da tupla do
+    cursor (`order_row`). `items_qty` só existe quando a consulta o traz.
+    """
+
+    __slots__ = (*ORDER_COLUMNS, "items_qty")
+
+    def __init__(self, *values: Any) -> None:
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return (k for k in self.__slots__ if hasattr(self, k))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"OrderRecord(id={self['id']!r}, order_number={self.get('order_number')!r}, status={self.get('status')!r})"
+
+
+def order_row(_cursor: sqlite3.Cursor, row: tuple) -> OrderRecord:
+    """Row factory: tupla na ordem de `ORDER_COLUMNS` (+ items_qty) -> OrderRecord."""
+    return OrderRecord(*row)
+
+
+def _stored_promo(unit_price: float, qty: int, discount_percent: float, discount_value: float) -> Decimal:
+    """Promoção contida no desconto gravado de um item (venda/pedido).
+
+    A linha guarda só o desconto total D = promoção + round2((bruto - promoção)·%/100)
+    (`models.cart.price_line`); com o % manual conhecido, isola a promoção e
+    confere o centavo refazendo a conta.
+    """
+    gross = price_line(unit_price, qty).gross
+    pct = round2(discount_percent)
+    total = min(round2(discount_value), gross)
+    if pct >= HUNDRED:  # desconto manual de 100%: a promoção não altera o total
+        return ZERO
+    guess = (total - gross * pct / HUNDRED) / (1 - pct / HUNDRED)
+    guess = max(min(round2(guess), gross), ZERO)
+    cent = Decimal("0.01")
+    for promo in (guess, guess - cent, guess + cent):
+        if ZERO <= promo <= gross and price_line(unit_price, qty, discount_percent, promo).discount == total:
+            return promo
+    return guess
+
+
 @dataclass
 class OrderItemInput:
     product_id: int
@@ -42,6 +120,37 @@ class OrderItemInput:
     qty: int
     unit_price: float
     discount_percent: float
+    promo_discount: float = 0.0  # promoção já calculada na venda (models.cart)
+
+
+@dataclass
+class OrderInput:
+    """Pedido completo para criação em lote (`OrderModel.create_many`)."""
+    customer_name: str
+    items: list[OrderItemInput]
+    customer_phone: str | None = None
+    customer_email: str | None = None
+    customer_address: str | None = None
+    shipping_method: str | None = None
+    shipping_cost: float = 0.0
+    notes: str = ""
+
+
+@dataclass
+class OrderFailure:
+    index: int  # posição do pedido no iterável de entrada
+    message: str
+
+
+@dataclass
+class BulkOrderResult:
+    created: list[tuple[int, int]] = field(default_factory=list)  # (índice, order_id)
+    failures: list[OrderFailure] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def orders_per_second(self) -> float:
+        return len(self.created) / self.elapsed if self.elapsed > 0 else 0.0
 
 
 class OrderModel:
@@ -55,71 +164,161 @@ class OrderModel:
                notes: str = "") -> int:
         if not items:
             raise ValueError("Pedido deve conter ao menos um item")
-        order_number = next_order_number(self.db)
-
-        # Calcula totais
-        total_gross = 0.0
-        total_discount = 0.0
-        total_net = 0.0
-        for it in items:
-            subtotal_gross = round(it.unit_price * it.qty, 2)
-            disc_value = round(subtotal_gross * (it.discount_percent / 100.0), 2)
-            subtotal_net = round(subtotal_gross - disc_value, 2)
-            total_gross += subtotal_gross
-            total_discount += disc_value
-            total_net += subtotal_net
-        total_net = round(total_net + float(shipping_cost or 0), 2)
+        order = OrderInput(
+            customer_name=customer_name,
+            items=items,
+            customer_phone=customer_phone,
+            customer_email=customer_email,
+            customer_address=customer_address,
+            shipping_method=shipping_method,
+            shipping_cost=shipping_cost,
+            notes=notes,
+        )
+        # Número lido dentro da transação IMMEDIATE: sem duplicidade entre caixas
+        return self.db.run_in_transaction(
+            lambda conn: self._insert_order(conn, next_order_number(conn), order)
+        )
 
-        with closing(self.db._connect()) as conn, conn:
+    def create_many(self, orders: Iterable[OrderInput], chunk_size: int = 500,
+                    prefix: str = "HND-ORD") -> BulkOrderResult:
+        """Cria pedidos em lote (ex.: dump de marketplace) em transações por bloco.
+
+        Estratégia:
+            (1) Lê `chunk_size` pedidos do iterável (streaming, memória constante).
+            (2) Abre uma transação IMMEDIATE por bloco (`run_in_transaction`:
+                repetida se o banco estiver ocupado) e lê o último número de
+                pedido UMA vez; os números do bloco são pré-alocados em sequência.
+            (3) Valida cada pedido (itens, qtd, desconto, produto existente) e
+                grava cabeçalho + itens (executemany) dentro de um SAVEPOINT.
+            (4) Falhas de um pedido entram em `failures` (com o índice no
+                iterável) e não abortam o restante do lote.
+        """
+        started = time.perf_counter()
+        result = BulkOrderResult()
+        numbered = enumerate(orders)
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                break
+            # Repetido inteiro se o lock não sair: só entra no resultado após o COMMIT
+            created, failures = self.db.run_in_transaction(lambda conn: self._create_chunk(conn, chunk, prefix))
+            result.created.extend(created)
+            result.failures.extend(failures)
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _create_chunk(self, conn: sqlite3.Connection, chunk: list[tuple[int, OrderInput]],
+                      prefix: str) -> tuple[list[tuple[int, int]], list[OrderFailure]]:
+        created: list[tuple[int, int]] = []
+        failures: list[OrderFailure] = []
+        product_ids = sorted({it.product_id for _, o in chunk for it in o.items})
+        existing: set[int] = set()
+        for i in range(0, len(product_ids), 500):
+            part = product_ids[i:i + 500]
             cur = conn.execute(
-                """
-                INSERT INTO orders (
-                    order_number, customer_name, customer_address, customer_phone, customer_email, shipping_method, shipping_cost,
-                    status, created_at, total_gross, total_discount, total_net, notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, 'AGUARDANDO', ?, ?, ?, ?, ?);
-                """,
-                (
-                    order_number,
-                    customer_name,
-                    customer_address,
-                    customer_phone,
-                    customer_email,
-                    shipping_method,
-                    float(shipping_cost or 0),
-                    now_iso(),
-                    round(total_gross, 2),
-                    round(total_discount, 2),
-                    round(total_net, 2),
-                    notes,
-                ),
+                f"SELECT id FROM products WHERE id IN ({','.join('?' * len(part))});", part
             )
-            order_id = int(cur.lastrowid)
-
-            for it in items:
-                subtotal_gross = round(it.unit_price * it.qty, 2)
-                disc_value = round(subtotal_gross * (it.discount_percent / 100.0), 2)
-                subtotal_net = round(subtotal_gross - disc_value, 2)
-                conn.execute(
-                    """
-                    INSERT INTO order_items (
-                        order_id, product_id, sku, name, qty, unit_price, discount_percent, discount_value, subtotal_gross, subtotal_net
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-                    """,
-                    (
-                        order_id,
-                        it.product_id,
-                        it.sku,
-                        it.name,
-                        it.qty,
-                        round(float(it.unit_price), 2),
-                        round(float(it.discount_percent), 2),
-                        disc_value,
-                        subtotal_gross,
-                        subtotal_net,
-                    ),
+            existing.update(int(r[0]) for r in cur.fetchall())
+        suffix = last_order_suffix(conn, prefix)
+        for index, order in chunk:
+            error = self._validate_order(order, existing)
+            if error:
+                failures.append(OrderFailure(index, error))
+                continue
+            conn.execute("SAVEPOINT bulk_order;")
+            try:
+                order_id = self._insert_order(conn, format_order_number(suffix + 1, prefix), order)
+            except (sqlite3.DatabaseError, TypeError, ValueError, ArithmeticError) as e:
+                if is_busy_error(e):
+                    raise  # lock perdido: run_in_transaction refaz o bloco
+                conn.execute("ROLLBACK TO bulk_order;")
+                conn.execute("RELEASE bulk_order;")
+                failures.append(OrderFailure(index, str(e)))
+                continue
+            conn.execute("RELEASE bulk_order;")
+            suffix += 1
+            created.append((index, order_id))
+        return created, failures
+
+    @staticmethod
+    def _validate_order(order: OrderInput, existing_products: set[int]) -> str | None:
+        if not order.items:
+            return "Pedido deve conter ao menos um item"
+        where = "frete"
+        try:
+            shipping = to_decimal(order.shipping_cost or 0)
+            if not shipping.is_finite() or shipping < 0:
+                return "Frete deve ser um valor >= 0"
+            for it in order.items:
+                where = f"quantidade ({it.sku})"
+                if int(it.qty) <= 0:
+                    return f"Quantidade deve ser >= 1 ({it.sku})"
+                where = f"preço unitário ({it.sku})"
+                price = to_decimal(it.unit_price)
+                if not price.is_finite() or price < 0:
+                    return f"Preço unitário deve ser um valor >= 0 ({it.sku})"
+                where = f"percentual ({it.sku})"
+                if not 0 <= float(it.discount_percent) <= 100:  # NaN também cai aqui
+                    return f"Percentual deve estar entre 0 e 100 ({it.sku})"
+                if it.product_id not in existing_products:
+                    return f"Produto inexistente: {it.sku}"
+        except (TypeError, ValueError, ArithmeticError, AttributeError):
+            return f"Valor inválido: {where}"
+        return None
+
+    def _insert_order(self, conn: sqlite3.Connection, order_number: str, order: OrderInput) -> int:
+        """Grava cabeçalho e itens na conexão/transação do chamador."""
+        # Totais pela mesma regra da venda/tela (models.cart)
+        cart = Cart.from_items(order.items)
+        total_net = round2(cart.net + round2(order.shipping_cost or 0))
+
+        cur = conn.execute(
+            """
+            INSERT INTO orders (
+                order_number, customer_name, customer_address, customer_phone, customer_email, shipping_method, shipping_cost,
+                status, created_at, total_gross, total_discount, total_net, notes
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, 'AGUARDANDO', ?, ?, ?, ?, ?);
+            """,
+            (
+                order_number,
+                order.customer_name,
+                order.customer_address,
+                order.customer_phone,
+                order.customer_email,
+                order.shipping_method,
+                float(order.shipping_cost or 0),
+                now_iso(),
+                float(cart.gross),
+                float(cart.discount),
+                float(total_net),
+                order.notes,
+            ),
+        )
+        order_id = int(cur.lastrowid)
+
+        conn.executemany(
+            """
+            INSERT INTO order_items (
+                order_id, product_id, sku, name, qty, unit_price, discount_percent, discount_value, subtotal_gross, subtotal_net
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            [
+                (
+                    order_id,
+                    it.product_id,
+                    it.sku,
+                    it.name,
+                    it.qty,
+                    float(line.unit_price),
+                    float(line.discount_percent),
+                    float(line.discount),
+                    float(line.gross),
+                    float(line.net),
                 )
-
-            return order_id
+                for it, line in zip(order.items, cart)
+            ],
+        )
+        return order_id
 
     def create_from_sale(self, sale_id: int) -> Optional[int]:
         """Cria um pedido a partir de uma venda já registrada.
@@ -135,7 +334,8 @@ class OrderModel:
             if not s:
                 return None
             cur = conn.execute(
-                "SELECT product_id, sku, name, qty, unit_price, discount_percent FROM sale_items WHERE sale_id = ?;",
+                "SELECT product_id, sku, name, qty, unit_price, discount_percent, discount_value"
+                " FROM sale_items WHERE sale_id = ?;",
                 (sale_id,),
             )
             rows = cur.fetchall()
@@ -149,6 +349,9 @@ class OrderModel:
                     qty=r["qty"],
                     unit_price=float(r["unit_price"]),
                     discount_percent=float(r["discount_percent"]),
+                    # Promoção da venda (sale_items só guarda o desconto total)
+                    promo_discount=float(_stored_promo(r["unit_price"], r["qty"], r["discount_percent"],
+                                                       r["discount_value"])),
                 )
                 for r in rows
             ]
@@ -170,72 +373,86 @@ class OrderModel:
 
         Retorna o novo status.
         """
-        with closing(self.db._connect()) as conn, conn:
-            cur = conn.execute("SELECT status FROM orders WHERE id = ?;", (order_id,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Pedido inexistente")
-            status = row["status"]
-            if status not in ALLOWED_TRANSITIONS:
-                raise ValueError("Não é possível avançar este status")
-            next_map = {
-                "AGUARDANDO": "PREPARADO",
-                "PREPARADO": "ENVIADO",
-            }
-            new_status = next_map[status]
-            self._set_status(conn, order_id, status, new_status)
-            return new_status
+        return self.db.run_in_transaction(lambda conn: self._advance_status(conn, order_id))
+
+    def _advance_status(self, conn: sqlite3.Connection, order_id: int) -> str:
+        """Corpo de `advance_status`, na transação do chamador."""
+        cur = conn.execute("SELECT status FROM orders WHERE id = ?;", (order_id,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError("Pedido inexistente")
+        status = row["status"]
+        if status not in ALLOWED_TRANSITIONS:
+            raise ValueError("Não é possível avançar este status")
+        next_map = {
+            "AGUARDANDO": "PREPARADO",
+            "PREPARADO": "ENVIADO",
+        }
+        new_status = next_map[status]
+        self._set_status(conn, order_id, status, new_status)
+        return new_status
 
     def cancel(self, order_id: int) -> None:
-        with closing(self.db._connect()) as conn, conn:
-            cur = conn.execute("SELECT status FROM orders WHERE id = ?;", (order_id,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Pedido inexistente")
-            status = row["status"]
-            if status not in ("AGUARDANDO", "PREPARADO"):
-                raise ValueError("Pedido não pode ser cancelado neste status")
-            self._set_status(conn, order_id, status, "CANCELADO")
+        self.db.run_in_transaction(lambda conn: self._cancel(conn, order_id))
+
+    def _cancel(self, conn: sqlite3.Connection, order_id: int) -> None:
+        """Corpo de `cancel`, na transação do chamador."""
+        cur = conn.execute("SELECT status FROM orders WHERE id = ?;", (order_id,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError("Pedido inexistente")
+        status = row["status"]
+        if status not in ("AGUARDANDO", "PREPARADO"):
+            raise ValueError("Pedido não pode ser cancelado neste status")
+        self._set_status(conn, order_id, status, "CANCELADO")
 
     def ship(self, order_id: int) -> None:
-        """Marca como ENVIADO e baixa estoque. Transação atômica."""
-        with closing(self.db._connect()) as conn, conn:
-            cur = conn.execute("SELECT status FROM orders WHERE id = ?;", (order_id,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Pedido inexistente")
-            status = row["status"]
-            if status != "PREPARADO":
-                raise ValueError("Somente pedidos 'PREPARADO' podem ser enviados")
-
-            # Verifica itens e estoque
-            cur = conn.execute("SELECT product_id, qty FROM order_items WHERE order_id = ?;", (order_id,))
-            items = cur.fetchall()
-            if not items:
-                raise ValueError("Pedido sem itens")
-            for it in items:
-                cur2 = conn.execute("SELECT stock_qty FROM products WHERE id = ?;", (it["product_id"],))
-                r = cur2.fetchone()
-                if not r or int(r["stock_qty"]) < int(it["qty"]):
-                    raise ValueError("Estoque insuficiente para envio")
-
-            # Baixa estoque
-            for it in items:
-                conn.execute(
-                    "UPDATE products SET stock_qty = stock_qty - ? WHERE id = ?;",
-                    (int(it["qty"]), int(it["product_id"]))
-                )
-                # Registra movimentação
-                conn.execute(
-                    """
-                    INSERT INTO stock_movements (product_id, change, reason, ref_type, ref_id, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?);
-                    """,
-                    (int(it["product_id"]), -int(it["qty"]), "Envio de pedido", "ORDER_SHIP", order_id, now_iso()),
-                )
+        """Marca como ENVIADO e baixa estoque. Transação atômica.
 
-            # Atualiza status para ENVIADO
-            self._set_status(conn, order_id, status, "ENVIADO")
+        Status e estoque são lidos já com o lock de escrita (BEGIN IMMEDIATE);
+        se outro caixa segurar o lock além do busy timeout, a operação inteira
+        é repetida com espera aleatória (`Database.run_in_transaction`).
+        """
+        self.db.run_in_transaction(lambda conn: self._ship(conn, order_id))
+
+    def _ship(self, conn: sqlite3.Connection, order_id: int) -> None:
+        """Corpo do envio, na transação do chamador."""
+        cur = conn.execute("SELECT status FROM orders WHERE id = ?;", (order_id,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError("Pedido inexistente")
+        status = row["status"]
+        if status != "PREPARADO":
+            raise ValueError("Somente pedidos 'PREPARADO' podem ser enviados")
+
+        # Verifica itens e estoque
+        cur = conn.execute("SELECT product_id, qty FROM order_items WHERE order_id = ?;", (order_id,))
+        items = cur.fetchall()
+        if not items:
+            raise ValueError("Pedido sem itens")
+        for it in items:
+            cur2 = conn.execute("SELECT stock_qty FROM products WHERE id = ?;", (it["product_id"],))
+            r = cur2.fetchone()
+            if not r or int(r["stock_qty"]) < int(it["qty"]):
+                raise ValueError("Estoque insuficiente para envio")
+
+        # Baixa estoque
+        for it in items:
+            conn.execute(
+                "UPDATE products SET stock_qty = stock_qty - ? WHERE id = ?;",
+                (int(it["qty"]), int(it["product_id"]))
+            )
+            # Registra movimentação
+            conn.execute(
+                """
+                INSERT INTO stock_movements (product_id, change, reason, ref_type, ref_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                (int(it["product_id"]), -int(it["qty"]), "Envio de pedido", "ORDER_SHIP", order_id, now_iso()),
+            )
+
+        # Atualiza status para ENVIADO
+        self._set_status(conn, order_id, status, "ENVIADO")
 
     def _set_status(self, conn, order_id: int, old: str, new: str) -> None:
         if old == new:
@@ -259,8 +476,41 @@ class OrderModel:
         conn.execute(f"UPDATE orders SET {', '.join(sets)} WHERE id = ?;", params)
 
     # -------------------------- Consultas --------------------------
-    def list(self, status: str | None = None, search: str | None = None) -> list[dict]:
-        sql = "SELECT * FROM orders"
+    def list(self, status: str | None = None, search: str | None = None,
+             with_item_counts: bool = False, ids: Iterable[int] | None = None) -> list[OrderRecord]:
+        """Lista pedidos filtrados.
+
+        with_item_counts: inclui `items_qty` (soma das quantidades) na mesma
+        consulta, evitando uma consulta por pedido na tela de Pedidos.
+        ids: só esses pedidos (atualização de linhas alteradas na tela).
+        """
+        sql, params = self._list_query(status, search, with_item_counts, ids=ids)
+        with closing(self.db._connect()) as conn:
+            cur = conn.cursor()
+            cur.row_factory = order_row
+            return cur.execute(sql, params).fetchall()
+
+    def iter_list(self, status: str | None = None, search: str | None = None, with_item_counts: bool = False,
+                  created_from: str | None = None, created_to: str | None = None,
+                  batch_size: int = STREAM_BATCH) -> Iterator[OrderRecord]:
+        """Como `list`, mas gera os pedidos em blocos, do mais antigo ao mais novo.
+
+        created_from/created_to (ISO, fim exclusivo) filtram no SQL — use-os em
+        vez de descartar pedidos no Python.
+        """
+        sql, params = self._list_query(status, search, with_item_counts, created_from=created_from,
+                                       created_to=created_to, newest_first=False)
+        return self.db.iter_query(sql, params, order_row, batch_size)
+
+    @staticmethod
+    def _list_query(status: str | None, search: str | None, with_item_counts: bool,
+                    ids: Iterable[int] | None = None, created_from: str | None = None,
+                    created_to: str | None = None, newest_first: bool = True) -> tuple[str, list[object]]:
+        sql = f"SELECT {', '.join(ORDER_COLUMNS)}"
+        if with_item_counts:
+            sql += (", (SELECT COALESCE(SUM(qty), 0) FROM order_items"
+                    " WHERE order_items.order_id = orders.id) AS items_qty")
+        sql += " FROM orders"
         where = []
         params: list[object] = []
         if status:
@@ -269,19 +519,37 @@ class OrderModel:
         if search:
             where.append("(order_number LIKE ? OR customer_name LIKE ?)")
             params.extend([f"%{search}%", f"%{search}%"])
+        if ids is not None:
+            id_list = [int(i) for i in ids]
+            where.append(f"id IN ({','.join('?' * len(id_list)) or 'NULL'})")
+            params.extend(id_list)
+        if created_from:
+            where.append("created_at >= ?")
+            params.append(created_from)
+        if created_to:
+            where.append("created_at < ?")
+            params.append(created_to)
         if where:
             sql += " WHERE " + " AND ".join(where)
-        sql += " ORDER BY created_at DESC;"
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute(sql, params)
-            rows = [dict(r) for r in cur.fetchall()]
-        return rows
+        sql += " ORDER BY created_at DESC;" if newest_first else " ORDER BY created_at ASC;"
+        return sql, params
 
     def get_items(self, order_id: int) -> list[dict]:
         with closing(self.db._connect()) as conn:
             cur = conn.execute("SELECT * FROM order_items WHERE order_id = ? ORDER BY id;", (order_id,))
             return [dict(r) for r in cur.fetchall()]
 
+    def iter_items(self, order_ids: Iterable[int] | None = None,
+                   batch_size: int = STREAM_BATCH) -> Iterator[sqlite3.Row]:
+        """Itens de pedidos (todos ou de `order_ids`) em blocos, por pedido."""
+        sql = "SELECT * FROM order_items"
+        params: list[object] = []
+        if order_ids is not None:
+            id_list = [int(i) for i in order_ids]
+            sql += f" WHERE order_id IN ({','.join('?' * len(id_list)) or 'NULL'})"
+            params.extend(id_list)
+        return self.db.iter_query(sql + " ORDER BY order_id, id;", params, batch_size=batch_size)
+
     # ---------------------- Dados de Exemplo ----------------------
     def seed_examples(self) -> None:
         """Cria 5–10 pedidos de exemplo, se desejar. Usa primeiros produtos cadastrados.
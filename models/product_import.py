@@ -0,0 +1,320 @@
+"""
+Módulo: models/product_import.py
+
+Visão geral
+    Importação em lote de produtos a partir de CSV (separador `;` ou `,`) ou
+    JSONL (um objeto JSON por linha), pensada para catálogos de fornecedores.
+
+Como funciona (pipeline)
+    (1) O arquivo é lido em blocos (chunks) — nunca carregamos tudo na memória.
+    (2) Cada bloco vai para uma tabela temporária de staging via `executemany`.
+    (3) As validações rodam em SQL sobre o conjunto inteiro (SKU duplicado no
+        arquivo, custo > 0, venda >= custo, estoques >= 0...).
+    (4) As linhas válidas entram em `products` com um único
+        `INSERT ... SELECT ... ON CONFLICT(sku) DO UPDATE` (upsert).
+    Tudo acontece em UMA transação: ou o lote entra, ou nada muda.
+
+Erros por linha
+    Linhas inválidas não abortam o lote; voltam em `ImportResult.errors`
+    com o número da linha no arquivo, o SKU e a mensagem.
+
+Mapa rápido
+    - ProductImporter.import_file: ponto de entrada (caminho do arquivo).
+    - ProductImporter.import_rows: mesmo pipeline para um iterável de dicts.
+    - ImportResult / ImportRowError: resumo e erros por linha.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+import re
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping
+
+from db import Database
+
+
+# Nomes aceitos no cabeçalho do arquivo -> coluna da tabela `products`.
+# Inclui os cabeçalhos gerados por "Exportar CSV" da tela de Produtos.
+HEADER_ALIASES = {
+    "sku": "sku",
+    "codigo": "sku",
+    "name": "name",
+    "nome": "name",
+    "produto": "name",
+    "category": "category",
+    "categoria": "category",
+    "group_code": "group_code",
+    "group": "group_code",
+    "grupo": "group_code",
+    "cost_price": "cost_price",
+    "custo": "cost_price",
+    "preco_custo": "cost_price",
+    "sale_price": "sale_price",
+    "venda": "sale_price",
+    "preco_venda": "sale_price",
+    "preco": "sale_price",
+    "stock_qty": "stock_qty",
+    "estoque": "stock_qty",
+    "quantidade": "stock_qty",
+    "qtd": "stock_qty",
+    "min_stock": "min_stock",
+    "min": "min_stock",
+    "estoque_minimo": "min_stock",
+}
+
+# Validações em conjunto: (condição SQL sobre a staging, mensagem de erro).
+# A ordem importa: cada linha recebe apenas o primeiro erro encontrado.
+_VALIDATIONS: tuple[tuple[str, str], ...] = (
+    ("sku = '' OR name = ''", "SKU e Nome são obrigatórios"),
+    ("cost_price <= 0", "Preço de custo deve ser maior que zero"),
+    ("sale_price < 0", "Preço de venda deve ser maior ou igual a zero"),
+    ("sale_price < cost_price", "Preço de venda não pode ser menor que o preço de custo"),
+    ("stock_qty < 0 OR min_stock < 0", "Estoque e estoque mínimo devem ser >= 0"),
+    (
+        "EXISTS (SELECT 1 FROM temp._import_products d WHERE d.sku = _import_products.sku"
+        " AND d.line_no < _import_products.line_no)",
+        "SKU duplicado no arquivo",
+    ),
+)
+
+
+@dataclass
+class ImportRowError:
+    line_no: int
+    sku: str
+    message: str
+
+
+@dataclass
+class ImportResult:
+    total: int = 0
+    inserted: int = 0
+    updated: int = 0
+    errors: list[ImportRowError] = field(default_factory=list)
+    elapsed: float = 0.0
+    dry_run: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _parse_float(value: object) -> float:
+    """Converte número em texto (aceita `10.50`, `10,50`, `R$ 1.234,56`)."""
+    if isinstance(value, (int, float)):
+        f = float(value)
+    else:
+        s = str(value or "").replace("R$", "").replace(" ", "")
+        if "," in s:
+            s = s.replace(".", "").replace(",", ".")
+        f = float(s)
+    if not math.isfinite(f):  # "nan"/"inf" passam no float() mas não são preço
+        raise ValueError(f"valor não finito: {value}")
+    return round(f, 2)
+
+
+def _parse_int(value: object) -> int:
+    """Inteiro de planilha: aceita `5`, `5.0`, `5,0`; recusa frações (`5.5`).
+
+    `1.000` (milhar) é ambíguo com `1.0` e é recusado com mensagem própria.
+    """
+    if isinstance(value, int):
+        return value
+    s = str(value if value is not None else "").strip()
+    if not s:
+        return 0
+    if re.fullmatch(r"-?\d{1,3}(\.\d{3})+", s):
+        raise ValueError(f"{s} parece ter separador de milhar; informe sem ponto (ex.: 1000)")
+    if "," in s:
+        s = s.replace(".", "").replace(",", ".")
+    try:
+        d = Decimal(s)
+    except InvalidOperation:
+        raise ValueError("informe um inteiro (ex.: 5)") from None
+    if not d.is_finite():
+        raise ValueError("informe um inteiro (ex.: 5)")
+    if d != d.to_integral_value():
+        raise ValueError(f"{value} tem casas decimais; informe um inteiro (ex.: 5)")
+    return int(d)
+
+
+def _normalize_header(name: str) -> str:
+    return name.strip().lower().replace(" ", "_")
+
+
+class ProductImporter:
+    """Importador em lote de produtos com staging e validação em SQL."""
+
+    def __init__(self, db: Database, chunk_size: int = 5000) -> None:
+        self.db = db
+        self.chunk_size = chunk_size
+
+    # ------------------------- Leitura do arquivo -------------------------
+    def iter_file(self, file_path: str | Path) -> Iterator[tuple[int, Mapping[str, object]]]:
+        """Lê CSV ou JSONL em streaming, gerando (nº da linha, registro)."""
+        p = Path(file_path)
+        if p.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+            yield from self._iter_jsonl(p)
+        else:
+            yield from self._iter_csv(p)
+
+    def _iter_jsonl(self, p: Path) -> Iterator[tuple[int, Mapping[str, object]]]:
+        with p.open("r", encoding="utf-8-sig") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_no, {"__error__": "JSON inválido"}
+                    continue
+                if not isinstance(obj, dict):
+                    yield line_no, {"__error__": "JSON inválido"}
+                    continue
+                yield line_no, {HEADER_ALIASES.get(_normalize_header(k), k): v for k, v in obj.items()}
+
+    def _iter_csv(self, p: Path) -> Iterator[tuple[int, Mapping[str, object]]]:
+        with p.open("r", newline="", encoding="utf-8-sig") as f:
+            first = f.readline()
+            delimiter = ";" if first.count(";") >= first.count(",") else ","
+            header = next(csv.reader([first], delimiter=delimiter), [])
+            cols = [HEADER_ALIASES.get(_normalize_header(h), "") for h in header]
+            for line_no, row in enumerate(csv.reader(f, delimiter=delimiter), start=2):
+                if not row:
+                    continue
+                yield line_no, {c: v for c, v in zip(cols, row) if c}
+
+    # ------------------------------ Pipeline ------------------------------
+    def import_file(self, file_path: str | Path, update_existing: bool = True,
+                    dry_run: bool = False) -> ImportResult:
+        """Importa um arquivo CSV/JSONL. Veja `import_rows` para os parâmetros."""
+        return self.import_rows(self.iter_file(file_path), update_existing=update_existing, dry_run=dry_run)
+
+    def import_rows(self, rows: Iterable[tuple[int, Mapping[str, object]]],
+                    update_existing: bool = True, dry_run: bool = False) -> ImportResult:
+        """Carrega (nº da linha, registro) na staging, valida e faz upsert.
+
+        - update_existing: SKUs já cadastrados são atualizados (preços, nome,
+          categoria, grupo e mínimo). O estoque de produtos existentes NÃO é
+          alterado aqui — use ajuste de estoque para manter o histórico.
+          Se False, SKUs existentes viram erro "SKU já cadastrado".
+        - dry_run: executa tudo e desfaz no final (prévia dos erros).
+        """
+        started = time.perf_counter()
+        result = ImportResult(dry_run=dry_run)
+        now = datetime.utcnow().isoformat()
+        it = iter(rows)
+
+        with closing(self.db._connect()) as conn, conn:
+            conn.execute("PRAGMA temp_store = MEMORY;")
+            conn.execute("DROP TABLE IF EXISTS temp._import_products;")
+            conn.execute(
+                """
+                CREATE TEMP TABLE _import_products (
+                    line_no INTEGER PRIMARY KEY,
+                    sku TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    category TEXT,
+                    group_code TEXT,
+                    cost_price REAL,
+                    sale_price REAL,
+                    stock_qty INTEGER,
+                    min_stock INTEGER,
+                    error TEXT
+                );
+                """
+            )
+
+            # (1)+(2) Leitura em blocos e carga na staging
+            while True:
+                chunk = list(islice(it, self.chunk_size))
+                if not chunk:
+                    break
+                conn.executemany(
+                    "INSERT INTO temp._import_products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+                    [self._to_staging(line_no, rec) for line_no, rec in chunk],
+                )
+                result.total += len(chunk)
+
+            # (3) Validações em conjunto (SQL)
+            conn.execute("CREATE INDEX temp._import_products_sku ON _import_products(sku);")
+            validations = list(_VALIDATIONS)
+            if not update_existing:
+                validations.append(("sku IN (SELECT sku FROM main.products)", "SKU já cadastrado"))
+            for cond, message in validations:
+                conn.execute(
+                    f"UPDATE temp._import_products SET error = ? WHERE error IS NULL AND ({cond});",
+                    (message,),
+                )
+            cur = conn.execute(
+                "SELECT line_no, sku, error FROM temp._import_products WHERE error IS NOT NULL ORDER BY line_no;"
+            )
+            result.errors = [ImportRowError(int(r[0]), r[1], r[2]) for r in cur.fetchall()]
+            cur = conn.execute(
+                """
+                SELECT COUNT(*) FROM temp._import_products
+                 WHERE error IS NULL AND sku IN (SELECT sku FROM main.products);
+                """
+            )
+            result.updated = int(cur.fetchone()[0])
+            result.inserted = result.total - len(result.errors) - result.updated
+
+            # (4) Upsert das linhas válidas (estoque só entra em produtos novos)
+            conn.execute(
+                """
+                INSERT INTO products (sku, name, category, group_code, cost_price, sale_price,
+                                      stock_qty, min_stock, created_at, updated_at)
+                SELECT sku, name, category, group_code, cost_price, sale_price, stock_qty, min_stock, ?, ?
+                  FROM temp._import_products
+                 WHERE error IS NULL
+                 ORDER BY line_no
+                ON CONFLICT(sku) DO UPDATE SET
+                    name = excluded.name,
+                    category = excluded.category,
+                    group_code = excluded.group_code,
+                    cost_price = excluded.cost_price,
+                    sale_price = excluded.sale_price,
+                    min_stock = excluded.min_stock,
+                    updated_at = excluded.updated_at;
+                """,
+                (now, now),
+            )
+            conn.execute("DROP TABLE temp._import_products;")
+            if dry_run:
+                conn.rollback()
+
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def _to_staging(line_no: int, rec: Mapping[str, object]) -> tuple:
+        """Normaliza um registro para a tupla da staging (erros de parsing inclusos)."""
+        sku = str(rec.get("sku") or "").strip().upper()
+        name = str(rec.get("name") or "").strip()
+        category = str(rec.get("category") or "").strip() or None
+        group_code = str(rec.get("group_code") or "").strip() or None
+        error = rec.get("__error__")
+        cost = sale = None
+        stock = min_stock = 0
+        if not error:
+            try:
+                cost = _parse_float(rec.get("cost_price"))
+                sale = _parse_float(rec.get("sale_price"))
+            except ValueError:
+                error = "Preço inválido: informe um número (ex.: 10,50)"
+            try:
+                stock = _parse_int(rec.get("stock_qty"))
+                min_stock = _parse_int(rec.get("min_stock"))
+            except ValueError as e:
+                error = error or f"Estoque inválido: {e}"
+        return (line_no, sku, name, category, group_code, cost, sale, stock, min_stock, error)
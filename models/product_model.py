@@ -14,23 +14,30 @@ Como conversa com outros módulos
     - Utiliza `utils.formatting.round2` para cálculos com 2 casas decimais.
 
 Mapa rápido
-    - Product (dataclass): espelha a linha da tabela `products`.
+    - Product (dataclass com __slots__): espelha a linha da tabela `products`;
+      `product_row` é a row factory que o monta direto da tupla do cursor.
     - ProductModel.create/update/delete/get/search/list_all: operações de produto.
+    - ProductModel.iter_search: mesma busca como gerador (exportações, integrações).
     - ProductModel.adjust_stock: ajusta estoque e registra em `stock_movements`.
 """
 
 from __future__ import annotations
 
+import sqlite3
 from contextlib import closing
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, Optional
+from typing import Iterable, Iterator, Optional
 
-from db import Database
+from db import STREAM_BATCH, Database
 from utils.formatting import validate_positive, round2
 
 
-@dataclass
+PRODUCT_COLUMNS = ("id", "sku", "name", "category", "group_code", "cost_price", "sale_price", "stock_qty", "min_stock")
+_SELECT_PRODUCTS = f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM products"
+
+
+@dataclass(slots=True)
 class Product:
     id: int
     sku: str
@@ -53,6 +60,15 @@ class Product:
         return float((round2(self.sale_price) / round2(self.cost_price) - 1) * 100)
 
 
+def product_row(_cursor: sqlite3.Cursor, row: tuple) -> Product:
+    """Row factory: tupla na ordem de `PRODUCT_COLUMNS` -> Product.
+
+    Sem `sqlite3.Row` intermediário nem conversões: as colunas REAL/INTEGER
+    já chegam como float/int pela afinidade do SQLite.
+    """
+    return Product(*row)
+
+
 class ProductModel:
     def __init__(self, db: Database) -> None:
         self.db = db
@@ -111,6 +127,16 @@ class ProductModel:
             if cur.fetchone():
                 raise ValueError("SKU já cadastrado em outro produto")
             now = datetime.utcnow().isoformat()
+            # Estoque alterado no cadastro também entra no ledger (conciliação)
+            r = conn.execute("SELECT stock_qty FROM products WHERE id=?;", (product_id,)).fetchone()
+            if r is not None and int(r[0]) != int(stock_qty):
+                conn.execute(
+                    """
+                    INSERT INTO stock_movements (product_id, change, reason, ref_type, ref_id, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?);
+                    """,
+                    (product_id, int(stock_qty) - int(r[0]), "Edição do cadastro", "ADJUST", None, now),
+                )
             conn.execute(
                 """
                 UPDATE products
@@ -127,23 +153,41 @@ class ProductModel:
     # --------------------------- Consultas -----------------------
     def get(self, product_id: int) -> Optional[Product]:
         with closing(self.db._connect()) as conn:
-            cur = conn.execute("SELECT * FROM products WHERE id=?;", (product_id,))
-            r = cur.fetchone()
-            if not r:
-                return None
-            return Product(
-                id=r["id"], sku=r["sku"], name=r["name"], category=r["category"], group_code=r["group_code"],
-                cost_price=float(r["cost_price"]), sale_price=float(r["sale_price"]),
-                stock_qty=int(r["stock_qty"]), min_stock=int(r["min_stock"]),
-            )
-
-    def search(self, sku: str = "", name: str = "", category: str = "", group_code: str = "") -> list[Product]:
+            cur = conn.cursor()
+            cur.row_factory = product_row
+            return cur.execute(_SELECT_PRODUCTS + " WHERE id=?;", (product_id,)).fetchone()
+
+    def search(self, sku: str = "", name: str = "", category: str = "", group_code: str = "",
+               limit: int | None = None, ids: Iterable[int] | None = None) -> list[Product]:
+        """Produtos filtrados por nome; `ids` restringe a esses ids (telas ao vivo)."""
+        sql, params = self._query(sku, name, category, group_code, ids=ids, order="name", limit=limit)
+        with closing(self.db._connect()) as conn:
+            cur = conn.cursor()
+            cur.row_factory = product_row
+            return cur.execute(sql, params).fetchall()
+
+    def iter_search(self, sku: str = "", name: str = "", category: str = "", group_code: str = "",
+                    ids: Iterable[int] | None = None, below_min: bool = False, order: str = "id",
+                    batch_size: int = STREAM_BATCH) -> Iterator[Product]:
+        """Como `search`, mas gera os produtos em blocos (memória constante).
+
+        Os filtros viram WHERE no SQL; `below_min` traz só estoque < mínimo.
+        order="id" (padrão) começa a entregar na hora; "name" ordena antes.
+        """
+        sql, params = self._query(sku, name, category, group_code, ids=ids, below_min=below_min, order=order)
+        return self.db.iter_query(sql, params, product_row, batch_size)
+
+    @staticmethod
+    def _query(sku: str, name: str, category: str, group_code: str, ids: Iterable[int] | None = None,
+               below_min: bool = False, order: str = "name", limit: int | None = None) -> tuple[str, list[object]]:
+        if order not in ("id", "name"):
+            raise ValueError(f"Ordem inválida: {order}")
         sku = sku.strip().upper()
         name = name.strip()
         category = category.strip()
         group_code = group_code.strip()
         where = []
-        params: list[str] = []
+        params: list[object] = []
         if sku:
             where.append("sku LIKE ?")
             params.append(f"%{sku}%")
@@ -156,23 +200,20 @@ class ProductModel:
         if group_code:
             where.append("COALESCE(group_code,'') LIKE ?")
             params.append(f"%{group_code}%")
-        sql = "SELECT * FROM products"
+        if ids is not None:
+            id_list = [int(i) for i in ids]
+            where.append(f"id IN ({','.join('?' * len(id_list)) or 'NULL'})")
+            params.extend(id_list)
+        if below_min:
+            where.append("stock_qty < min_stock")
+        sql = _SELECT_PRODUCTS
         if where:
             sql += " WHERE " + " AND ".join(where)
-        sql += " ORDER BY name ASC;"
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute(sql, params)
-            rows = cur.fetchall()
-            res: list[Product] = []
-            for r in rows:
-                res.append(
-                    Product(
-                        id=r["id"], sku=r["sku"], name=r["name"], category=r["category"], group_code=r["group_code"],
-                        cost_price=float(r["cost_price"]), sale_price=float(r["sale_price"]),
-                        stock_qty=int(r["stock_qty"]), min_stock=int(r["min_stock"]),
-                    )
-                )
-            return res
+        sql += " ORDER BY name ASC" if order == "name" else " ORDER BY id ASC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return sql + ";", params
 
     def list_all(self) -> list[Product]:
         return self.search()
@@ -0,0 +1,323 @@
+"""
+Módulo: models/promotions.py
+
+Visão geral
+    Promoções automáticas do caixa, gravadas na tabela `promotions`:
+
+    - PERCENT: percentual em todas as unidades do alvo.
+    - TIER:    percentual por faixa de quantidade, somando todas as linhas do
+               alvo no carrinho ("10:5;50:8" → 5% a partir de 10 un., 8% a
+               partir de 50).
+    - BXGY:    leve buy_qty + get_qty, pague buy_qty — as unidades grátis são
+               as mais baratas do alvo no carrinho.
+
+    O alvo é um SKU, uma categoria, um grupo ou a loja toda (ALL). A vigência
+    é opcional e combina período (starts_at/ends_at), dias da semana e faixa
+    de horário.
+
+Regras compiladas
+    `PromotionBook` guarda as regras já validadas (`Rule`) indexadas por SKU,
+    categoria e grupo. O carrinho (`models.cart.Cart`) pergunta `rules_for`
+    uma vez por linha e, a cada alteração, recalcula só as regras daquela
+    linha. Promoções não acumulam: cada linha fica com a maior oferta (empate:
+    a regra mais antiga). O desconto manual (%) incide sobre o que sobra.
+
+    `PromotionModel.book()` reaproveita o livro compilado enquanto a versão de
+    `promotions` em `change_counters` não muda.
+
+Mapa rápido
+    - Promotion: linha da tabela (também o JSON de GET /promotions).
+    - compile_rule / PromotionBook.compile: validação + índice.
+    - PromotionModel: cadastro (create/list/set_active/delete) e book().
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import closing
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from decimal import Decimal
+from typing import Iterable
+
+from db import Database
+from utils.formatting import validate_percent
+from utils.time import now_iso
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("PERCENT", "TIER", "BXGY")
+SCOPES = ("SKU", "CATEGORY", "GROUP", "ALL")
+
+
+@dataclass
+class Promotion:
+    id: int
+    name: str
+    kind: str
+    scope: str
+    target: str | None = None
+    percent: float | None = None
+    tiers: str | None = None
+    buy_qty: int | None = None
+    get_qty: int | None = None
+    starts_at: str | None = None
+    ends_at: str | None = None
+    days: str | None = None
+    hours: str | None = None
+    active: bool = True
+    created_at: str | None = None
+
+
+PROMOTION_COLUMNS = tuple(f.name for f in fields(Promotion))
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    """Promoção validada, pronta para o carrinho."""
+
+    id: int
+    name: str
+    kind: str
+    scope: str
+    key: str | None                            # alvo normalizado (ver `_norm`)
+    tiers: tuple[tuple[int, Decimal], ...]     # (qtd mínima, %) crescente; vazio em BXGY
+    buy: int = 0
+    get: int = 0
+    starts: datetime | None = None
+    ends: datetime | None = None               # exclusivo
+    days: frozenset[int] | None = None
+    hours: tuple[dtime, dtime] | None = None
+
+    def active_at(self, at: datetime) -> bool:
+        if self.starts is not None and at < self.starts:
+            return False
+        if self.ends is not None and at >= self.ends:
+            return False
+        if self.days is not None and at.weekday() not in self.days:
+            return False
+        if self.hours is not None:
+            start, end = self.hours
+            t = at.time()
+            if start <= end:
+                return start <= t < end
+            return t >= start or t < end  # vira a meia-noite
+        return True
+
+    def percent_for(self, qty: int) -> Decimal:
+        """Percentual de PERCENT/TIER para `qty` unidades do alvo no carrinho."""
+        for min_qty, perc in reversed(self.tiers):
+            if qty >= min_qty:
+                return perc
+        return Decimal(0)
+
+    def free_units(self, qty: int) -> int:
+        """BXGY: unidades grátis entre `qty` unidades do alvo."""
+        return (qty // (self.buy + self.get)) * self.get if self.get else 0
+
+
+def _norm(scope: str, value: str | None) -> str | None:
+    if scope == "ALL" or value is None:
+        return None
+    value = value.strip()
+    return value.upper() if scope == "SKU" else value.casefold()
+
+
+def _parse_moment(value: str | None, end: bool = False) -> datetime | None:
+    """ISO data ou data/hora; data sem hora no fim vale até o fim do dia."""
+    if not value:
+        return None
+    try:
+        if len(value.strip()) == 10:
+            d = datetime.combine(date.fromisoformat(value.strip()), dtime())
+            return d + timedelta(days=1) if end else d
+        return datetime.fromisoformat(value.strip().replace("T", " "))
+    except ValueError:
+        raise ValueError(f"Data inválida: {value!r} (use AAAA-MM-DD ou AAAA-MM-DD HH:MM)") from None
+
+
+def parse_tiers(spec: str | None) -> tuple[tuple[int, Decimal], ...]:
+    """"10:5;50:8" -> ((10, 5.00), (50, 8.00))."""
+    tiers: dict[int, Decimal] = {}
+    for part in (spec or "").split(";"):
+        if not part.strip():
+            continue
+        try:
+            qty, perc = part.split(":")
+            min_qty = int(qty)
+        except ValueError:
+            raise ValueError(f"Faixa inválida: {part!r} (use qtd:perc;qtd:perc)") from None
+        if min_qty < 1:
+            raise ValueError("Quantidade mínima da faixa deve ser >= 1")
+        tiers[min_qty] = validate_percent(perc.strip().replace(".", ","))
+    if not tiers:
+        raise ValueError("TIER precisa de ao menos uma faixa")
+    return tuple(sorted(tiers.items()))
+
+
+def compile_rule(p: Promotion) -> Rule:
+    """Valida a promoção e devolve a `Rule`; ValueError com a mensagem para o usuário."""
+    kind, scope = (p.kind or "").upper(), (p.scope or "").upper()
+    if kind not in KINDS:
+        raise ValueError(f"Tipo de promoção inválido: {p.kind} (use {', '.join(KINDS)})")
+    if scope not in SCOPES:
+        raise ValueError(f"Alvo inválido: {p.scope} (use {', '.join(SCOPES)})")
+    key = _norm(scope, p.target)
+    if scope != "ALL" and not key:
+        raise ValueError(f"Informe o {scope.lower()} da promoção")
+    tiers: tuple[tuple[int, Decimal], ...] = ()
+    buy = get = 0
+    if kind == "PERCENT":
+        if p.percent is None:
+            raise ValueError("PERCENT precisa do percentual")
+        tiers = ((1, validate_percent(p.percent)),)
+    elif kind == "TIER":
+        tiers = parse_tiers(p.tiers)
+    else:
+        buy, get = int(p.buy_qty or 0), int(p.get_qty or 0)
+        if buy < 1 or get < 1:
+            raise ValueError("BXGY precisa de buy_qty >= 1 e get_qty >= 1")
+    days = None
+    if p.days:
+        try:
+            days = frozenset(int(c) for c in p.days if not c.isspace())
+        except ValueError:
+            raise ValueError(f"Dias inválidos: {p.days!r} (0=segunda ... 6=domingo)") from None
+        if not days <= set(range(7)):
+            raise ValueError(f"Dias inválidos: {p.days!r} (0=segunda ... 6=domingo)")
+    hours = None
+    if p.hours:
+        try:
+            a, b = p.hours.split("-")
+            hours = (dtime.fromisoformat(a.strip()), dtime.fromisoformat(b.strip()))
+        except ValueError:
+            raise ValueError(f"Horário inválido: {p.hours!r} (use HH:MM-HH:MM)") from None
+    starts, ends = _parse_moment(p.starts_at), _parse_moment(p.ends_at, end=True)
+    if starts is not None and ends is not None and ends <= starts:
+        raise ValueError("Fim da vigência deve ser depois do início")
+    return Rule(int(p.id), p.name, kind, scope, key, tiers, buy, get, starts, ends, days, hours)
+
+
+class PromotionBook:
+    """Regras indexadas por alvo; `rules_for` é O(regras que casam com a linha)."""
+
+    def __init__(self, rules: Iterable[Rule] = ()) -> None:
+        self.rules = tuple(sorted(rules, key=lambda r: r.id))
+        self._by_id = {r.id: r for r in self.rules}
+        self._index: dict[tuple[str, str | None], tuple[Rule, ...]] = {}
+        for r in self.rules:
+            self._index[(r.scope, r.key)] = self._index.get((r.scope, r.key), ()) + (r,)
+
+    @classmethod
+    def compile(cls, promotions: Iterable[Promotion]) -> "PromotionBook":
+        """Compila as promoções ativas; uma linha inválida é ignorada (e registrada no log)."""
+        rules = []
+        for p in promotions:
+            if not p.active:
+                continue
+            try:
+                rules.append(compile_rule(p))
+            except ValueError as e:
+                logger.warning("Promoção #%s ignorada: %s", p.id, e)
+        return cls(rules)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def get(self, rule_id: int | None) -> Rule | None:
+        return self._by_id.get(rule_id) if rule_id is not None else None
+
+    def rules_for(self, sku: str, category: str | None, group_code: str | None,
+                  at: datetime) -> tuple[Rule, ...]:
+        """Regras vigentes em `at` que valem para a linha, em ordem de id."""
+        if not self.rules:
+            return ()
+        found = (self._index.get(("SKU", _norm("SKU", sku)), ())
+                 + self._index.get(("CATEGORY", _norm("CATEGORY", category)), ())
+                 + self._index.get(("GROUP", _norm("GROUP", group_code)), ())
+                 + self._index.get(("ALL", None), ()))
+        return tuple(sorted((r for r in found if r.active_at(at)), key=lambda r: r.id))
+
+
+def _promotion(row) -> Promotion:
+    p = Promotion(*tuple(row))
+    p.active = bool(p.active)
+    return p
+
+
+# Livro compilado por arquivo de banco: (versão de `promotions`, livro)
+_books: dict[str, tuple[int, PromotionBook]] = {}
+_books_lock = threading.Lock()
+
+
+class PromotionModel:
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    def list(self, active_only: bool = False) -> list[Promotion]:
+        sql = f"SELECT {', '.join(PROMOTION_COLUMNS)} FROM promotions"
+        if active_only:
+            sql += " WHERE active = 1"
+        with closing(self.db._connect()) as conn:
+            rows = conn.execute(sql + " ORDER BY id;").fetchall()
+        return [_promotion(r) for r in rows]
+
+    def create(self, name: str, kind: str, scope: str, target: str | None = None,
+               percent: float | str | None = None, tiers: str | None = None,
+               buy_qty: int | None = None, get_qty: int | None = None,
+               starts_at: str | None = None, ends_at: str | None = None,
+               days: str | None = None, hours: str | None = None) -> int:
+        name = (name or "").strip()
+        if not name:
+            raise ValueError("Informe o nome da promoção")
+        promo = Promotion(0, name, (kind or "").upper(), (scope or "").upper(), target,
+                          float(validate_percent(percent)) if percent is not None else None,
+                          tiers, buy_qty, get_qty, starts_at, ends_at, days, hours)
+        rule = compile_rule(promo)  # valida antes de gravar
+        if rule.scope == "ALL":
+            promo.target = None
+        elif rule.scope == "SKU":
+            promo.target = rule.key
+        else:
+            promo.target = (promo.target or "").strip()
+        with closing(self.db._connect()) as conn, conn:
+            cur = conn.execute(
+                """
+                INSERT INTO promotions (name, kind, scope, target, percent, tiers, buy_qty, get_qty,
+                                        starts_at, ends_at, days, hours, active, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?);
+                """,
+                (promo.name, rule.kind, rule.scope, promo.target, promo.percent, promo.tiers,
+                 promo.buy_qty, promo.get_qty, promo.starts_at, promo.ends_at, promo.days, promo.hours,
+                 now_iso()),
+            )
+            return int(cur.lastrowid)
+
+    def set_active(self, promo_id: int, active: bool) -> None:
+        with closing(self.db._connect()) as conn, conn:
+            cur = conn.execute("UPDATE promotions SET active = ? WHERE id = ?;", (1 if active else 0, promo_id))
+            if cur.rowcount == 0:
+                raise ValueError(f"Promoção inexistente: {promo_id}")
+
+    def delete(self, promo_id: int) -> None:
+        with closing(self.db._connect()) as conn, conn:
+            conn.execute("DELETE FROM promotions WHERE id = ?;", (promo_id,))
+
+    def book(self) -> PromotionBook:
+        """Promoções ativas compiladas; recompila só quando a tabela mudou."""
+        with closing(self.db._connect()) as conn:
+            row = conn.execute("SELECT version FROM change_counters WHERE table_name = 'promotions';").fetchone()
+            version = int(row[0]) if row else -1
+            with _books_lock:
+                cached = _books.get(self.db.db_path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            rows = conn.execute(
+                f"SELECT {', '.join(PROMOTION_COLUMNS)} FROM promotions WHERE active = 1 ORDER BY id;"
+            ).fetchall()
+        book = PromotionBook.compile(_promotion(r) for r in rows)
+        with _books_lock:
+            _books[self.db.db_path] = (version, book)
+        return book
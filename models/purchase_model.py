@@ -0,0 +1,325 @@
+"""
+Módulo: models/purchase_model.py
+
+Visão geral
+    Compras: pedido de compra (PO) ao fornecedor e recebimento de mercadoria.
+    O recebimento lança muitas linhas de uma vez em `products.stock_qty` e
+    `stock_movements` (ref_type RECEIPT), em uma única transação.
+
+Custo médio móvel (opcional)
+    Com `update_cost=True`, o custo do produto é recalculado no MESMO UPDATE
+    que soma o estoque:
+        novo_custo = (estoque * custo_atual + qtd_recebida * custo_unit) / (estoque + qtd_recebida)
+    No SQLite, as expressões do SET enxergam os valores antigos da linha, então
+    `stock_qty` no cálculo é o estoque antes da entrada.
+
+Mapa rápido
+    - PurchaseModel.create_po: cria pedido de compra com itens (por SKU).
+    - PurchaseModel.receive: recebe uma lista de linhas (avulsa ou de um PO).
+    - PurchaseModel.receive_po: recebe o saldo pendente de um PO.
+    - PurchaseModel.load_receipt_file: lê `sku;qtd;custo` de CSV/JSONL.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from db import Database
+from models.product_import import _parse_float
+from utils.time import now_iso
+
+
+@dataclass
+class ReceiptLine:
+    sku: str
+    qty: int
+    unit_cost: float | None = None  # None = não altera o custo
+
+
+@dataclass
+class ReceiptResult:
+    receipt_id: int | None = None
+    lines: int = 0
+    total_qty: int = 0
+    errors: list[tuple[str, str]] = field(default_factory=list)  # (SKU, mensagem)
+
+
+MIN_UNIT_COST = 0.01  # abaixo de 1 centavo o custo médio arredonda para 0,00 (CHECK cost_price > 0)
+
+
+def _cost_error(unit_cost: float | None) -> str | None:
+    """Mensagem se o custo informado for inválido; None/0 = sem custo (não altera o médio)."""
+    if unit_cost is None or float(unit_cost) == 0 or float(unit_cost) >= MIN_UNIT_COST:
+        return None
+    return "Custo unitário deve ser >= 0,01"
+
+
+def _valid_line(ln: ReceiptLine) -> tuple[str, int, float, int]:
+    """(SKU, qtd, custo total, qtd com custo) de uma linha com qtd >= 1."""
+    sku = (ln.sku or "").strip().upper()
+    has_cost = ln.unit_cost is not None and float(ln.unit_cost) >= MIN_UNIT_COST
+    cost_total = float(ln.unit_cost) * int(ln.qty) if has_cost else 0.0
+    return sku, int(ln.qty), cost_total, int(ln.qty) if has_cost else 0
+
+
+class PurchaseModel:
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    # -------------------------- Pedido de compra --------------------------
+    def create_po(self, supplier: str, items: Iterable[ReceiptLine], notes: str = "") -> int:
+        supplier = (supplier or "").strip()
+        if not supplier:
+            raise ValueError("Fornecedor é obrigatório")
+        items = list(items)
+        if not items:
+            raise ValueError("Pedido de compra deve conter ao menos um item")
+
+        def work(conn: sqlite3.Connection) -> int:
+            ids = self._resolve_skus(conn, {it.sku.strip().upper() for it in items})
+            rows = []
+            seen: set[str] = set()
+            for it in items:
+                sku = it.sku.strip().upper()
+                if sku not in ids:
+                    raise ValueError(f"Produto inexistente: {sku}")
+                if sku in seen:  # o recebimento soma por produto: uma linha por SKU
+                    raise ValueError(f"SKU repetido no pedido de compra: {sku}")
+                seen.add(sku)
+                if int(it.qty) <= 0:
+                    raise ValueError(f"Quantidade deve ser >= 1 ({sku})")
+                cost_error = _cost_error(it.unit_cost)
+                if cost_error:
+                    raise ValueError(f"{cost_error} ({sku})")
+                rows.append((ids[sku], sku, int(it.qty), float(it.unit_cost or 0)))
+            cur = conn.execute(
+                "INSERT INTO purchase_orders (supplier, status, created_at, notes) VALUES (?, 'ABERTO', ?, ?);",
+                (supplier, now_iso(), notes),
+            )
+            po_id = int(cur.lastrowid)
+            conn.executemany(
+                """
+                INSERT INTO purchase_order_items (po_id, product_id, sku, qty_ordered, unit_cost)
+                VALUES (?, ?, ?, ?, ?);
+                """,
+                [(po_id, *r) for r in rows],
+            )
+            return po_id
+
+        return self.db.run_in_transaction(work)
+
+    def list_po_items(self, po_id: int) -> list[dict]:
+        with closing(self.db._connect()) as conn:
+            cur = conn.execute("SELECT * FROM purchase_order_items WHERE po_id = ? ORDER BY id;", (po_id,))
+            return [dict(r) for r in cur.fetchall()]
+
+    def receive_po(self, po_id: int, update_cost: bool = True, notes: str = "") -> ReceiptResult:
+        """Recebe todo o saldo pendente (pedido - recebido) do PO.
+
+        O saldo é lido dentro da transação IMMEDIATE do próprio recebimento:
+        dois recebimentos simultâneos do mesmo PO não lançam o saldo duas vezes.
+        """
+        def work(conn: sqlite3.Connection) -> ReceiptResult:
+            cur = conn.execute(
+                "SELECT sku, qty_ordered - qty_received, unit_cost FROM purchase_order_items"
+                " WHERE po_id = ? AND qty_ordered > qty_received ORDER BY id;",
+                (po_id,),
+            )
+            valid = [_valid_line(ReceiptLine(r[0], int(r[1]), float(r[2]))) for r in cur.fetchall()]
+            if not valid:
+                raise ValueError("Pedido de compra sem saldo a receber")
+            return self._post_receipt(conn, valid, ReceiptResult(), po_id, update_cost, notes)
+
+        return self.db.run_in_transaction(work)
+
+    # ---------------------------- Recebimento -----------------------------
+    def receive(self, lines: Iterable[ReceiptLine], po_id: int | None = None,
+                update_cost: bool = True, notes: str = "") -> ReceiptResult:
+        """Lança um recebimento com N linhas numa única transação (IMMEDIATE).
+
+        Passos (todos em SQL de conjunto):
+            (1) Linhas vão para `temp._receipt_lines` (SKUs repetidos somados).
+            (2) SKUs inexistentes/qtd ou custo inválidos viram erro e ficam de fora.
+            (3) UPDATE de `products`: estoque + custo médio no mesmo comando.
+            (4) INSERT ... SELECT em `receipt_items` e `stock_movements`.
+            (5) Se houver PO, atualiza `qty_received` e o status (PARCIAL/RECEBIDO).
+        """
+        errors: list[tuple[str, str]] = []
+        valid: list[tuple[str, int, float, int]] = []
+        for ln in lines:
+            if int(ln.qty) <= 0:
+                errors.append(((ln.sku or "").strip().upper(), "Quantidade deve ser >= 1"))
+                continue
+            cost_error = _cost_error(ln.unit_cost)
+            if cost_error:
+                errors.append(((ln.sku or "").strip().upper(), cost_error))
+                continue
+            valid.append(_valid_line(ln))
+        # Resultado novo a cada tentativa: run_in_transaction pode repetir o trabalho
+        return self.db.run_in_transaction(
+            lambda conn: self._post_receipt(conn, valid, ReceiptResult(errors=list(errors)), po_id, update_cost, notes)
+        )
+
+    def _post_receipt(self, conn: sqlite3.Connection, valid: list[tuple[str, int, float, int]],
+                      result: ReceiptResult, po_id: int | None, update_cost: bool, notes: str) -> ReceiptResult:
+        """Passos (1)-(5) de `receive` na transação do chamador."""
+        now = now_iso()
+        conn.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS _receipt_lines (
+                sku TEXT PRIMARY KEY,
+                product_id INTEGER,
+                qty INTEGER NOT NULL,
+                cost_total REAL NOT NULL,
+                cost_qty INTEGER NOT NULL
+            );
+            """
+        )
+        conn.execute("DELETE FROM temp._receipt_lines;")
+        # (1) Carga com agregação por SKU
+        conn.executemany(
+            """
+            INSERT INTO temp._receipt_lines (sku, qty, cost_total, cost_qty) VALUES (?, ?, ?, ?)
+            ON CONFLICT(sku) DO UPDATE SET qty = qty + excluded.qty,
+                cost_total = cost_total + excluded.cost_total, cost_qty = cost_qty + excluded.cost_qty;
+            """,
+            valid,
+        )
+        conn.execute(
+            "UPDATE temp._receipt_lines SET product_id = (SELECT p.id FROM products p WHERE p.sku = _receipt_lines.sku);"
+        )
+        # (2) SKUs desconhecidos
+        cur = conn.execute("SELECT sku FROM temp._receipt_lines WHERE product_id IS NULL ORDER BY sku;")
+        result.errors.extend((r[0], "Produto inexistente") for r in cur.fetchall())
+        conn.execute("DELETE FROM temp._receipt_lines WHERE product_id IS NULL;")
+        cur = conn.execute("SELECT COUNT(*), COALESCE(SUM(qty), 0), COALESCE(SUM(cost_total), 0) FROM temp._receipt_lines;")
+        n_lines, total_qty, total_cost = cur.fetchone()
+        if not n_lines:
+            return result
+        cur = conn.execute(
+            """
+            INSERT INTO receipts (po_id, received_at, lines_count, total_qty, total_cost, notes)
+            VALUES (?, ?, ?, ?, ?, ?);
+            """,
+            (po_id, now, int(n_lines), int(total_qty), round(float(total_cost), 2), notes),
+        )
+        receipt_id = int(cur.lastrowid)
+
+        # (3) Estoque + custo médio móvel no mesmo UPDATE (valores antigos no SET)
+        conn.execute(
+            """
+            UPDATE products
+               SET (stock_qty, cost_price, updated_at) = (
+                    SELECT products.stock_qty + r.qty,
+                           CASE WHEN ? AND r.cost_qty > 0
+                                THEN ROUND((MAX(products.stock_qty, 0) * products.cost_price
+                                            + r.cost_total) / (MAX(products.stock_qty, 0) + r.cost_qty), 2)
+                                ELSE products.cost_price END,
+                           ?
+                      FROM temp._receipt_lines r WHERE r.product_id = products.id)
+             WHERE id IN (SELECT product_id FROM temp._receipt_lines);
+            """,
+            (1 if update_cost else 0, now),
+        )
+        # (4) Itens do recebimento e ledger
+        conn.execute(
+            """
+            INSERT INTO receipt_items (receipt_id, product_id, qty, unit_cost)
+            SELECT ?, product_id, qty, CASE WHEN cost_qty > 0 THEN ROUND(cost_total / cost_qty, 2) END
+              FROM temp._receipt_lines ORDER BY product_id;
+            """,
+            (receipt_id,),
+        )
+        conn.execute(
+            """
+            INSERT INTO stock_movements (product_id, change, reason, ref_type, ref_id, created_at)
+            SELECT product_id, qty, ?, 'RECEIPT', ?, ? FROM temp._receipt_lines ORDER BY product_id;
+            """,
+            ("Recebimento de compra", receipt_id, now),
+        )
+        # (5) Saldo do pedido de compra
+        if po_id is not None:
+            conn.execute(
+                """
+                UPDATE purchase_order_items
+                   SET qty_received = qty_received + (SELECT r.qty FROM temp._receipt_lines r
+                                                       WHERE r.product_id = purchase_order_items.product_id)
+                 WHERE po_id = ? AND product_id IN (SELECT product_id FROM temp._receipt_lines);
+                """,
+                (po_id,),
+            )
+            cur = conn.execute(
+                "SELECT COUNT(*) FROM purchase_order_items WHERE po_id = ? AND qty_received < qty_ordered;",
+                (po_id,),
+            )
+            pending = int(cur.fetchone()[0])
+            conn.execute(
+                "UPDATE purchase_orders SET status = ?, received_at = ? WHERE id = ?;",
+                ("PARCIAL" if pending else "RECEBIDO", now, po_id),
+            )
+        result.receipt_id = receipt_id
+        result.lines = int(n_lines)
+        result.total_qty = int(total_qty)
+        return result
+
+    @staticmethod
+    def _resolve_skus(conn, skus: set[str]) -> dict[str, int]:
+        found: dict[str, int] = {}
+        skus_l = sorted(skus)
+        for i in range(0, len(skus_l), 500):
+            part = skus_l[i:i + 500]
+            cur = conn.execute(f"SELECT sku, id FROM products WHERE sku IN ({','.join('?' * len(part))});", part)
+            found.update((r[0], int(r[1])) for r in cur.fetchall())
+        return found
+
+    # ------------------------------ Arquivo -------------------------------
+    @staticmethod
+    def load_receipt_file(file_path: str | Path) -> tuple[list[ReceiptLine], list[tuple[int, str]]]:
+        """Lê linhas de recebimento: CSV `sku;qtd;custo` (custo opcional) ou JSONL.
+
+        Retorna (linhas válidas, erros por linha).
+        """
+        p = Path(file_path)
+        lines: list[ReceiptLine] = []
+        errors: list[tuple[int, str]] = []
+
+        def add(line_no: int, sku: object, qty: object, cost: object) -> None:
+            try:
+                unit_cost = _parse_float(cost) if str(cost if cost is not None else "").strip() else None
+                if unit_cost == 0 and any(ch in "123456789" for ch in str(cost)):
+                    errors.append((line_no, "Custo unitário deve ser >= 0,01"))  # ex.: 0,004 arredonda para 0
+                    return
+                lines.append(ReceiptLine(str(sku or ""), int(str(qty).strip()), unit_cost))
+            except ValueError:
+                errors.append((line_no, "Quantidade/custo inválido"))
+
+        with p.open("r", newline="", encoding="utf-8-sig") as f:
+            if p.suffix.lower() in (".jsonl", ".ndjson", ".json"):
+                for line_no, raw in enumerate(f, start=1):
+                    if not raw.strip():
+                        continue
+                    try:
+                        obj = json.loads(raw)
+                    except json.JSONDecodeError:
+                        errors.append((line_no, "JSON inválido"))
+                        continue
+                    if not isinstance(obj, dict):
+                        errors.append((line_no, "JSON inválido"))
+                        continue
+                    add(line_no, obj.get("sku"), obj.get("qty", obj.get("qtd")), obj.get("unit_cost", obj.get("custo")))
+            else:
+                first = f.readline()
+                delimiter = ";" if first.count(";") >= first.count(",") else ","
+                head = next(csv.reader([first], delimiter=delimiter), [])
+                if len(head) >= 2 and head[1].strip().isdigit():
+                    add(1, head[0], head[1], head[2] if len(head) > 2 else None)
+                for line_no, row in enumerate(csv.reader(f, delimiter=delimiter), start=2):
+                    if row:
+                        add(line_no, row[0], row[1] if len(row) > 1 else "", row[2] if len(row) > 2 else None)
+        return lines, errors
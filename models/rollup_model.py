@@ -0,0 +1,171 @@
+"""
+Módulo: models/rollup_model.py
+
+Visão geral
+    Resumos diários por produto, somados a partir das tabelas de origem:
+    - `movement_daily` (stock_movements): saídas por envio de pedido
+      (ORDER_SHIP), entradas por recebimento (RECEIPT) e o saldo dos demais
+      lançamentos (ajustes, contagens);
+    - `sales_daily` (sale_items + sales): unidades vendidas e receita
+      líquida (subtotal_net).
+
+Atualização incremental
+    `rollup_state` guarda, por resumo, o último id de origem já somado;
+    `refresh` lê só o que veio depois, em transações de até CHUNK_IDS ids
+    (os caixas nunca esperam por uma varredura longa). O histórico inteiro é
+    lido uma vez só, na primeira execução. O arquivamento (`services.archive`)
+    chama `refresh` antes de mover linhas para o arquivo frio; `rebuild`
+    recomeça do zero e inclui os anos já arquivados.
+
+    O dia é o prefixo aaaa-mm-dd de `created_at`/`datetime` (UTC, como `now_iso`).
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from db import Database
+from utils.time import now_iso
+
+CHUNK_IDS = 200_000  # linhas de origem por transação
+MOVEMENTS_STATE = "movement_daily"
+SALES_STATE = "sales_daily"
+
+_MOVEMENTS_SQL = """
+INSERT INTO movement_daily (product_id, day, out_qty, in_qty, adjust_qty)
+SELECT product_id, substr(created_at, 1, 10),
+       SUM(CASE WHEN ref_type = 'ORDER_SHIP' THEN -change ELSE 0 END),
+       SUM(CASE WHEN ref_type = 'RECEIPT' THEN change ELSE 0 END),
+       SUM(CASE WHEN ref_type IN ('ORDER_SHIP', 'RECEIPT') THEN 0 ELSE change END)
+  FROM {schema}.stock_movements
+ WHERE id > ? AND id <= ?
+ GROUP BY product_id, substr(created_at, 1, 10)
+ON CONFLICT(product_id, day) DO UPDATE SET
+    out_qty = out_qty + excluded.out_qty,
+    in_qty = in_qty + excluded.in_qty,
+    adjust_qty = adjust_qty + excluded.adjust_qty;
+"""
+
+_SALES_SQL = """
+INSERT INTO sales_daily (product_id, day, qty, revenue)
+SELECT i.product_id, substr(s.datetime, 1, 10), SUM(i.qty), ROUND(SUM(i.subtotal_net), 2)
+  FROM {schema}.sale_items i JOIN {schema}.sales s ON s.id = i.sale_id
+ WHERE i.id > ? AND i.id <= ?
+ GROUP BY i.product_id, substr(s.datetime, 1, 10)
+ON CONFLICT(product_id, day) DO UPDATE SET
+    qty = qty + excluded.qty,
+    revenue = ROUND(revenue + excluded.revenue, 2);
+"""
+
+# (nome em rollup_state, tabela de origem cujo id é o cursor, SQL)
+_ROLLUPS = (
+    (MOVEMENTS_STATE, "stock_movements", _MOVEMENTS_SQL),
+    (SALES_STATE, "sale_items", _SALES_SQL),
+)
+
+
+@dataclass
+class RollupResult:
+    movements: int = 0   # movimentações somadas nesta execução
+    sale_items: int = 0  # itens de venda somados nesta execução
+    chunks: int = 0
+    versions: dict[str, int] = field(default_factory=dict)  # último id somado, por resumo
+
+
+def rollup_version(conn: sqlite3.Connection, name: str = MOVEMENTS_STATE) -> int:
+    """Último id somado no resumo `name` (0 se nunca rodou) — serve de versão dos dados."""
+    row = conn.execute("SELECT last_id FROM rollup_state WHERE name = ?;", (name,)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def _set_version(conn: sqlite3.Connection, name: str, last_id: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO rollup_state (name, last_id, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at;
+        """,
+        (name, last_id, now_iso()),
+    )
+
+
+class RollupModel:
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    def refresh(self, chunk_ids: int = CHUNK_IDS) -> RollupResult:
+        """Soma as linhas novas de cada origem nos resumos diários (incremental)."""
+        res = RollupResult()
+        pending: set[str] = set()
+        with closing(self.db._connect()) as conn:  # só leitura: sem lock de escrita quando não há nada novo
+            for name, source, _ in _ROLLUPS:
+                res.versions[name] = rollup_version(conn, name)
+                if conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM main.{source};").fetchone()[0] > res.versions[name]:
+                    pending.add(name)
+        for name, source, sql in _ROLLUPS:
+            if name not in pending:
+                continue
+            n = self._refresh_one(name, source, sql.format(schema="main"), chunk_ids, res)
+            if name == MOVEMENTS_STATE:
+                res.movements = n
+            else:
+                res.sale_items = n
+        return res
+
+    def _refresh_one(self, name: str, source: str, sql: str, chunk_ids: int, res: RollupResult) -> int:
+        total = 0
+
+        def step(conn: sqlite3.Connection) -> int:
+            last = rollup_version(conn, name)
+            top = int(conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM main.{source};").fetchone()[0])
+            if top <= last:
+                res.versions[name] = last
+                return 0
+            upto = min(top, last + chunk_ids)
+            n = int(conn.execute(f"SELECT COUNT(*) FROM main.{source} WHERE id > ? AND id <= ?;",
+                                 (last, upto)).fetchone()[0])
+            conn.execute(sql, (last, upto))
+            _set_version(conn, name, upto)
+            res.versions[name] = upto
+            return n if n else -1  # faixa só com ids arquivados: segue adiante
+
+        while True:
+            n = self.db.run_in_transaction(step)
+            if n == 0:
+                return total
+            res.chunks += 1
+            total += max(n, 0)
+
+    def rebuild(self, archive_files: Iterable[str | Path] = ()) -> RollupResult:
+        """Refaz os resumos do zero: anos arquivados (`archive_files`) + banco quente.
+
+        Os arquivos frios são somados numa transação só; depois o banco quente
+        entra pelo `refresh` normal, a partir do id 0. Não rode junto com o
+        arquivamento.
+        """
+        files = [Path(p) for p in archive_files]
+        with closing(self.db._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE;")
+            try:
+                conn.execute("DELETE FROM movement_daily;")
+                conn.execute("DELETE FROM sales_daily;")
+                for name, _, _ in _ROLLUPS:
+                    _set_version(conn, name, 0)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            for path in files:
+                conn.execute("ATTACH DATABASE ? AS arch;", (str(path),))
+                try:
+                    with conn:
+                        tables = {r[0] for r in conn.execute("SELECT name FROM arch.sqlite_master WHERE type = 'table';")}
+                        for name, source, sql in _ROLLUPS:
+                            if source in tables and (source != "sale_items" or "sales" in tables):
+                                conn.execute(sql.format(schema="arch"), (-1, 2 ** 63 - 1))
+                finally:
+                    conn.execute("DETACH DATABASE arch;")
+        return self.refresh()
@@ -4,15 +4,18 @@ Model de Vendas: criação de venda, inserção de itens, totais e baixa de esto
 
 from __future__ import annotations
 
-from contextlib import closing
-from dataclasses import dataclass
+import sqlite3
+from dataclasses import dataclass, replace
 from datetime import datetime
 from decimal import Decimal
-from typing import Iterable, List, Tuple
+from typing import Callable, List
 
 from db import Database
-from utils.formatting import round2, validate_percent
-from utils.ids import next_sale_number
+from models.basket_model import record_basket
+from models.cart import Cart
+from models.product_model import ProductModel
+from models.promotions import PromotionModel
+from utils.ids import next_order_number, next_sale_number
 
 
 @dataclass
@@ -32,60 +35,87 @@ class SaleModel:
     def create_sale(self, items: List[SaleItemInput], notes: str = "", prefix: str = "HND",
                     customer_name: str | None = None, customer_email: str | None = None,
                     customer_address: str | None = None, shipping_method: str | None = None,
-                    shipping_cost: float | int | None = 0.0) -> int:
+                    shipping_cost: float | int | None = 0.0, priced_at: datetime | None = None) -> int:
         """Cria uma venda completa com itens (sem baixar estoque aqui).
 
         Regras:
         - Valida percentuais e quantidades
-        - Calcula totais
+        - Calcula totais com as promoções vigentes em `priced_at` (padrão: agora)
         - Gera sale_number sequencial
         - Persiste em sales e sale_items
-        - Atualiza estoque (stock_qty -= qty)
+        - Cria o pedido AGUARDANDO na mesma transação
+        """
+        work = self.sale_writer(
+            items, notes=notes, prefix=prefix, customer_name=customer_name, customer_email=customer_email,
+            customer_address=customer_address, shipping_method=shipping_method, shipping_cost=shipping_cost,
+            priced_at=priced_at,
+        )
+        # Persistência: BEGIN IMMEDIATE + nova tentativa se o lock não sair
+        return self.db.run_in_transaction(work)
+
+    def sale_writer(self, items: List[SaleItemInput], notes: str = "", prefix: str = "HND",
+                    customer_name: str | None = None, customer_email: str | None = None,
+                    customer_address: str | None = None, shipping_method: str | None = None,
+                    shipping_cost: float | int | None = 0.0,
+                    priced_at: datetime | None = None) -> Callable[[sqlite3.Connection], int]:
+        """Valida e calcula a venda e devolve a unidade de escrita `work(conn) -> sale_id`.
+
+        Erros de validação saem aqui, antes de tocar no banco. A unidade roda
+        na transação do chamador — `Database.run_in_transaction` ou um lote
+        da fila de escrita (`services.writer.WriteQueue`).
+
+        Os preços saem do mesmo `Cart` da tela, com as mesmas promoções e o
+        mesmo instante (`priced_at` = `Cart.at` do caixa): totais idênticos.
         """
         if not items:
             raise ValueError("A venda deve conter ao menos um item")
 
-        # Calcula totais em Decimal para precisão
-        total_gross = Decimal("0")
-        total_discount = Decimal("0")
-        total_net = Decimal("0")
-
-        # Pré-validação e leitura de estoque
-        with closing(self.db._connect()) as conn:
-            # Verifica estoques
+        # Valida e calcula linhas/totais pela regra única (models.cart)
+        book = PromotionModel(self.db).book()
+        attrs: dict[int, tuple[str | None, str | None]] = {}
+        if len(book):
+            attrs = {p.id: (p.category, p.group_code)
+                     for p in ProductModel(self.db).iter_search(ids={it.product_id for it in items})}
+        cart = Cart(book, priced_at)
+        for it in items:
+            category, group_code = attrs.get(it.product_id, (None, None))
+            cart.add(it.product_id, it.sku, it.name, it.qty, it.unit_price, it.discount_percent,
+                     category=category, group_code=group_code)
+        lines = list(cart)
+
+        from models.order_model import OrderInput, OrderItemInput, OrderModel  # import local para evitar ciclo
+        om = OrderModel(self.db)
+        order = OrderInput(
+            customer_name=customer_name or "Cliente",
+            items=[
+                OrderItemInput(
+                    product_id=line.product_id,
+                    sku=line.sku,
+                    name=line.name,
+                    qty=line.qty,
+                    unit_price=float(line.unit_price),
+                    discount_percent=float(line.discount_percent),
+                    promo_discount=float(line.promo_discount),
+                )
+                for line in lines
+            ],
+            customer_email=customer_email,
+            customer_address=customer_address,
+            shipping_method=shipping_method or "Correios",
+            shipping_cost=float(shipping_cost or 0),
+        )
+
+        def persist(conn: sqlite3.Connection) -> int:
+            # Estoque e número da venda lidos DENTRO da transação IMMEDIATE:
+            # nenhum outro caixa grava entre a checagem e o INSERT
             for it in items:
-                if it.qty <= 0:
-                    raise ValueError("Quantidade deve ser >= 1")
-                validate_percent(it.discount_percent)
                 cur = conn.execute("SELECT stock_qty FROM products WHERE id=?;", (it.product_id,))
                 row = cur.fetchone()
                 if not row:
                     raise ValueError(f"Produto inexistente: {it.sku}")
-                stock = int(row[0])
-                if it.qty > stock:
+                if it.qty > int(row[0]):
                     raise ValueError(f"Estoque insuficiente para {it.sku}")
-
-        # Cálculos
-        per_item_values: List[Tuple[Decimal, Decimal, Decimal]] = []
-        for it in items:
-            ug = round2(it.unit_price)
-            q = Decimal(it.qty)
-            subtotal_gross = round2(ug * q)
-            dperc = round2(it.discount_percent) / Decimal(100)
-            discount_value = round2(subtotal_gross * dperc)
-            subtotal_net = round2(subtotal_gross - discount_value)
-            per_item_values.append((subtotal_gross, discount_value, subtotal_net))
-            total_gross += subtotal_gross
-            total_discount += discount_value
-            total_net += subtotal_net
-
-        total_gross = round2(total_gross)
-        total_discount = round2(total_discount)
-        total_net = round2(total_net)
-
-        # Persistência (venda)
-        with closing(self.db._connect()) as conn, conn:
-            sale_number = next_sale_number(self.db, prefix=prefix)
+            sale_number = next_sale_number(conn, prefix=prefix)
             cur = conn.execute(
                 """
                 INSERT INTO sales (sale_number, datetime, total_gross, total_discount, total_net, items_count, notes)
@@ -94,9 +124,9 @@ class SaleModel:
                 (
                     sale_number,
                     datetime.utcnow().isoformat(),
-                    float(total_gross),
-                    float(total_discount),
-                    float(total_net),
+                    float(cart.gross),
+                    float(cart.discount),
+                    float(cart.net),
                     len(items),
                     notes,
                 ),
@@ -104,54 +134,40 @@ class SaleModel:
             sale_id = int(cur.lastrowid)
 
             # Itens
-            for it, (subtotal_gross, discount_value, subtotal_net) in zip(items, per_item_values):
-                conn.execute(
-                    """
-                    INSERT INTO sale_items (
-                        sale_id, product_id, sku, name, qty, unit_price, discount_percent, discount_value, subtotal_gross, subtotal_net
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-                    """,
+            conn.executemany(
+                """
+                INSERT INTO sale_items (
+                    sale_id, product_id, sku, name, qty, unit_price, discount_percent, discount_value, subtotal_gross, subtotal_net
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                [
                     (
                         sale_id,
                         it.product_id,
                         it.sku,
                         it.name,
                         it.qty,
-                        float(round2(it.unit_price)),
-                        float(round2(it.discount_percent)),
-                        float(discount_value),
-                        float(subtotal_gross),
-                        float(subtotal_net),
-                    ),
-                )
-
-        # Integração: cria pedido 'AGUARDANDO' a partir desta venda (fora da transação da venda)
-        try:
-            from models.order_model import OrderModel, OrderItemInput  # import local para evitar ciclo
-            om = OrderModel(self.db)
-            order_items = [
-                OrderItemInput(
-                    product_id=it.product_id,
-                    sku=str(it.sku),
-                    name=str(it.name),
-                    qty=int(it.qty),
-                    unit_price=float(round2(it.unit_price)),
-                    discount_percent=float(round2(it.discount_percent)),
-                )
-                for it in items
-            ]
-            om.create(
-                customer_name=customer_name or "Cliente",
-                customer_phone=None,
-                customer_email=customer_email,
-                shipping_method=shipping_method or "Correios",
-                shipping_cost=float(shipping_cost or 0),
-                items=order_items,
-                customer_address=customer_address,
-                notes=f"Gerado automaticamente da venda #{sale_id}",
+                        float(line.unit_price),
+                        float(line.discount_percent),
+                        float(line.discount),
+                        float(line.gross),
+                        float(line.net),
+                    )
+                    for it, line in zip(items, lines)
+                ],
             )
-        except Exception:
-            # Integração é opcional; se falhar, mantemos a venda registrada
-            pass
-
-        return sale_id
+            # "Comprados juntos": pares desta cesta (mesma transação)
+            record_basket(conn, (it.product_id for it in items))
+
+            # Integração: pedido 'AGUARDANDO' num SAVEPOINT próprio — se falhar,
+            # a venda continua registrada (mesmo comportamento de antes)
+            conn.execute("SAVEPOINT sale_order;")
+            try:
+                notes_order = f"Gerado automaticamente da venda #{sale_id}"
+                om._insert_order(conn, next_order_number(conn), replace(order, notes=notes_order))
+            except Exception:
+                conn.execute("ROLLBACK TO sale_order;")
+            conn.execute("RELEASE sale_order;")
+            return sale_id
+
+        return persist
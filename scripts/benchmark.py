@@ -0,0 +1,110 @@
+"""
+Benchmarks das operações em lote (rodam num banco temporário, nunca em data/).
+
+Uso:
+    python scripts/benchmark.py                 # todos os cenários
+    python scripts/benchmark.py product_import  # só um cenário
+    python scripts/benchmark.py --rows 200000
+
+Cada cenário imprime o volume processado, o tempo e a vazão (linhas/s).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import Database  # noqa: E402
+
+
+BENCHMARKS: dict[str, Callable[[Database, Path, int], tuple[int, float]]] = {}
+
+
+def benchmark(name: str):
+    """Registra um cenário: função(db, pasta_tmp, linhas) -> (processadas, segundos)."""
+    def deco(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return deco
+
+
+@benchmark("product_import")
+def bench_product_import(db: Database, tmp: Path, rows: int) -> tuple[int, float]:
+    from models.product_import import ProductImporter
+
+    csv_path = tmp / "catalogo.csv"
+    rnd = random.Random(42)
+    with csv_path.open("w", encoding="utf-8") as f:
+        f.write("sku;nome;categoria;grupo;custo;venda;estoque;min\n")
+        for i in range(rows):
+            cost = rnd.randint(100, 10000) / 100
+            f.write(f"SKU{i:08d};Produto {i};Cat {i % 50};G{i % 500};{cost:.2f};{cost * 1.5:.2f};{i % 100};5\n".replace(".", ","))
+    result = ProductImporter(db).import_file(csv_path)
+    if result.errors:
+        print(f"  aviso: {len(result.errors)} linhas com erro (ex.: {result.errors[0]})")
+    return result.total, result.elapsed
+
+
+def _seed_products(db: Database, tmp: Path, n: int) -> None:
+    from models.product_import import ProductImporter
+
+    rows = (
+        (i, {"sku": f"P{i:06d}", "name": f"Produto {i}", "cost_price": 10, "sale_price": 15, "stock_qty": 1000})
+        for i in range(1, n + 1)
+    )
+    ProductImporter(db).import_rows(rows)
+
+
+@benchmark("order_intake")
+def bench_order_intake(db: Database, tmp: Path, rows: int) -> tuple[int, float]:
+    """`rows` pedidos de marketplace com 1 a 5 itens cada (OrderModel.create_many)."""
+    from models.order_model import OrderInput, OrderItemInput, OrderModel
+
+    n_products = 1000
+    _seed_products(db, tmp, n_products)
+    rnd = random.Random(7)
+
+    def orders():
+        for i in range(rows):
+            items = []
+            for _ in range(rnd.randint(1, 5)):
+                pid = rnd.randint(1, n_products)
+                items.append(OrderItemInput(pid, f"P{pid:06d}", f"Produto {pid}", rnd.randint(1, 3), 15.0, 0.0))
+            yield OrderInput(customer_name=f"Cliente {i}", items=items, shipping_method="Marketplace")
+
+    result = OrderModel(db).create_many(orders())
+    if result.failures:
+        print(f"  aviso: {len(result.failures)} pedidos com falha (ex.: {result.failures[0]})")
+    return len(result.created), result.elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("names", nargs="*", help=f"cenários ({', '.join(BENCHMARKS)})")
+    ap.add_argument("--rows", type=int, default=100_000, help="volume por cenário (padrão 100000)")
+    args = ap.parse_args()
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Cenário desconhecido: {name}")
+        with tempfile.TemporaryDirectory() as d:
+            tmp = Path(d)
+            db = Database(os.path.join(d, "bench.db"))
+            t0 = time.perf_counter()
+            n, secs = BENCHMARKS[name](db, tmp, args.rows)
+            wall = time.perf_counter() - t0
+            rate = n / secs if secs > 0 else 0.0
+            print(f"{name:<20} {n:>10} linhas  {secs:8.3f}s  {rate:>12,.0f} linhas/s  (total {wall:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
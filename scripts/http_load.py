@@ -0,0 +1,159 @@
+"""
+Gerador de carga para o servidor HTTP/JSON (`services.server`).
+
+Simula N caixas (threads) fazendo o ciclo do balcão: sugestão de produto,
+busca por SKU, venda e, de tempos em tempos, avanço/envio de pedidos.
+
+Uso:
+    python scripts/http_load.py                        # sobe servidor local num banco temporário
+    python scripts/http_load.py --clients 16 --seconds 20
+    python scripts/http_load.py --url http://127.0.0.1:8765   # servidor já em execução
+    python scripts/http_load.py --direct               # mesma carga, SQLite direto (comparação)
+    python scripts/http_load.py --group-commit         # servidor local com fila de escrita em lote
+
+Imprime JSON com vazão (req/s) e latência p50/p95/p99 por operação.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import Database  # noqa: E402
+from models.sale_model import SaleItemInput  # noqa: E402
+from utils.stats import latency_summary  # noqa: E402
+
+N_PRODUCTS = 2000
+
+
+def _seed(db_path: str) -> None:
+    from models.product_import import ProductImporter
+
+    rows = (
+        (i, {"sku": f"P{i:06d}", "name": f"Produto {i}", "category": f"Cat {i % 40}",
+             "cost_price": 10, "sale_price": 15, "stock_qty": 1_000_000})
+        for i in range(1, N_PRODUCTS + 1)
+    )
+    ProductImporter(Database(db_path)).import_rows(rows)
+
+
+def _client_loop(backend, seed: int, deadline: float, samples: dict[str, list[float]],
+                 errors: dict[str, int], lock: threading.Lock) -> None:
+    rnd = random.Random(seed)
+    local: dict[str, list[float]] = {}
+    local_err: dict[str, int] = {}
+    created: list[int] = []
+
+    def timed(op: str, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            local_err[op] = local_err.get(op, 0) + 1
+            return None
+        finally:
+            local.setdefault(op, []).append(time.perf_counter() - t0)
+
+    i = 0
+    while time.perf_counter() < deadline:
+        i += 1
+        pid = rnd.randint(1, N_PRODUCTS)
+        timed("suggest", backend.sales.suggest, f"P{pid:06d}"[:5])
+        p = timed("find_by_sku", backend.sales.find_by_sku, f"P{pid:06d}")
+        if p is None:
+            continue
+        items = [SaleItemInput(p.id, p.sku, p.name, rnd.randint(1, 3), Decimal(str(p.sale_price)), Decimal("0"))]
+        timed("create_sale", backend.sales.create_sale, items)
+        if i % 5 == 0:
+            orders = timed("list_orders", backend.orders.list, "AGUARDANDO") or []
+            if orders:
+                oid = int(orders[rnd.randrange(len(orders))]["id"])
+                if timed("advance", backend.orders.advance, oid) is not None:
+                    created.append(oid)
+            if created:
+                timed("ship", backend.orders.advance, created.pop())
+    with lock:
+        for op, v in local.items():
+            samples.setdefault(op, []).extend(v)
+        for op, n in local_err.items():
+            errors[op] = errors.get(op, 0) + n
+
+
+def run(backend_factory, clients: int, seconds: float) -> dict:
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    t0 = time.perf_counter()
+    threads = [
+        threading.Thread(target=_client_loop, args=(backend_factory(), 1000 + n, deadline, samples, errors, lock))
+        for n in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    total = sum(len(v) for v in samples.values())
+    return {
+        "clients": clients,
+        "seconds": round(wall, 2),
+        "requests": total,
+        "requests_per_second": round(total / wall, 1) if wall else 0.0,
+        "errors": errors,
+        "ops": {op: latency_summary(v) for op, v in sorted(samples.items())},
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="servidor já em execução (sem isso, sobe um local em banco temporário)")
+    ap.add_argument("--direct", action="store_true", help="sem HTTP: cada cliente usa SQLite direto")
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--group-commit", action="store_true", help="servidor local com group commit")
+    args = ap.parse_args()
+
+    from services import Backend
+    from services.remote import RemoteBackend
+
+    if args.url:
+        result = run(lambda: RemoteBackend(args.url), args.clients, args.seconds)
+        result["mode"] = "http"
+        print(json.dumps(result, indent=2))
+        return
+
+    with tempfile.TemporaryDirectory() as d:
+        db_path = str(Path(d) / "load.db")
+        _seed(db_path)
+        if args.direct:
+            result = run(lambda: Backend(Database(db_path)), args.clients, args.seconds)
+            result["mode"] = "direct"
+        else:
+            from services.server import StockServer
+
+            server = StockServer(("127.0.0.1", 0), db_path, group_commit=args.group_commit)
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                result = run(lambda: RemoteBackend(url), args.clients, args.seconds)
+                if server.write_queue is not None:
+                    result["write_queue"] = server.write_queue.metrics()
+            finally:
+                server.shutdown()
+                server.server_close()
+            result["mode"] = "http"
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
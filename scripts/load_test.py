@@ -0,0 +1,267 @@
+"""
+Teste de carga multiprocesso do caminho de escrita (SQLite direto).
+
+Sobe N processos que, ao mesmo tempo, registram vendas (`SaleModel.create_sale`,
+que também cria o pedido) e enviam parte dos pedidos (`advance_status` +
+`OrderModel.ship`) num banco semeado. Mede vazão, latência p50/p95/p99,
+espera por lock e erros — para comparar modos de journal, busy timeout e
+`synchronous` e novas tentativas (`--retry-attempts`).
+
+Uso:
+    python scripts/load_test.py --workers 8 --seconds 15
+    python scripts/load_test.py --journal-mode wal --synchronous normal --busy-timeout 10
+    python scripts/load_test.py --workers 16 --out resultados/wal16.json
+
+Métricas de lock
+    O busy timeout é emulado em Python (conexão com timeout=0 e a mesma tabela
+    de esperas do busy handler do SQLite: 1, 2, 5, 10, ... 100 ms). Assim o
+    tempo parado esperando lock é medido exatamente:
+    - lock_wait: soma das esperas por operação (venda/envio).
+    - commit: duração do COMMIT (inclui fsync; com journal DELETE/TRUNCATE,
+      também a espera pelo lock EXCLUSIVE).
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from db import Database  # noqa: E402
+from utils.stats import latency_summary  # noqa: E402
+
+_BUSY_DELAYS_MS = (1, 2, 5, 10, 15, 20, 25, 25, 25, 50, 50, 100)  # mesma tabela do SQLite
+
+
+def _is_busy(e: sqlite3.OperationalError) -> bool:
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+
+class _TimedConnection(sqlite3.Connection):
+    """Conexão com busy handler em Python que contabiliza a espera por lock."""
+
+    busy_timeout: float
+    waited: list[float]   # [segundos acumulados] — compartilhado com o Database
+    commits: list[float]
+
+    def _retry(self, fn, *args):
+        deadline = time.perf_counter() + self.busy_timeout
+        for i in itertools.count():
+            try:
+                return fn(*args)
+            except sqlite3.OperationalError as e:
+                delay = _BUSY_DELAYS_MS[min(i, len(_BUSY_DELAYS_MS) - 1)] / 1000
+                if not _is_busy(e) or time.perf_counter() + delay > deadline:
+                    raise
+                time.sleep(delay)
+                self.waited[0] += delay
+
+    def execute(self, sql, *args):  # type: ignore[override]
+        return self._retry(super().execute, sql, *args)
+
+    def executemany(self, sql, *args):  # type: ignore[override]
+        return self._retry(super().executemany, sql, *args)
+
+    def commit(self) -> None:
+        if not self.in_transaction:
+            return
+        t0 = time.perf_counter()
+        try:
+            self._retry(super().commit)
+        finally:
+            self.commits.append(time.perf_counter() - t0)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and self.in_transaction:
+            self.commit()
+            return False
+        return super().__exit__(exc_type, exc, tb)
+
+
+class LoadDatabase(Database):
+    """Database com PRAGMAs configuráveis e conexões cronometradas."""
+
+    def __init__(self, db_path: str, journal_mode: str, synchronous: str, busy_timeout: float) -> None:
+        super().__init__(db_path, busy_timeout=busy_timeout, init_schema=False)  # esquema criado pelo pai
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.waited = [0.0]
+        self.commits: list[float] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=0, factory=_TimedConnection)
+        conn.busy_timeout = self.busy_timeout
+        conn.waited = self.waited
+        conn.commits = self.commits
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode};")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous};")
+        return conn
+
+
+def _error_kind(e: Exception) -> str:
+    if isinstance(e, sqlite3.OperationalError) and _is_busy(e):
+        return "locked"
+    return type(e).__name__
+
+
+def _worker(n: int, cfg: dict) -> dict:
+    from models.order_model import OrderModel
+    from models.sale_model import SaleItemInput, SaleModel
+
+    db = LoadDatabase(cfg["db_path"], cfg["journal_mode"], cfg["synchronous"], cfg["busy_timeout"])
+    db.RETRY_ATTEMPTS = cfg["retry_attempts"]
+    sales, orders = SaleModel(db), OrderModel(db)
+    rnd = random.Random(cfg["seed"] + n)
+    lat: dict[str, list[float]] = {"sale": [], "ship": []}
+    waits: list[float] = []
+    errors: dict[str, int] = {}
+
+    def fail(op: str, e: Exception) -> None:
+        key = f"{op}:{_error_kind(e)}"
+        errors[key] = errors.get(key, 0) + 1
+
+    time.sleep(max(0.0, cfg["start_at"] - time.time()))  # largada simultânea
+    deadline = time.perf_counter() + cfg["seconds"]
+    while time.perf_counter() < deadline:
+        items = []
+        for _ in range(rnd.randint(1, cfg["max_items"])):
+            pid = rnd.randint(1, cfg["products"])
+            items.append(SaleItemInput(pid, f"P{pid:06d}", f"Produto {pid}", rnd.randint(1, 3), Decimal("15"), Decimal("0")))
+        t0, w0 = time.perf_counter(), db.waited[0]
+        try:
+            sale_id = sales.create_sale(items)
+        except Exception as e:
+            fail("sale", e)
+            continue
+        finally:
+            lat["sale"].append(time.perf_counter() - t0)
+            waits.append(db.waited[0] - w0)
+        if rnd.random() >= cfg["ship_ratio"]:
+            continue
+        t0, w0 = time.perf_counter(), db.waited[0]
+        try:
+            conn = db._connect()
+            try:
+                row = conn.execute("SELECT id FROM orders WHERE notes = ?;",
+                                   (f"Gerado automaticamente da venda #{sale_id}",)).fetchone()
+            finally:
+                conn.close()
+            if row is None:
+                # create_sale engole falhas ao criar o pedido; contamos aqui
+                errors["order_missing"] = errors.get("order_missing", 0) + 1
+                continue
+            orders.advance_status(int(row[0]))
+            orders.ship(int(row[0]))
+        except Exception as e:
+            fail("ship", e)
+        finally:
+            lat["ship"].append(time.perf_counter() - t0)
+            waits.append(db.waited[0] - w0)
+    return {"latencies": lat, "errors": errors, "lock_waits": waits, "commits": db.commits,
+            "db_metrics": db.lock_metrics()}
+
+
+def _seed(db_path: str, products: int) -> None:
+    from models.product_import import ProductImporter
+
+    rows = (
+        (i, {"sku": f"P{i:06d}", "name": f"Produto {i}", "cost_price": 10, "sale_price": 15, "stock_qty": 10_000_000})
+        for i in range(1, products + 1)
+    )
+    ProductImporter(Database(db_path)).import_rows(rows)
+
+
+def run(cfg: dict) -> dict:
+    ctx = mp.get_context("spawn")  # mesmo comportamento em Windows e Linux
+    cfg = dict(cfg, start_at=time.time() + 1.5 + 0.1 * cfg["workers"])
+    with ctx.Pool(cfg["workers"]) as pool:
+        parts = pool.starmap(_worker, [(n, cfg) for n in range(cfg["workers"])])
+
+    lat: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    waits: list[float] = []
+    commits: list[float] = []
+    retries = busy = 0
+    for p in parts:
+        for op, v in p["latencies"].items():
+            lat.setdefault(op, []).extend(v)
+        for k, c in p["errors"].items():
+            errors[k] = errors.get(k, 0) + c
+        waits.extend(p["lock_waits"])
+        commits.extend(p["commits"])
+        retries += p["db_metrics"]["retries"]
+        busy += p["db_metrics"]["busy_errors"]
+    n_err = sum(errors.values())
+    ok = {op: len(v) - sum(c for k, c in errors.items() if k.startswith(op + ":")) for op, v in lat.items()}
+    secs = cfg["seconds"]
+    return {
+        "config": {k: cfg[k] for k in ("workers", "seconds", "journal_mode", "synchronous", "busy_timeout",
+                                       "retry_attempts", "ship_ratio", "max_items", "products")},
+        "throughput": {
+            "sales_per_second": round(ok.get("sale", 0) / secs, 1),
+            "ships_per_second": round(ok.get("ship", 0) / secs, 1),
+            "transactions_per_second": round(len(commits) / secs, 1),
+        },
+        "latency": {op: latency_summary(v) for op, v in lat.items()},
+        "lock_wait": dict(latency_summary(waits), total_s=round(sum(waits), 3)),
+        "commit": dict(latency_summary(commits), total_s=round(sum(commits), 3)),
+        "retries": {"busy_errors": busy, "retried": retries},
+        "errors": dict(sorted(errors.items())),
+        "error_rate": round(n_err / max(1, sum(len(v) for v in lat.values())), 4),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4, help="processos simultâneos (padrão 4)")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--journal-mode", default="delete", choices=("delete", "truncate", "persist", "wal"))
+    ap.add_argument("--synchronous", default="full", choices=("off", "normal", "full", "extra"))
+    ap.add_argument("--busy-timeout", type=float, default=5.0, help="segundos de espera por lock (padrão 5, como o sqlite3)")
+    ap.add_argument("--retry-attempts", type=int, default=Database.RETRY_ATTEMPTS,
+                    help="tentativas por transação em 'database is locked' (1 = sem nova tentativa)")
+    ap.add_argument("--ship-ratio", type=float, default=0.5, help="fração das vendas enviadas (0..1)")
+    ap.add_argument("--max-items", type=int, default=3, help="itens por venda: 1..N")
+    ap.add_argument("--products", type=int, default=5000)
+    ap.add_argument("--db", help="banco já semeado (padrão: temporário, semeado na hora)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="grava o JSON neste arquivo (além de imprimir)")
+    args = ap.parse_args()
+
+    cfg = {
+        "workers": args.workers, "seconds": args.seconds, "journal_mode": args.journal_mode,
+        "synchronous": args.synchronous, "busy_timeout": args.busy_timeout,
+        "retry_attempts": args.retry_attempts, "ship_ratio": args.ship_ratio,
+        "max_items": args.max_items, "products": args.products, "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory() as d:
+        if args.db:
+            cfg["db_path"] = args.db
+            Database(args.db)
+        else:
+            cfg["db_path"] = os.path.join(d, "load.db")
+            _seed(cfg["db_path"], args.products)
+        result = run(cfg)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
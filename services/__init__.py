@@ -0,0 +1,60 @@
+"""
+Pacote services: camada de serviços sem interface gráfica.
+
+Agrupa os models em operações de alto nível usadas tanto pelas telas quanto
+pela linha de comando (`python -m services ...`). Nenhum módulo deste pacote
+importa Tkinter — cron jobs e servidores sem display podem usá-lo direto.
+
+    backend = Backend(Database("data/estoque.db"))
+    backend.orders.advance(order_id)
+    backend.reports.sales_summary("2025-01-01", "2025-01-31")
+
+Com `writer=WriteQueue(db)`, vendas e transições de pedido passam pela fila
+de group commit (`services.writer`) em vez de uma transação cada.
+"""
+
+from __future__ import annotations
+
+from db import Database
+from services.abc_report import AbcParams, AbcReportService
+from services.archive import ArchiveService
+from services.basket import BasketService
+from services.catalog import CatalogService
+from services.orders import AdvanceResult, OrderService
+from services.replenish import ReplenishmentService, ReplenishParams
+from services.reports import ReportService, SalesSummary
+from services.sales import SaleService
+from services.writer import WriteQueue
+
+__all__ = [
+    "AbcParams",
+    "AbcReportService",
+    "AdvanceResult",
+    "ArchiveService",
+    "BasketService",
+    "Backend",
+    "CatalogService",
+    "OrderService",
+    "ReplenishParams",
+    "ReplenishmentService",
+    "ReportService",
+    "SaleService",
+    "SalesSummary",
+    "WriteQueue",
+]
+
+
+class Backend:
+    """Ponto único de acesso aos serviços sobre um banco local."""
+
+    def __init__(self, db: Database, writer: WriteQueue | None = None) -> None:
+        self.db = db
+        self.writer = writer
+        self.catalog = CatalogService(db)
+        self.orders = OrderService(db, writer)
+        self.sales = SaleService(db, writer)
+        self.archive = ArchiveService(db)
+        self.reports = ReportService(db, self.archive)
+        self.basket = BasketService(db, self.archive)
+        self.replenish = ReplenishmentService(db)
+        self.abc = AbcReportService(db)
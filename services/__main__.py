@@ -0,0 +1,502 @@
+"""
+Linha de comando para rotinas em lote (sem Tkinter, sem display).
+
+Uso:
+    python -m services import produtos.csv [--dry-run] [--no-update]
+    python -m services export products|sales|items|orders ARQUIVO.csv [--start D] [--end D | --range "Este mês"]
+    python -m services ship 12 15 18          # ou: --all-prepared
+    python -m services reprice --percent 10 --category Bebidas [--dry-run]
+    python -m services report [--range "Mês passado"] [--json] [--snapshot]
+    python -m services snapshot [--every 900]   # cópia para relatórios (backup online)
+    python -m services archive [--months 12] [--batch 500] [--dry-run]   # move o antigo p/ data/archive
+    python -m services reconcile [--workers 4] [--snapshot] [--out divergencias.csv] [--seed-missing]
+    python -m services maintain check stats optimize vacuum checkpoint [--window 22:00-06:00 [--wait]]
+    python -m services pairs [--min-count 2] | --sku ABC123   # "comprados juntos"
+    python -m services replenish [--window 28] [--lead 7] [--review 7] [--service 0.95] [--all] [--out compra.csv]
+    python -m services abc [--range "Este mês"] [--a 80 --b 95] [--slow-days 90] [--out abc.csv]   # curva ABC e parados
+    python -m services rollup [--rebuild]     # resumos diários (incremental; --rebuild inclui os anos arquivados)
+    python -m services promo list | add --name N --kind PERCENT|TIER|BXGY --scope SKU|CATEGORY|GROUP|ALL ... | on|off|rm ID...
+
+Datas aceitam `dd/mm/aaaa` ou `aaaa-mm-dd`. Opção global: --db (padrão
+data/estoque.db). Código de saída 1 quando alguma linha/pedido falha.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+
+from db import Database
+from models.promotions import KINDS, SCOPES, Promotion, PromotionModel
+from services import Backend
+from services.abc_report import AbcParams, AbcReportService
+from services.reports import QUICK_RANGES, ReportService, parse_date, quick_range
+from services.maintenance import CHECKPOINT_MODES, MODES, Maintenance, MaintenanceWindow, StepResult
+from services.reconcile import DEFAULT_SHARD_SIZE, StockReconciler
+from models.rollup_model import RollupModel
+from services.replenish import ENGINES, ReplenishParams
+from services.snapshot import SnapshotManager
+from utils.formatting import br_money
+
+DEFAULT_DB = "data/estoque.db"
+
+
+def _period(args: argparse.Namespace) -> tuple[str | None, str | None]:
+    if getattr(args, "range", None):
+        rng = quick_range(args.range)
+        if rng is None:
+            raise SystemExit(f"Intervalo desconhecido: {args.range} (use: {', '.join(QUICK_RANGES)})")
+        return rng[0].isoformat(), rng[1].isoformat()
+    start, end = parse_date(args.start), parse_date(args.end)
+    for raw, parsed in ((args.start, start), (args.end, end)):
+        if raw and parsed is None:
+            raise SystemExit(f"Data inválida: {raw}")
+    return start, end
+
+
+def _add_period(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--start", help="data inicial")
+    p.add_argument("--end", help="data final (inclusiva)")
+    p.add_argument("--range", help=f"intervalo rápido ({', '.join(QUICK_RANGES)})")
+    p.add_argument("--snapshot", action="store_true", help="lê a cópia de relatórios (renovada se velha)")
+
+
+def _reports(backend: Backend, args: argparse.Namespace) -> ReportService:
+    if not getattr(args, "snapshot", False):
+        return backend.reports
+    snap = SnapshotManager(backend.db)
+    info = snap.ensure()
+    print(f"(cópia de {info.taken_at:%d/%m/%Y %H:%M})", file=sys.stderr)
+    return ReportService(snap.database(), backend.archive)
+
+
+# ----------------------------- Comandos -----------------------------
+def cmd_import(backend: Backend, args: argparse.Namespace) -> int:
+    res = backend.catalog.import_file(args.file, update_existing=not args.no_update, dry_run=args.dry_run)
+    prefix = "[dry-run] " if res.dry_run else ""
+    print(f"{prefix}Linhas: {res.total} | Novos: {res.inserted} | Atualizados: {res.updated} | "
+          f"Com erro: {len(res.errors)} | {res.elapsed:.2f}s ({res.rows_per_second:,.0f} linhas/s)")
+    for e in res.errors[: args.max_errors]:
+        print(f"  Linha {e.line_no} ({e.sku or '-'}): {e.message}", file=sys.stderr)
+    return 1 if res.errors else 0
+
+
+def cmd_export(backend: Backend, args: argparse.Namespace) -> int:
+    if args.kind == "products":
+        n = backend.catalog.export_csv(args.file)
+    else:
+        start, end = _period(args)
+        reports = _reports(backend, args)
+        export = {"sales": reports.export_sales, "items": reports.export_items,
+                  "orders": reports.export_orders}[args.kind]
+        n = export(args.file, start, end)
+    print(f"{n} linha(s) exportada(s) para {args.file}")
+    return 0
+
+
+def cmd_ship(backend: Backend, args: argparse.Namespace) -> int:
+    ids = backend.orders.prepared_ids() if args.all_prepared else args.order_ids
+    if not ids:
+        print("Nenhum pedido para enviar.")
+        return 0
+    failed = 0
+    for oid in ids:
+        try:
+            backend.orders.ship(oid)
+            print(f"Pedido {oid}: ENVIADO")
+        except ValueError as e:
+            failed += 1
+            print(f"Pedido {oid}: {e}", file=sys.stderr)
+    print(f"{len(ids) - failed} enviado(s), {failed} com falha.")
+    return 1 if failed else 0
+
+
+def cmd_reprice(backend: Backend, args: argparse.Namespace) -> int:
+    mode, value = ("percent", args.percent) if args.percent is not None else ("absolute", args.absolute)
+    res = backend.catalog.reprice(
+        mode, value, category=args.category, group_code=args.group, sku_prefix=args.sku_prefix,
+        all_products=args.all, dry_run=args.dry_run,
+    )
+    for c in res.changes:
+        line = f"{c.sku:<16} {br_money(c.old_price):>14} -> {br_money(c.new_price):>14}"
+        print(line + (f"  ({c.error})" if c.error else ""))
+    if res.dry_run:
+        print(f"[dry-run] {len(res.changes) - len(res.errors)} produto(s) seriam alterados, {len(res.errors)} bloqueado(s).")
+    else:
+        print(f"{res.applied} produto(s) alterado(s), {len(res.errors)} bloqueado(s).")
+    return 1 if res.errors else 0
+
+
+def cmd_report(backend: Backend, args: argparse.Namespace) -> int:
+    start, end = _period(args)
+    reports = _reports(backend, args)
+    summary = reports.sales_summary(start, end)
+    missing = reports.missing_products()
+    if args.json:
+        print(json.dumps({"start": start, "end": end, "sales": asdict(summary), "missing_products": missing},
+                         ensure_ascii=False, indent=2))
+        return 0
+    print(f"Período: {start or '-'} a {end or '-'}")
+    print(f"Vendas: {summary.count} | Bruto: {br_money(summary.gross)} | "
+          f"Descontos: {br_money(summary.discount)} | Líquido: {br_money(summary.net)}")
+    print(f"Produtos em falta: {len(missing)}")
+    for r in missing:
+        print(f"  {r['sku']:<16} {r['name'][:40]:<40} {r['stock_qty']:>6} / mín. {r['min_stock']}")
+    return 0
+
+
+def cmd_snapshot(backend: Backend, args: argparse.Namespace) -> int:
+    snap = SnapshotManager(backend.db, path=args.out)
+    while True:
+        info = snap.refresh()
+        print(f"{info.path}: {info.pages} páginas em {info.seconds:.2f}s "
+              f"({info.restarts} recomeço(s)) — {info.taken_at:%d/%m/%Y %H:%M:%S}", flush=True)
+        if not args.every:
+            return 0
+        time.sleep(args.every)
+
+
+def cmd_archive(backend: Backend, args: argparse.Namespace) -> int:
+    res = backend.archive.archive(months=args.months, batch_size=args.batch, dry_run=args.dry_run)
+    prefix = "[dry-run] " if res.dry_run else ""
+    moved = ", ".join(f"{t}: {n}" for t, n in res.moved.items() if n) or "nada"
+    years = ", ".join(str(y) for y in res.years) or "-"
+    print(f"{prefix}Anterior a {res.cutoff} | anos: {years} | {moved} | "
+          f"{res.batches} lote(s) em {res.elapsed:.2f}s -> {backend.archive.archive_dir}")
+    return 0
+
+
+def cmd_reconcile(backend: Backend, args: argparse.Namespace) -> int:
+    rec = StockReconciler(backend.db, shard_size=args.shard_size)
+    if args.seed_missing:
+        print(f"{rec.seed_baselines()} baseline(s) criado(s) a partir do estoque atual.")
+    path = None
+    if args.snapshot:
+        snap = SnapshotManager(backend.db)
+        info = snap.ensure()
+        print(f"(cópia de {info.taken_at:%d/%m/%Y %H:%M})", file=sys.stderr)
+        path = snap.path
+    res = rec.run(workers=args.workers, db_path=path)
+    print(f"Produtos conferidos: {res.checked} | sem baseline: {res.unchecked} | "
+          f"movimentações: {res.movements:,} | {res.shards} faixa(s), {res.workers} processo(s) em {res.elapsed:.2f}s")
+    for m in res.mismatches[: args.max_rows]:
+        print(f"  {m.sku:<16} {m.name[:32]:<32} estoque {m.stock_qty:>7} esperado {m.expected:>7} ({m.diff:+d})")
+    if args.out:
+        print(f"{rec.export(res, args.out)} divergência(s) exportada(s) para {args.out}")
+    if res.unchecked and not args.seed_missing:
+        print("Dica: --seed-missing cria baseline para produtos antigos (aceita o estoque atual).", file=sys.stderr)
+    print(f"Divergências: {len(res.mismatches)}")
+    return 0 if res.ok else 1
+
+
+def cmd_pairs(backend: Backend, args: argparse.Namespace) -> int:
+    if args.sku:
+        p = backend.sales.find_by_sku(args.sku)
+        if p is None or p.sku != args.sku.strip().upper():
+            raise ValueError(f"SKU inexistente: {args.sku}")
+        partners = backend.basket.partners(p.id)
+        for other, n in partners:
+            print(f"  {other.sku:<16} {other.name[:40]:<40} {n:>7} venda(s) juntos")
+        print(f"{len(partners)} parceiro(s) de {p.sku}.")
+        return 0
+    res = backend.basket.rebuild(min_count=args.min_count)
+    print(f"{res.sales:,} venda(s) lidas | {res.pairs:,} par(es) | "
+          f"{res.late_sales} venda(s) durante a reconstrução | {res.seconds:.2f}s")
+    return 0
+
+
+def cmd_replenish(backend: Backend, args: argparse.Namespace) -> int:
+    params = ReplenishParams(window_days=args.window, short_days=args.short, lead_days=args.lead,
+                             review_days=args.review, service_level=args.service)
+    res = backend.replenish.plan(params, only_to_order=not args.all, refresh=not args.no_refresh,
+                                 engine=args.engine)
+    if res.rollup is not None and res.rollup.movements:
+        print(f"{res.rollup.movements:,} movimentação(ões) nova(s) somada(s) ao resumo diário.")
+    for r in res.rows[: args.max_rows]:
+        cover = "-" if r.cover_days is None else f"{r.cover_days:.1f}"
+        print(f"  {r.sku:<16} {r.name[:32]:<32} estoque {r.stock_qty:>6} +{r.on_order:<5} "
+              f"{r.velocity:>7.2f}/dia cobre {cover:>6} d  PP {r.reorder_point:>5}  comprar {r.suggested:>6}")
+    if args.out:
+        print(f"{backend.replenish.export_result(res, args.out)} linha(s) exportada(s) para {args.out}")
+    print(f"Janela {res.window_start} a {res.window_end} (exclusivo) | {res.products} produto(s) | "
+          f"{res.to_order} com compra sugerida | cálculo {res.engine} em {res.seconds:.2f}s")
+    return 0
+
+
+def cmd_abc(backend: Backend, args: argparse.Namespace) -> int:
+    start, end = _period(args)
+    params = AbcParams(a_share=args.a / 100, b_share=args.b / 100, slow_days=args.slow_days)
+    abc = backend.abc
+    if args.snapshot:  # resumos como estavam na cópia (rode `rollup` antes de `snapshot`)
+        snap = SnapshotManager(backend.db)
+        info = snap.ensure()
+        print(f"(cópia de {info.taken_at:%d/%m/%Y %H:%M})", file=sys.stderr)
+        abc = AbcReportService(snap.database())
+    res = abc.report(start, end, params)
+    for r in res.rows[: args.max_rows]:
+        print(f"  {r.rank:>5} {r.sku:<16} {r.name[:32]:<32} {br_money(r.revenue):>14} "
+              f"{r.cumulative_share * 100:6.1f}%  {r.revenue_class}/{r.units_class} {r.units:>7} un")
+    slow = [r for r in res.rows if r.slow]
+    if args.slow_rows:
+        print(f"Parados há {params.slow_days}+ dias:")
+        for r in sorted(slow, key=lambda r: -r.stock_value)[: args.slow_rows]:
+            idle = "nunca saiu" if r.idle_days is None else f"{r.idle_days} dias"
+            print(f"  {r.sku:<16} {r.name[:32]:<32} {r.stock_qty:>6} un {br_money(r.stock_value):>14}  {idle}")
+    if args.out:
+        print(f"{backend.abc.export_result(res, args.out)} linha(s) exportada(s) para {args.out}")
+    print(f"Período: {start or '-'} a {end or '-'} | Receita: {br_money(res.total_revenue)} | "
+          f"A {res.classes['A']} / B {res.classes['B']} / C {res.classes['C']} | "
+          f"parados: {res.slow} ({br_money(res.slow_value)} a custo) | {res.seconds:.2f}s"
+          + (" (cache)" if res.cached else ""))
+    return 0
+
+
+def cmd_rollup(backend: Backend, args: argparse.Namespace) -> int:
+    rollups = RollupModel(backend.db)
+    if args.rebuild:
+        res = rollups.rebuild(backend.archive.path_for(y) for y in backend.archive.years())
+    else:
+        res = rollups.refresh()
+    print(f"{res.movements:,} movimentação(ões) e {res.sale_items:,} item(ns) de venda somados | "
+          + ", ".join(f"{name} até id {last}" for name, last in res.versions.items()))
+    return 0
+
+
+def _describe_promotion(p: Promotion) -> str:
+    if p.kind == "PERCENT":
+        offer = f"{p.percent:g}%"
+    elif p.kind == "TIER":
+        offer = f"faixas {p.tiers}"
+    else:
+        offer = f"leve {p.buy_qty + p.get_qty} pague {p.buy_qty}"
+    when = " ".join(x for x in (
+        f"de {p.starts_at}" if p.starts_at else "", f"até {p.ends_at}" if p.ends_at else "",
+        f"dias {p.days}" if p.days else "", p.hours or "") if x)
+    target = p.scope if p.scope == "ALL" else f"{p.scope} {p.target}"
+    return f"#{p.id:<4} {'ativa  ' if p.active else 'inativa'} {p.name[:30]:<30} {target[:28]:<28} {offer}" + (
+        f" ({when})" if when else "")
+
+
+def cmd_promo(backend: Backend, args: argparse.Namespace) -> int:
+    model = PromotionModel(backend.db)
+    if args.action == "list":
+        promos = model.list()
+        for p in promos:
+            print(_describe_promotion(p))
+        print(f"{len(promos)} promoção(ões).")
+        return 0
+    if args.action == "add":
+        pid = model.create(
+            args.name, args.kind, args.scope, target=args.target, percent=args.percent, tiers=args.tiers,
+            buy_qty=args.buy, get_qty=args.get, starts_at=args.starts, ends_at=args.until,
+            days=args.days, hours=args.hours,
+        )
+        print(f"Promoção #{pid} criada.")
+        return 0
+    if not args.ids:
+        raise ValueError(f"Informe o(s) id(s) para '{args.action}'")
+    for pid in args.ids:
+        if args.action == "rm":
+            model.delete(pid)
+        else:
+            model.set_active(pid, args.action == "on")
+    print(f"{len(args.ids)} promoção(ões) atualizada(s).")
+    return 0
+
+
+def _print_step(res: StepResult) -> None:
+    status = "ok" if res.ok else "FALHOU"
+    print(f"[{res.name}] {status} em {res.seconds:.2f}s", flush=True)
+    d = res.detail
+    if "error" in d:
+        print(f"  {d['error']}")
+    if res.name == "check":
+        for p in d["problems"][:20]:
+            print(f"  {p}")
+        for v in d.get("foreign_key_violations", [])[:20]:
+            print(f"  FK: {v['table']} rowid {v['rowid']} -> {v['parent']}")
+    elif res.name == "stats":
+        print(f"  {d['page_count']} páginas de {d['page_size']} B = {d['file_bytes'] / 1e6:.1f} MB | "
+              f"livres: {d['freelist_pages']} ({d['free_percent']}%) | auto_vacuum {d['auto_vacuum']} | "
+              f"journal {d['journal_mode']} | WAL {d['wal_bytes'] / 1e6:.1f} MB")
+        for o in (d["objects"] or [])[:15]:
+            print(f"  {o.kind:<6} {o.name:<36} {o.pages:>8} pág. {o.bytes / 1e6:>9.2f} MB")
+        if d["objects"] is None:
+            print("  (tamanho por tabela indisponível: SQLite sem dbstat)")
+    elif res.name == "optimize":
+        print(f"  {d['mode']}: {d['stat1_rows']} linha(s) em sqlite_stat1")
+    elif res.name == "vacuum" and res.ok:
+        print(f"  {d['freed_pages']} página(s) devolvida(s); {d['freelist_pages']} livre(s)")
+    elif res.name == "checkpoint":
+        if d.get("skipped"):
+            print(f"  journal {d['journal_mode']}: nada a fazer")
+        else:
+            print(f"  {d['mode']}: {d['checkpointed_frames']}/{d['wal_frames']} frames"
+                  + (" (ocupado: leitores/escritores ativos)" if d["busy"] else ""))
+
+
+def cmd_maintain(backend: Backend, args: argparse.Namespace) -> int:
+    unknown = [m for m in args.modes if m not in MODES]
+    if unknown:
+        raise SystemExit(f"Passo desconhecido: {', '.join(unknown)} (use: {', '.join(MODES)})")
+    if args.window:
+        window = MaintenanceWindow(args.window)
+        wait = window.seconds_until_open()
+        if wait and not args.wait:
+            print(f"Fora da janela {window.spec}; use --wait para aguardar ({wait / 3600:.1f} h).", file=sys.stderr)
+            return 1
+        if wait:
+            print(f"Aguardando a janela {window.spec} ({wait / 3600:.1f} h)...", flush=True)
+            time.sleep(wait)
+    maint = Maintenance(backend.db)
+    results: list[StepResult] = []
+    if args.enable_incremental:
+        results.append(maint.enable_incremental_vacuum())
+        _print_step(results[-1])
+    results += maint.run(args.modes or list(MODES), full_check=args.full, analyze=args.analyze,
+                         vacuum_pages=args.pages, checkpoint_mode=args.checkpoint_mode, on_step=_print_step)
+    total = sum(r.seconds for r in results)
+    failed = [r.name for r in results if not r.ok]
+    print(f"Total: {total:.2f}s" + (f" | com falha: {', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m services", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"arquivo do banco (padrão {DEFAULT_DB})")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="importa produtos de CSV/JSONL")
+    p.add_argument("file")
+    p.add_argument("--dry-run", action="store_true", help="valida sem gravar")
+    p.add_argument("--no-update", action="store_true", help="não altera produtos existentes")
+    p.add_argument("--max-errors", type=int, default=50, help="erros exibidos (padrão 50)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="exporta CSV (separador ';')")
+    p.add_argument("kind", choices=("products", "sales", "items", "orders"))
+    p.add_argument("file")
+    _add_period(p)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("ship", help="envia pedidos PREPARADO (baixa estoque)")
+    p.add_argument("order_ids", nargs="*", type=int)
+    p.add_argument("--all-prepared", action="store_true", help="todos os pedidos PREPARADO")
+    p.set_defaults(func=cmd_ship)
+
+    p = sub.add_parser("reprice", help="reajuste de preços em lote")
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument("--percent", type=float, help="percentual (ex.: 10 ou -5)")
+    g.add_argument("--absolute", type=float, help="valor em R$ (ex.: 2.50 ou -1)")
+    p.add_argument("--category")
+    p.add_argument("--group")
+    p.add_argument("--sku-prefix")
+    p.add_argument("--all", action="store_true", help="sem filtro: todos os produtos")
+    p.add_argument("--dry-run", action="store_true", help="só mostra a prévia")
+    p.set_defaults(func=cmd_reprice)
+
+    p = sub.add_parser("report", help="resumo de vendas e produtos em falta")
+    _add_period(p)
+    p.add_argument("--json", action="store_true", help="saída em JSON")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("snapshot", help="copia o banco para relatórios (backup online, incremental)")
+    p.add_argument("--out", help="arquivo da cópia (padrão: <banco>.snapshot.db)")
+    p.add_argument("--every", type=float, help="repete a cada N segundos (agendamento simples)")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("archive", help="move vendas/pedidos fechados/movimentações antigos para arquivos por ano")
+    p.add_argument("--months", type=int, default=12, help="mantém no banco os últimos N meses (padrão 12)")
+    p.add_argument("--batch", type=int, default=500, help="registros por transação (padrão 500)")
+    p.add_argument("--dry-run", action="store_true", help="só conta o que seria movido")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("reconcile", help="confere o estoque contra baseline + movimentações (em paralelo)")
+    p.add_argument("--workers", type=int, help="processos (padrão: núcleos da máquina)")
+    p.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                   help=f"produtos por tarefa (padrão {DEFAULT_SHARD_SIZE})")
+    p.add_argument("--snapshot", action="store_true", help="lê a cópia de relatórios (nenhum lock no banco vivo)")
+    p.add_argument("--out", help="CSV com as divergências")
+    p.add_argument("--seed-missing", action="store_true", help="cria baseline para produtos que não têm")
+    p.add_argument("--max-rows", type=int, default=50, help="divergências exibidas (padrão 50)")
+    p.set_defaults(func=cmd_reconcile)
+
+    p = sub.add_parser("maintain", help="manutenção do banco (checagem, estatísticas, optimize, vacuum, checkpoint)")
+    p.add_argument("modes", nargs="*", metavar="PASSO", help=f"{', '.join(MODES)} (padrão: todos)")
+    p.add_argument("--full", action="store_true", help="integrity_check completo em vez de quick_check")
+    p.add_argument("--analyze", action="store_true", help="ANALYZE completo em vez de PRAGMA optimize")
+    p.add_argument("--pages", type=int, help="máximo de páginas no vacuum incremental (padrão: todas)")
+    p.add_argument("--checkpoint-mode", default="PASSIVE", type=str.upper, choices=CHECKPOINT_MODES)
+    p.add_argument("--enable-incremental", action="store_true",
+                   help="liga auto_vacuum=INCREMENTAL (VACUUM completo; só com a loja fechada)")
+    p.add_argument("--window", help="só roda nesta janela, ex.: 22:00-06:00")
+    p.add_argument("--wait", action="store_true", help="fora da janela, espera ela abrir")
+    p.set_defaults(func=cmd_maintain)
+
+    p = sub.add_parser("pairs", help='reconstrói o índice "comprados juntos" (ou mostra os parceiros de um SKU)')
+    p.add_argument("--min-count", type=int, default=1, help="descarta pares com menos vendas juntos (padrão 1)")
+    p.add_argument("--sku", help="só mostra os parceiros deste SKU")
+    p.set_defaults(func=cmd_pairs)
+
+    p = sub.add_parser("replenish", help="ponto de pedido, cobertura e compra sugerida (a partir das movimentações)")
+    p.add_argument("--window", type=int, default=28, help="janela de venda em dias (padrão 28)")
+    p.add_argument("--short", type=int, default=7, help="janela curta, tendência (padrão 7)")
+    p.add_argument("--lead", type=float, default=7, help="prazo do fornecedor em dias (padrão 7)")
+    p.add_argument("--review", type=float, default=7, help="dias entre compras (padrão 7)")
+    p.add_argument("--service", type=float, default=0.95, help="nível de serviço (padrão 0.95)")
+    p.add_argument("--all", action="store_true", help="todos os produtos, não só os que precisam de compra")
+    p.add_argument("--out", help="CSV com a sugestão")
+    p.add_argument("--max-rows", type=int, default=50, help="linhas exibidas (padrão 50)")
+    p.add_argument("--no-refresh", action="store_true", help="não soma as movimentações novas antes")
+    p.add_argument("--engine", choices=ENGINES, help="força o cálculo (padrão: numpy se instalado)")
+    p.set_defaults(func=cmd_replenish)
+
+    p = sub.add_parser("abc", help="curva ABC (receita e unidades) e produtos parados")
+    _add_period(p)
+    p.add_argument("--a", type=float, default=80, help="%% acumulado da classe A (padrão 80)")
+    p.add_argument("--b", type=float, default=95, help="%% acumulado até a classe B (padrão 95)")
+    p.add_argument("--slow-days", type=int, default=90, help="dias sem saída para contar como parado (padrão 90)")
+    p.add_argument("--out", help="CSV com todos os produtos")
+    p.add_argument("--max-rows", type=int, default=20, help="linhas da curva exibidas (padrão 20)")
+    p.add_argument("--slow-rows", type=int, default=10, help="parados exibidos, maior valor em estoque primeiro (padrão 10)")
+    p.set_defaults(func=cmd_abc)
+
+    p = sub.add_parser("rollup", help="atualiza os resumos diários (movimentações e vendas)")
+    p.add_argument("--rebuild", action="store_true", help="refaz do zero, incluindo os anos arquivados")
+    p.set_defaults(func=cmd_rollup)
+
+    p = sub.add_parser("promo", help="promoções do caixa (lista, cadastra, liga/desliga)")
+    p.add_argument("action", choices=("list", "add", "on", "off", "rm"))
+    p.add_argument("ids", nargs="*", type=int, help="ids para on/off/rm")
+    p.add_argument("--name")
+    p.add_argument("--kind", type=str.upper, choices=KINDS)
+    p.add_argument("--scope", type=str.upper, choices=SCOPES, default="SKU")
+    p.add_argument("--target", help="SKU, categoria ou grupo (conforme --scope)")
+    p.add_argument("--percent", type=float, help="PERCENT: percentual (ex.: 10)")
+    p.add_argument("--tiers", help='TIER: faixas "qtd:perc;qtd:perc" (ex.: "10:5;50:8")')
+    p.add_argument("--buy", type=int, help="BXGY: quantidade paga")
+    p.add_argument("--get", type=int, help="BXGY: quantidade grátis")
+    p.add_argument("--from", dest="starts", help="início da vigência (aaaa-mm-dd [HH:MM])")
+    p.add_argument("--until", help="fim da vigência (data sem hora vale o dia todo)")
+    p.add_argument("--days", help="dias da semana, 0=segunda (ex.: 56 = sábado e domingo)")
+    p.add_argument("--hours", help="faixa de horário, ex.: 18:00-22:00")
+    p.set_defaults(func=cmd_promo)
+    return ap
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    backend = Backend(Database(args.db))
+    try:
+        return args.func(backend, args)
+    except (ValueError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
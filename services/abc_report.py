@@ -0,0 +1,215 @@
+"""
+Módulo: services/abc_report.py
+
+Visão geral
+    Curva ABC (Pareto) e produtos parados. Cada produto recebe duas classes
+    — por receita líquida e por unidades vendidas no período — e é marcado
+    como parado quando não tem saída (envio de pedido ou venda) há
+    `slow_days` dias.
+
+Classes
+    Produtos em ordem decrescente (empate: id). Enquanto o acumulado
+    *antes* do produto for menor que `a_share` (80%), ele é A; menor que
+    `b_share` (95%), B; o resto — inclusive quem não vendeu — é C. O produto
+    que cruza a linha dos 80% ainda é A.
+
+Custo
+    Tudo sai dos resumos diários (`models.rollup_model`) numa única consulta
+    agregada: a soma do período lê só os dias do período (índice por dia) e
+    a última saída de cada produto é uma busca no índice (product_id, day).
+    O tempo depende do número de produtos e de dias do período, não do
+    tamanho do histórico. O resultado fica em cache enquanto a versão dos
+    dados não muda (último id somado em cada resumo + versão de `products`
+    em `change_counters`).
+
+Uso
+    python -m services abc [--range "Este mês"] [--a 80 --b 95] [--slow-days 90] [--out abc.csv]
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from db import Database
+from models.rollup_model import MOVEMENTS_STATE, SALES_STATE, RollupModel, rollup_version
+from services.reports import _period_where
+from utils.exports import export_csv
+from utils.formatting import br_number
+
+CACHE_SIZE = 16  # relatórios guardados (período/parâmetros diferentes)
+
+_ABC_SQL = """
+SELECT p.id, p.sku, p.name, p.category, p.stock_qty, p.cost_price, p.created_at,
+       COALESCE(s.qty, 0), COALESCE(s.revenue, 0),
+       (SELECT m.day FROM movement_daily m WHERE m.product_id = p.id AND m.out_qty > 0
+         ORDER BY m.day DESC LIMIT 1),
+       (SELECT MAX(d.day) FROM sales_daily d WHERE d.product_id = p.id)
+  FROM products p
+  LEFT JOIN (SELECT product_id, SUM(qty) AS qty, SUM(revenue) AS revenue
+               FROM sales_daily{where}
+              GROUP BY product_id) s ON s.product_id = p.id;
+"""
+
+
+@dataclass(frozen=True)
+class AbcParams:
+    a_share: float = 0.80
+    b_share: float = 0.95
+    slow_days: int = 90
+
+    def validate(self) -> None:
+        if not 0 < self.a_share < self.b_share <= 1:
+            raise ValueError("Faixas inválidas: use 0 < A < B <= 100%.")
+        if self.slow_days < 1:
+            raise ValueError("Dias sem saída deve ser pelo menos 1.")
+
+
+@dataclass
+class AbcRow:
+    rank: int                   # posição por receita
+    product_id: int
+    sku: str
+    name: str
+    category: str | None
+    revenue: float
+    revenue_share: float        # 0..1
+    cumulative_share: float     # 0..1, acumulado até este produto
+    revenue_class: str
+    units: int
+    units_class: str
+    last_movement: str | None   # aaaa-mm-dd da última saída/venda
+    idle_days: int | None
+    slow: bool
+    stock_qty: int
+    stock_value: float          # estoque a preço de custo
+
+
+@dataclass
+class AbcReport:
+    rows: list[AbcRow] = field(default_factory=list)
+    start: str | None = None
+    end: str | None = None
+    total_revenue: float = 0.0
+    total_units: int = 0
+    classes: dict[str, int] = field(default_factory=dict)  # produtos por classe (receita)
+    slow: int = 0
+    slow_value: float = 0.0     # capital parado (custo) nos produtos parados
+    version: tuple = ()
+    cached: bool = False
+    seconds: float = 0.0
+
+
+def classify(values: list[float], a_share: float, b_share: float) -> list[str]:
+    """Classe A/B/C de cada valor (mesma ordem da entrada)."""
+    order = sorted(range(len(values)), key=lambda i: -values[i])  # sort estável: empate fica por posição
+    total = sum(values)
+    classes = ["C"] * len(values)
+    acc = 0.0
+    for i in order:
+        if values[i] <= 0 or total <= 0:
+            break
+        before = acc / total
+        classes[i] = "A" if before < a_share else "B" if before < b_share else "C"
+        acc += values[i]
+    return classes
+
+
+_cache: OrderedDict[tuple, AbcReport] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class AbcReportService:
+    """Curva ABC e produtos parados a partir dos resumos diários."""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.rollups = RollupModel(db)
+
+    def report(self, start_iso: str | None = None, end_iso: str | None = None,
+               params: AbcParams | None = None, today: date | None = None, refresh: bool = True) -> AbcReport:
+        """Linhas em ordem de receita. `refresh` soma antes o que é novo (incremental)."""
+        params = params or AbcParams()
+        params.validate()
+        started = time.perf_counter()
+        if refresh and not self.db.read_only:
+            self.rollups.refresh()
+        today = today or datetime.utcnow().date()
+        with closing(self.db._connect()) as conn:
+            row = conn.execute("SELECT version FROM change_counters WHERE table_name = 'products';").fetchone()
+            version = (rollup_version(conn, MOVEMENTS_STATE), rollup_version(conn, SALES_STATE),
+                       int(row[0]) if row else -1)
+            key = (self.db.db_path, version, start_iso, end_iso, params, today)
+            with _cache_lock:
+                hit = _cache.get(key)
+                if hit is not None:
+                    _cache.move_to_end(key)
+                    return replace(hit, cached=True, seconds=time.perf_counter() - started)
+            where, args = _period_where("day", start_iso, end_iso)
+            data = conn.execute(_ABC_SQL.format(where=where), args).fetchall()
+
+        report = self._build(data, params, today)
+        report.start, report.end, report.version = start_iso, end_iso, version
+        report.seconds = time.perf_counter() - started
+        with _cache_lock:
+            _cache[key] = report
+            if len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        return report
+
+    @staticmethod
+    def _build(data: list, params: AbcParams, today: date) -> AbcReport:
+        data.sort(key=lambda r: (-r[8], r[0]))  # receita desc, id
+        revenue = [float(r[8]) for r in data]
+        units = [int(r[7]) for r in data]
+        by_revenue = classify(revenue, params.a_share, params.b_share)
+        by_units = classify(units, params.a_share, params.b_share)
+        cutoff = (today - timedelta(days=params.slow_days)).isoformat()
+        report = AbcReport(total_revenue=round(sum(revenue), 2), total_units=sum(units),
+                           classes={"A": 0, "B": 0, "C": 0})
+        total = report.total_revenue or 1.0
+        acc = 0.0
+        for rank, (r, rev_class, units_class) in enumerate(zip(data, by_revenue, by_units), start=1):
+            pid, sku, name, category, stock, cost, created_at, qty, rev, last_out, last_sale = r
+            acc += float(rev)
+            last = max((d for d in (last_out, last_sale) if d), default=None)
+            idle = (today - date.fromisoformat(last)).days if last else None
+            # Sem nenhuma saída: parado se já existia antes do corte
+            slow = last < cutoff if last else (created_at or "") < cutoff
+            stock_value = round(int(stock) * float(cost), 2)
+            report.rows.append(AbcRow(
+                rank=rank, product_id=pid, sku=sku, name=name, category=category, revenue=round(float(rev), 2),
+                revenue_share=float(rev) / total, cumulative_share=acc / total, revenue_class=rev_class,
+                units=int(qty), units_class=units_class, last_movement=last, idle_days=idle, slow=slow,
+                stock_qty=int(stock), stock_value=stock_value,
+            ))
+            report.classes[rev_class] += 1
+            if slow:
+                report.slow += 1
+                report.slow_value += stock_value
+        report.slow_value = round(report.slow_value, 2)
+        return report
+
+    def export(self, file_path: str | Path, start_iso: str | None = None, end_iso: str | None = None,
+               params: AbcParams | None = None) -> int:
+        return self.export_result(self.report(start_iso, end_iso, params), file_path)
+
+    @staticmethod
+    def export_result(report: AbcReport, file_path: str | Path) -> int:
+        return export_csv(
+            file_path,
+            ("Posição", "SKU", "Produto", "Categoria", "Receita", "% Receita", "% Acumulado", "Classe (receita)",
+             "Unidades", "Classe (unidades)", "Última saída", "Dias sem saída", "Parado", "Estoque",
+             "Valor em estoque"),
+            ((r.rank, r.sku, r.name, r.category or "", br_number(r.revenue), br_number(r.revenue_share * 100),
+              br_number(r.cumulative_share * 100), r.revenue_class, r.units, r.units_class,
+              date.fromisoformat(r.last_movement).strftime("%d/%m/%Y") if r.last_movement else "",
+              "" if r.idle_days is None else r.idle_days, "Sim" if r.slow else "", r.stock_qty,
+              br_number(r.stock_value))
+             for r in report.rows),
+        )
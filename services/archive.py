@@ -0,0 +1,301 @@
+"""
+Módulo: services/archive.py
+
+Visão geral
+    Arquivamento quente/frio. Vendas, pedidos fechados e movimentações de
+    estoque antigos saem do `estoque.db` ("quente") para arquivos por ano em
+    `data/archive/estoque_<ano>.db` ("frio"). O dia a dia (telas, caixas)
+    só toca o arquivo pequeno; índices e VACUUM ficam rápidos.
+
+O que é movido (datas anteriores ao corte, ex.: 12 meses)
+    - orders ENVIADO/CANCELADO + order_items
+    - sales + sale_items
+    - stock_movements — o saldo movido é somado em `stock_baselines`
+      (estoque esperado = baseline + movimentações quentes); antes de mover,
+      `movement_daily` (models/rollup_model.py) é atualizado
+
+Como
+    - Um ano por vez: ATTACH do arquivo do ano; tabelas criadas com
+      `CREATE TABLE ... AS SELECT * ... WHERE 0` (mesmas colunas, sem
+      chaves estrangeiras) + índice único em id.
+    - Lotes de `batch_size` registros em duas transações: a cópia para o
+      frio (INSERT OR REPLACE) é confirmada primeiro; depois uma transação
+      IMMEDIATE apaga do quente só o que já está no frio. Um COMMIT entre
+      arquivos anexados não é atômico em WAL; assim uma queda nunca perde
+      linhas — no máximo deixa o lote nos dois lados, e rodar de novo conclui.
+
+Leitura
+    `period_connection(db, archive, início, fim)` abre uma conexão com as
+    views temporárias `all_sales`, `all_sale_items` e `all_orders`
+    (UNION ALL do quente com os anos arquivados do período). Os relatórios
+    usam essas views; quem não passa um período antigo não abre arquivo frio.
+
+Uso
+    python -m services archive --months 12 [--batch 500] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Iterator
+
+from db import Database
+from models.rollup_model import RollupModel
+from utils.time import now_iso
+
+CLOSED_ORDER_STATUSES = ("ENVIADO", "CANCELADO")
+REPORT_TABLES = ("sales", "sale_items", "orders")
+MAX_ATTACHED_YEARS = 9  # SQLite anexa no máximo 10 bancos por conexão (padrão)
+
+# (tabela, coluna de data, filtro extra, filhos [(tabela, chave)])
+# O último pedido/venda de cada prefixo fica no quente: `utils.ids` continua a
+# numeração a partir dele.
+_PLANS: tuple[tuple[str, str, str, tuple[tuple[str, str], ...]], ...] = (
+    ("orders", "created_at",
+     f"status IN {CLOSED_ORDER_STATUSES!r} AND id NOT IN"
+     " (SELECT MAX(id) FROM main.orders GROUP BY substr(order_number, 1, length(order_number) - 7))",
+     (("order_items", "order_id"),)),
+    ("sales", "datetime",
+     "id NOT IN (SELECT MAX(id) FROM main.sales GROUP BY substr(sale_number, 1, 3))",
+     (("sale_items", "sale_id"),)),
+    ("stock_movements", "created_at", "", ()),
+)
+
+
+@dataclass
+class ArchiveResult:
+    cutoff: str
+    moved: dict[str, int] = field(default_factory=dict)
+    years: list[int] = field(default_factory=list)
+    batches: int = 0
+    elapsed: float = 0.0
+    dry_run: bool = False
+
+
+def months_ago(months: int, today: date | None = None) -> date:
+    """Primeiro dia do mês, `months` meses antes do mês atual."""
+    today = today or date.today()
+    index = today.year * 12 + (today.month - 1) - int(months)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> list[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table});")]
+
+
+class ArchiveService:
+    """Move períodos fechados para arquivos por ano e os anexa para leitura."""
+
+    def __init__(self, db: Database, archive_dir: str | Path | None = None) -> None:
+        self.db = db
+        live = Path(db.db_path)
+        self.archive_dir = Path(archive_dir) if archive_dir else live.resolve().parent / "archive"
+        self.stem = live.stem
+
+    # ----------------------------- Arquivos ------------------------------
+    def path_for(self, year: int) -> Path:
+        return self.archive_dir / f"{self.stem}_{int(year)}.db"
+
+    def years(self) -> list[int]:
+        """Anos com arquivo frio, em ordem."""
+        if not self.archive_dir.is_dir():
+            return []
+        pattern = re.compile(rf"^{re.escape(self.stem)}_(\d{{4}})\.db$")
+        found = (pattern.match(p.name) for p in self.archive_dir.iterdir())
+        return sorted(int(m.group(1)) for m in found if m)
+
+    # ---------------------------- Arquivamento ---------------------------
+    def archive(self, months: int = 12, batch_size: int = 500, dry_run: bool = False,
+                today: date | None = None) -> ArchiveResult:
+        """Move o que é anterior a `months` meses atrás (início do mês) para o frio."""
+        cutoff = months_ago(months, today).isoformat()
+        result = ArchiveResult(cutoff=cutoff, dry_run=dry_run)
+        started = time.perf_counter()
+        if not dry_run:
+            # O resumo diário precisa ver as movimentações antes que saiam do quente
+            RollupModel(self.db).refresh()
+        with closing(self.db._connect()) as conn:
+            for table, date_col, extra, children in _PLANS:
+                where = f"{date_col} < ?" + (f" AND {extra}" if extra else "")
+                years = [int(r[0]) for r in conn.execute(
+                    f"SELECT DISTINCT substr({date_col}, 1, 4) FROM main.{table} WHERE {where};", (cutoff,))
+                    if r[0] and r[0].isdigit()]
+                for year in years:
+                    # Fim do ano ou o corte, o que vier antes
+                    upper = min(cutoff, f"{year + 1}-01-01")
+                    scope = (f"{date_col} >= ? AND {date_col} < ?" + (f" AND {extra}" if extra else ""),
+                             (f"{year}-01-01", upper))
+                    if dry_run:
+                        self._count(conn, table, scope, children, result)
+                    else:
+                        self._move_year(conn, year, table, scope, children, batch_size, result)
+                    if year not in result.years:
+                        result.years.append(year)
+        result.years.sort()
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _count(self, conn: sqlite3.Connection, table: str, scope: tuple[str, tuple],
+               children: tuple[tuple[str, str], ...], result: ArchiveResult) -> None:
+        where, params = scope
+        n = int(conn.execute(f"SELECT COUNT(*) FROM main.{table} WHERE {where};", params).fetchone()[0])
+        result.moved[table] = result.moved.get(table, 0) + n
+        for child, key in children:
+            n = int(conn.execute(
+                f"SELECT COUNT(*) FROM main.{child} WHERE {key} IN (SELECT id FROM main.{table} WHERE {where});",
+                params).fetchone()[0])
+            result.moved[child] = result.moved.get(child, 0) + n
+
+    def _move_year(self, conn: sqlite3.Connection, year: int, table: str, scope: tuple[str, tuple],
+                   children: tuple[tuple[str, str], ...], batch_size: int, result: ArchiveResult) -> None:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS arch;", (str(self.path_for(year)),))
+        try:
+            for t in (table, *(c for c, _ in children)):
+                self._ensure_table(conn, t)
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _archive_ids (id INTEGER PRIMARY KEY);")
+            where, params = scope
+            while True:
+                # 1) Copia o lote para o frio e confirma (transação só do arquivo anexado)
+                conn.execute("BEGIN;")
+                try:
+                    conn.execute("DELETE FROM temp._archive_ids;")
+                    n = conn.execute(
+                        f"INSERT INTO temp._archive_ids (id) SELECT id FROM main.{table} WHERE {where}"
+                        " ORDER BY id LIMIT ?;", (*params, int(batch_size)),
+                    ).rowcount
+                    if n <= 0:
+                        conn.rollback()
+                        break
+                    for t, key in ((table, "id"), *children):
+                        self._copy_rows(conn, t, key)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                # 2) Só então apaga do quente o que já está no frio
+                conn.execute("BEGIN IMMEDIATE;")
+                try:
+                    conn.execute(f"DELETE FROM temp._archive_ids WHERE id NOT IN (SELECT id FROM arch.{table});")
+                    if table == "stock_movements":
+                        self._fold_baselines(conn)
+                    for child, key in children:
+                        moved = self._delete_rows(conn, child, key)
+                        result.moved[child] = result.moved.get(child, 0) + moved
+                    moved = self._delete_rows(conn, table, "id")
+                    result.moved[table] = result.moved.get(table, 0) + moved
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                result.batches += 1
+                if moved <= 0:
+                    break
+        finally:
+            conn.execute("DETACH DATABASE arch;")
+
+    @staticmethod
+    def _ensure_table(conn: sqlite3.Connection, table: str) -> None:
+        """Tabela fria com as colunas da quente (sem FKs); colunas novas são acrescentadas."""
+        hot = _columns(conn, "main", table)
+        cold = _columns(conn, "arch", table)
+        if not cold:
+            conn.execute(f"CREATE TABLE arch.{table} AS SELECT * FROM main.{table} WHERE 0;")
+        else:
+            for col in hot:
+                if col not in cold:
+                    conn.execute(f"ALTER TABLE arch.{table} ADD COLUMN {col};")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS arch.ux_{table}_id ON {table}(id);")
+
+    @staticmethod
+    def _copy_rows(conn: sqlite3.Connection, table: str, key: str) -> None:
+        cols = ", ".join(_columns(conn, "main", table))
+        conn.execute(
+            f"INSERT OR REPLACE INTO arch.{table} ({cols}) SELECT {cols} FROM main.{table}"
+            f" WHERE {key} IN (SELECT id FROM temp._archive_ids);"
+        )
+
+    @staticmethod
+    def _delete_rows(conn: sqlite3.Connection, table: str, key: str) -> int:
+        """Apaga do quente as linhas do lote que já têm cópia no frio."""
+        return conn.execute(
+            f"DELETE FROM main.{table} WHERE {key} IN (SELECT id FROM temp._archive_ids)"
+            f" AND id IN (SELECT id FROM arch.{table});"
+        ).rowcount
+
+    @staticmethod
+    def _fold_baselines(conn: sqlite3.Connection) -> None:
+        """Soma as movimentações do lote no saldo consolidado por produto."""
+        # Produto antigo sem baseline: parte do estoque atual menos todo o ledger
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO main.stock_baselines (product_id, qty, through_movement_id, updated_at)
+            SELECT p.id, p.stock_qty - COALESCE(
+                       (SELECT SUM(m.change) FROM main.stock_movements m WHERE m.product_id = p.id), 0), 0, ?
+              FROM main.products p
+             WHERE p.id IN (SELECT product_id FROM main.stock_movements
+                             WHERE id IN (SELECT id FROM temp._archive_ids));
+            """,
+            (now_iso(),),
+        )
+        conn.execute(
+            """
+            INSERT INTO main.stock_baselines (product_id, qty, through_movement_id, updated_at)
+            SELECT product_id, SUM(change), MAX(id), ? FROM main.stock_movements
+            WHERE id IN (SELECT id FROM temp._archive_ids) GROUP BY product_id
+            ON CONFLICT(product_id) DO UPDATE SET
+                qty = qty + excluded.qty,
+                through_movement_id = MAX(through_movement_id, excluded.through_movement_id),
+                updated_at = excluded.updated_at;
+            """,
+            (now_iso(),),
+        )
+
+    # ------------------------------ Leitura ------------------------------
+    def years_for(self, start_iso: str | None, end_iso: str | None) -> list[int]:
+        """Anos arquivados que podem ter dados do período."""
+        lo = int(start_iso[:4]) if start_iso else None
+        hi = int(end_iso[:4]) if end_iso else None
+        return [y for y in self.years() if (lo is None or y >= lo) and (hi is None or y <= hi)]
+
+
+@contextmanager
+def period_connection(db: Database, archive: ArchiveService | None, start_iso: str | None = None,
+                      end_iso: str | None = None) -> Iterator[sqlite3.Connection]:
+    """Conexão com as views `all_<tabela>` (quente + anos arquivados do período).
+
+    Sem `archive` (ou sem anos no período), as views cobrem só o quente. Tudo
+    é desfeito na saída — a conexão pode voltar a um pool.
+    """
+    years = archive.years_for(start_iso, end_iso) if archive is not None else []
+    if len(years) > MAX_ATTACHED_YEARS:
+        raise ValueError(f"Período abrange {len(years)} anos arquivados; limite {MAX_ATTACHED_YEARS} por consulta")
+    with closing(db._connect()) as conn:
+        schemas: list[str] = []
+        try:
+            for y in years:
+                conn.execute(f"ATTACH DATABASE ? AS arch_{y};", (str(archive.path_for(y)),))  # type: ignore[union-attr]
+                schemas.append(f"arch_{y}")
+            for table in REPORT_TABLES:
+                cols = _columns(conn, "main", table)
+                parts = [f"SELECT {', '.join(cols)} FROM main.{table}"]
+                for schema in schemas:
+                    cold = set(_columns(conn, schema, table))
+                    if cold:
+                        sel = ", ".join(c if c in cold else f"NULL AS {c}" for c in cols)
+                        parts.append(f"SELECT {sel} FROM {schema}.{table}")
+                conn.execute(f"CREATE TEMP VIEW all_{table} AS {' UNION ALL '.join(parts)};")
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            for table in REPORT_TABLES:
+                conn.execute(f"DROP VIEW IF EXISTS temp.all_{table};")
+            for schema in schemas:
+                conn.execute(f"DETACH DATABASE {schema};")
@@ -0,0 +1,164 @@
+"""
+Módulo: services/basket.py
+
+Visão geral
+    "Comprados juntos": sugestões de complemento para o caixa e reconstrução
+    em lote do índice de pares (`models.basket_model`). No dia a dia o índice
+    é mantido venda a venda; a reconstrução serve para a carga inicial, para
+    podar pares raros (`min_count`) ou depois de importar vendas por fora.
+
+Reconstrução
+    1. Lê (sale_id, product_id) dos anos arquivados e do banco quente até a
+       maior venda M, em ordem de venda, e conta os pares num dict esparso.
+    2. Grava numa tabela nova (`product_pairs_new` + índice) em transações
+       curtas de WRITE_BATCH linhas.
+    3. Numa transação IMMEDIATE final: conta as vendas > M (que chegaram
+       durante a reconstrução), soma na tabela nova e troca as tabelas.
+    Os caixas só esperam pelo passo 3. Não rode junto com `archive`.
+
+Uso
+    python -m services pairs [--min-count 2]
+    python -m services pairs --sku ABC123      # parceiros de um SKU
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from db import STREAM_BATCH, Database, fetch_batches
+from models.basket_model import PairIndex, count_pairs, iter_baskets, pair_index, pair_rows
+from models.product_model import Product, ProductModel
+from services.archive import ArchiveService
+
+STAGING_TABLE = "product_pairs_new"
+WRITE_BATCH = 50_000  # linhas por transação ao gravar a tabela nova
+
+
+@dataclass
+class PairsRebuildResult:
+    sales: int = 0        # vendas lidas (inclui as de um item só)
+    pairs: int = 0        # pares distintos gravados (um sentido)
+    late_sales: int = 0   # vendas que chegaram durante a reconstrução
+    seconds: float = 0.0
+
+
+class BasketService:
+    """Complementos para a cesta do caixa e manutenção de `product_pairs`."""
+
+    def __init__(self, db: Database, archive: ArchiveService | None = None) -> None:
+        self.db = db
+        self.archive = archive
+        self.products = ProductModel(db)
+
+    @property
+    def index(self) -> PairIndex:
+        return pair_index(self.db)
+
+    def add_ons(self, product_ids: Iterable[int], limit: int = 8) -> list[Product]:
+        """Produtos mais vendidos junto com a cesta, com estoque, do mais forte ao mais fraco."""
+        ranked = self.index.also_bought(product_ids, limit=limit * 2)  # folga para os sem estoque
+        if not ranked:
+            return []
+        by_id = {p.id: p for p in self.products.iter_search(ids=[pid for pid, _ in ranked])}
+        found = [by_id[pid] for pid, _ in ranked if pid in by_id and by_id[pid].stock_qty > 0]
+        return found[:limit]
+
+    def partners(self, product_id: int) -> list[tuple[Product, int]]:
+        """(produto, vendas em comum) dos parceiros de um produto."""
+        top = self.index.top(product_id)
+        by_id = {p.id: p for p in self.products.iter_search(ids=[pid for pid, _ in top])}
+        return [(by_id[pid], n) for pid, n in top if pid in by_id]
+
+    # --------------------------- Reconstrução ---------------------------
+    def rebuild(self, min_count: int = 1) -> PairsRebuildResult:
+        started = time.perf_counter()
+        res = PairsRebuildResult()
+        counts: dict[int, int] = {}
+        for year in (self.archive.years() if self.archive is not None else []):
+            res.sales += self._count_file(self.archive.path_for(year), counts)
+        with closing(self.db._connect()) as conn:
+            conn.execute("BEGIN;")  # M e os itens até M do mesmo instante
+            try:
+                last_sale = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM sales;").fetchone()[0])
+                res.sales += _count_rows(conn.execute(
+                    "SELECT sale_id, product_id FROM sale_items WHERE sale_id <= ? ORDER BY sale_id;",
+                    (last_sale,)), counts)
+            finally:
+                conn.rollback()
+        res.pairs = sum(1 for n in counts.values() if n >= min_count)
+        self._stage(counts, min_count)
+        del counts
+
+        def swap(conn: sqlite3.Connection) -> int:
+            late: dict[int, int] = {}
+            n = _count_rows(conn.execute(
+                "SELECT sale_id, product_id FROM sale_items WHERE sale_id > ? ORDER BY sale_id;", (last_sale,)), late)
+            conn.executemany(
+                f"""
+                INSERT INTO {STAGING_TABLE} (product_id, other_id, baskets) VALUES (?, ?, ?)
+                ON CONFLICT(product_id, other_id) DO UPDATE SET baskets = baskets + excluded.baskets;
+                """,
+                pair_rows(late),
+            )
+            conn.execute("DROP TABLE product_pairs;")
+            conn.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO product_pairs;")
+            return n
+
+        res.late_sales = self.db.run_in_transaction(swap)
+        self.index.invalidate()
+        res.seconds = time.perf_counter() - started
+        return res
+
+    def _stage(self, counts: dict[int, int], min_count: int) -> None:
+        """Tabela nova com os pares contados, gravada em transações curtas."""
+        with closing(self.db._connect()) as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE};")
+            conn.execute(
+                f"""
+                CREATE TABLE {STAGING_TABLE} (
+                    product_id INTEGER NOT NULL,
+                    other_id INTEGER NOT NULL,
+                    baskets INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, other_id)
+                ) WITHOUT ROWID;
+                """
+            )
+            rows = pair_rows(counts, min_count)
+            while chunk := list(islice(rows, WRITE_BATCH)):
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO {STAGING_TABLE} (product_id, other_id, baskets) VALUES (?, ?, ?);", chunk)
+            # O índice vai junto na troca; o nome muda a cada reconstrução
+            conn.execute(f"CREATE INDEX idx_pairs_rank_{int(time.time())} "
+                         f"ON {STAGING_TABLE}(product_id, baskets DESC, other_id);")
+            conn.commit()
+
+    @staticmethod
+    def _count_file(path: Path, counts: dict[int, int]) -> int:
+        uri = Path(path).resolve().as_uri() + "?mode=ro"
+        with closing(sqlite3.connect(uri, uri=True)) as conn:
+            try:
+                cur = conn.execute("SELECT sale_id, product_id FROM sale_items ORDER BY sale_id;")
+            except sqlite3.OperationalError:  # ano arquivado sem vendas
+                return 0
+            return _count_rows(cur, counts)
+
+
+def _count_rows(cur: sqlite3.Cursor, counts: dict[int, int]) -> int:
+    """Conta os pares das vendas do cursor; devolve quantas vendas leu."""
+    sales = 0
+
+    def baskets() -> Iterator[list[int]]:
+        nonlocal sales
+        for basket in iter_baskets((r[0], r[1]) for r in fetch_batches(cur, STREAM_BATCH)):
+            sales += 1
+            yield basket
+
+    count_pairs(baskets(), counts)
+    return sales
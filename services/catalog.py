@@ -0,0 +1,64 @@
+"""
+Módulo: services/catalog.py
+
+Visão geral
+    Catálogo e estoque sem Tkinter: busca, importação/exportação de produtos,
+    reajuste de preços, ajustes de estoque em lote e recebimento de compras.
+    Apenas compõe os models; as regras continuam em `models/*`.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable
+
+from db import Database
+from models.bulk_model import BulkModel, RepriceResult, StockAdjustResult
+from models.product_import import ImportResult, ProductImporter
+from models.product_model import Product, ProductModel
+from models.purchase_model import PurchaseModel, ReceiptResult
+from utils.exports import export_csv
+
+PRODUCT_CSV_HEADERS = ("ID", "SKU", "Nome", "Categoria", "Custo", "Venda", "Estoque", "Min")
+
+
+class CatalogService:
+    """Fachada de produtos para telas e linha de comando."""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.products = ProductModel(db)
+
+    def search(self, sku: str = "", name: str = "", category: str = "", group_code: str = "",
+               limit: int | None = None) -> list[Product]:
+        return self.products.search(sku, name, category, group_code, limit=limit)
+
+    def import_file(self, file_path: str | Path, update_existing: bool = True,
+                    dry_run: bool = False) -> ImportResult:
+        return ProductImporter(self.db).import_file(file_path, update_existing=update_existing, dry_run=dry_run)
+
+    def export_csv(self, file_path: str | Path, sku: str = "", name: str = "", category: str = "") -> int:
+        """Exporta os produtos filtrados (mesmo layout do botão "Exportar CSV")."""
+        produtos = self.products.iter_search(sku, name, category, order="name")
+        return export_csv(
+            file_path,
+            PRODUCT_CSV_HEADERS,
+            ((p.id, p.sku, p.name, p.category or "", f"{p.cost_price:.2f}", f"{p.sale_price:.2f}", p.stock_qty, p.min_stock)
+             for p in produtos),
+        )
+
+    def reprice(self, mode: str, value: float, **filters) -> RepriceResult:
+        """Ver `BulkModel.reprice` (category, group_code, sku_prefix, all_products, dry_run)."""
+        return BulkModel(self.db).reprice(mode, value, **filters)
+
+    def adjust_stock_many(self, deltas: Iterable[tuple[str, int]], reason: str = "Ajuste em lote",
+                          dry_run: bool = False) -> StockAdjustResult:
+        return BulkModel(self.db).adjust_stock_many(deltas, reason=reason, dry_run=dry_run)
+
+    def receive_file(self, file_path: str | Path, update_cost: bool = True) -> tuple[ReceiptResult, list[tuple[int, str]]]:
+        """Lê `sku;qtd;custo` e lança o recebimento. Retorna (resultado, erros do arquivo)."""
+        model = PurchaseModel(self.db)
+        lines, file_errors = model.load_receipt_file(file_path)
+        if not lines:
+            return ReceiptResult(), file_errors
+        return model.receive(lines, update_cost=update_cost), file_errors
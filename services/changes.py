@@ -0,0 +1,184 @@
+"""
+Módulo: services/changes.py
+
+Visão geral
+    Aviso de alterações entre processos para as telas abertas. Os triggers de
+    `db.py` gravam cada linha alterada em `change_log` e incrementam a versão
+    da tabela em `change_counters`; o `ChangeFeed` descobre o que mudou sem
+    recarregar nada:
+
+    1. `PRAGMA data_version` (conexão própria, só leitura): muda quando QUALQUER
+       outra conexão — deste ou de outro processo — faz COMMIT. Custa
+       microssegundos; se não mudou, nada mais é lido.
+    2. `change_counters`: quais tabelas mudaram.
+    3. `change_log`: ids das linhas alteradas, só das tabelas com assinantes.
+
+Uso
+    feed = feed_for(db)
+    cancel = feed.subscribe(("orders",), lambda table, ids: ...)
+    feed.dispatch()   # chamado periodicamente (ex.: `views.lazy.watch_changes`)
+
+    `ids` é um conjunto de ids alterados/inseridos/excluídos, ou None quando o
+    leitor ficou para trás da poda do change_log ou quando mudaram mais de
+    MAX_CHANGED_IDS linhas da tabela (recarregue tudo). A leitura para no
+    primeiro id além do limite: um reajuste de 200 mil produtos não monta
+    um conjunto de 200 mil ids na thread do Tk.
+
+Poda
+    Além da poda na abertura do banco, o feed poda change_log a cada
+    PRUNE_INTERVAL segundos (mantém CHANGE_LOG_KEEP entradas), numa thread
+    e conexão próprias — a conexão do feed nunca escreve.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import closing
+from typing import Callable, Iterable
+
+from db import Database, prune_change_log
+
+logger = logging.getLogger(__name__)
+
+ChangeCallback = Callable[[str, "set[int] | None"], None]
+
+MAX_CHANGED_IDS = 200  # acima disso a tabela vem como None (as telas recarregam a lista)
+PRUNE_INTERVAL = 300.0  # segundos entre podas do change_log
+
+
+class ChangeFeed:
+    """Leitor de `change_log` com assinaturas por tabela."""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self._conn: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+        self._versions: dict[str, int] = {}
+        self._last_id = 0
+        self._subs: dict[int, tuple[frozenset[str], ChangeCallback]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()  # a abertura do banco acabou de podar
+        self._pruning = False
+
+    # ------------------------------ API -------------------------------
+    def subscribe(self, tables: Iterable[str], callback: ChangeCallback) -> Callable[[], None]:
+        """Registra `callback(tabela, ids)`; devolve a função que cancela a assinatura."""
+        key = next(self._ids)
+        with self._lock:
+            self._connection()  # marco zero: alterações a partir de agora
+            self._subs[key] = (frozenset(tables), callback)
+        return lambda: self._subs.pop(key, None)
+
+    def poll(self) -> dict[str, set[int] | None]:
+        """Alterações desde a última chamada, por tabela assinada ({} se nada mudou)."""
+        with self._lock:
+            conn = self._connection()
+            version = int(conn.execute("PRAGMA data_version;").fetchone()[0])
+            if version == self._data_version:
+                return {}
+            self._data_version = version
+            wanted = set().union(*(tables for tables, _ in self._subs.values()))
+            conn.execute("BEGIN;")  # leitura consistente de contadores + log
+            try:
+                versions = {r[0]: int(r[1]) for r in conn.execute("SELECT table_name, version FROM change_counters;")}
+                changed = [t for t, v in versions.items() if v != self._versions.get(t)]
+                self._versions = versions
+                if not changed:
+                    return {}
+                first, last = conn.execute("SELECT MIN(id), MAX(id) FROM change_log;").fetchone()
+                last = int(last or 0)
+                gap = first is not None and int(first) > self._last_id + 1
+                result: dict[str, set[int] | None] = {}
+                tables = [t for t in changed if t in wanted]
+                if gap:
+                    result = {t: None for t in tables}
+                elif tables and last > self._last_id:
+                    for table in tables:
+                        # LIMIT: para de ler assim que passar do limite
+                        cur = conn.execute(
+                            "SELECT DISTINCT row_id FROM change_log WHERE id > ? AND id <= ? AND table_name = ?"
+                            " LIMIT ?;",
+                            (self._last_id, last, table, MAX_CHANGED_IDS + 1),
+                        )
+                        ids = {int(r[0]) for r in cur}
+                        if ids:
+                            result[table] = ids if len(ids) <= MAX_CHANGED_IDS else None
+                self._last_id = last
+                return result
+            finally:
+                conn.rollback()
+
+    def dispatch(self) -> int:
+        """`poll` + entrega aos assinantes. Retorna quantas tabelas mudaram."""
+        self._maybe_prune()
+        try:
+            changes = self.poll()
+        except sqlite3.Error as e:  # arquivo ocupado/indisponível: tenta na próxima
+            logger.debug("Falha ao ler change_log: %s", e)
+            return 0
+        if not changes:
+            return 0
+        for tables, callback in list(self._subs.values()):
+            for table, ids in changes.items():
+                if table not in tables:
+                    continue
+                try:
+                    callback(table, None if ids is None else set(ids))
+                except Exception:  # um assinante com erro não afeta os demais
+                    logger.exception("Falha no assinante de %s", table)
+        return len(changes)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------------------------- Interno -----------------------------
+    def _maybe_prune(self) -> None:
+        if self._pruning or self.db.read_only or time.monotonic() - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruning = True
+        self._pruned_at = time.monotonic()
+        threading.Thread(target=self._prune, name="change-log-prune", daemon=True).start()
+
+    def _prune(self) -> None:
+        # Fora da thread do Tk: o DELETE pode esperar pelo lock de escrita
+        try:
+            with closing(self.db._connect()) as conn, conn:
+                n = prune_change_log(conn)
+            if n:
+                logger.debug("change_log: %d entradas podadas", n)
+        except sqlite3.Error as e:
+            logger.debug("Falha ao podar change_log: %s", e)
+        finally:
+            self._pruning = False
+
+    def _connection(self) -> sqlite3.Connection:
+        # Conexão dedicada e que nunca escreve: data_version só reflete
+        # COMMITs de outras conexões, que é justamente o que interessa
+        if self._conn is None:
+            self._conn = self.db._connect()
+            self._conn.isolation_level = None  # BEGIN/ROLLBACK explícitos
+            self._data_version = int(self._conn.execute("PRAGMA data_version;").fetchone()[0])
+            self._versions = {r[0]: int(r[1]) for r in self._conn.execute(
+                "SELECT table_name, version FROM change_counters;")}
+            self._last_id = int(self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM change_log;").fetchone()[0])
+        return self._conn
+
+
+_feeds: "weakref.WeakKeyDictionary[Database, ChangeFeed]" = weakref.WeakKeyDictionary()
+
+
+def feed_for(db: Database) -> ChangeFeed:
+    """Um `ChangeFeed` por `Database` (todas as telas compartilham a conexão)."""
+    feed = _feeds.get(db)
+    if feed is None:
+        feed = _feeds[db] = ChangeFeed(db)
+    return feed
@@ -0,0 +1,239 @@
+"""
+Módulo: services/maintenance.py
+
+Visão geral
+    Manutenção do arquivo SQLite, com tempo medido em cada passo:
+
+    - check:      `PRAGMA quick_check` (ou `integrity_check` com full=True)
+    - stats:      páginas, páginas livres (freelist), WAL e tamanho por
+                  tabela/índice (`dbstat`, quando o SQLite tem a extensão)
+    - optimize:   `PRAGMA optimize` (barato; atualiza só estatísticas velhas)
+                  ou `ANALYZE` completo
+    - vacuum:     `PRAGMA incremental_vacuum(N)` — devolve páginas livres ao
+                  disco sem reescrever o banco (exige auto_vacuum=INCREMENTAL)
+    - checkpoint: `PRAGMA wal_checkpoint(PASSIVE|FULL|RESTART|TRUNCATE)`
+
+Bancos novos já nascem com auto_vacuum=INCREMENTAL (`db.py`). Um banco antigo
+precisa de um VACUUM completo uma vez (`enable_incremental_vacuum`), que
+reescreve o arquivo inteiro — só com a loja fechada.
+
+Janela fora do expediente
+    `MaintenanceWindow("22:00-06:00")` diz se agora está na janela e quanto
+    falta para abrir. A linha de comando recusa rodar fora dela (ou espera,
+    com --wait). Todos os passos usam o busy timeout normal: se um caixa
+    estiver gravando, esperam em vez de falhar.
+
+Uso
+    python -m services maintain check stats optimize vacuum checkpoint --window 22:00-06:00
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from typing import Any, Callable
+
+from db import Database
+
+MODES = ("check", "stats", "optimize", "vacuum", "checkpoint")
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+_AUTO_VACUUM = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+
+@dataclass
+class StepResult:
+    name: str
+    seconds: float = 0.0
+    ok: bool = True
+    detail: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ObjectSize:
+    name: str
+    table: str          # tabela dona (igual a `name` para tabelas)
+    kind: str           # "table" | "index"
+    pages: int
+    bytes: int
+    unused: int         # bytes livres dentro das páginas
+
+
+class MaintenanceWindow:
+    """Janela diária "HH:MM-HH:MM" (pode virar a meia-noite, ex.: 22:00-06:00)."""
+
+    def __init__(self, spec: str) -> None:
+        try:
+            a, b = spec.split("-")
+            self.start = dtime.fromisoformat(a.strip())
+            self.end = dtime.fromisoformat(b.strip())
+        except ValueError:
+            raise ValueError(f"Janela inválida: {spec!r} (use HH:MM-HH:MM)") from None
+        self.spec = spec
+
+    def contains(self, now: datetime | None = None) -> bool:
+        t = (now or datetime.now()).time()
+        if self.start <= self.end:
+            return self.start <= t < self.end
+        return t >= self.start or t < self.end
+
+    def seconds_until_open(self, now: datetime | None = None) -> float:
+        """0 se já está na janela; senão, segundos até o próximo início."""
+        now = now or datetime.now()
+        if self.contains(now):
+            return 0.0
+        start = datetime.combine(now.date(), self.start)
+        if start <= now:
+            start += timedelta(days=1)
+        return (start - now).total_seconds()
+
+
+class Maintenance:
+    """Passos de manutenção sobre um `Database`; cada um devolve `StepResult`."""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    # ---------------------------- Execução ------------------------------
+    def run(self, modes: list[str], full_check: bool = False, analyze: bool = False,
+            vacuum_pages: int | None = None, checkpoint_mode: str = "PASSIVE",
+            on_step: Callable[[StepResult], None] | None = None) -> list[StepResult]:
+        """Roda `modes` na ordem de `MODES`; um passo com erro não impede os seguintes."""
+        steps = {
+            "check": lambda: self.check(full=full_check),
+            "stats": self.stats,
+            "optimize": lambda: self.optimize(analyze=analyze),
+            "vacuum": lambda: self.incremental_vacuum(vacuum_pages),
+            "checkpoint": lambda: self.checkpoint(checkpoint_mode),
+        }
+        results: list[StepResult] = []
+        for mode in MODES:
+            if mode not in modes:
+                continue
+            started = time.perf_counter()
+            try:
+                res = steps[mode]()
+            except sqlite3.Error as e:
+                res = StepResult(mode, ok=False, detail={"error": str(e)})
+            res.seconds = time.perf_counter() - started
+            results.append(res)
+            if on_step is not None:
+                on_step(res)
+        return results
+
+    # ----------------------------- Passos -------------------------------
+    def check(self, full: bool = False, max_errors: int = 100) -> StepResult:
+        """`quick_check` (O(N), sem conferir índices x tabelas) ou `integrity_check`."""
+        pragma = "integrity_check" if full else "quick_check"
+        with closing(self.db._connect()) as conn:
+            rows = [r[0] for r in conn.execute(f"PRAGMA {pragma}({int(max_errors)});")]
+            fk = conn.execute("PRAGMA foreign_key_check;").fetchmany(max_errors)
+        problems = [r for r in rows if r != "ok"]
+        detail: dict[str, Any] = {"pragma": pragma, "problems": problems}
+        if fk:
+            detail["foreign_key_violations"] = [
+                {"table": r[0], "rowid": r[1], "parent": r[2]} for r in fk
+            ]
+        return StepResult("check", ok=not problems and not fk, detail=detail)
+
+    def stats(self) -> StepResult:
+        with closing(self.db._connect()) as conn:
+            page_size = int(conn.execute("PRAGMA page_size;").fetchone()[0])
+            page_count = int(conn.execute("PRAGMA page_count;").fetchone()[0])
+            freelist = int(conn.execute("PRAGMA freelist_count;").fetchone()[0])
+            auto_vacuum = int(conn.execute("PRAGMA auto_vacuum;").fetchone()[0])
+            journal = str(conn.execute("PRAGMA journal_mode;").fetchone()[0])
+            objects = self._object_sizes(conn)
+        wal = f"{self.db.db_path}-wal"
+        detail = {
+            "page_size": page_size,
+            "page_count": page_count,
+            "file_bytes": page_size * page_count,
+            "freelist_pages": freelist,
+            "free_bytes": page_size * freelist,
+            "free_percent": round(100.0 * freelist / page_count, 1) if page_count else 0.0,
+            "auto_vacuum": _AUTO_VACUUM.get(auto_vacuum, str(auto_vacuum)),
+            "journal_mode": journal,
+            "wal_bytes": os.path.getsize(wal) if os.path.exists(wal) else 0,
+            "objects": objects,  # None sem dbstat
+        }
+        return StepResult("stats", detail=detail)
+
+    def optimize(self, analyze: bool = False) -> StepResult:
+        """`PRAGMA optimize` (padrão) ou `ANALYZE` completo."""
+        with closing(self.db._connect()) as conn:
+            if analyze:
+                conn.execute("ANALYZE;")
+            else:
+                # Limita a amostra por índice: o optimize fica em milissegundos
+                # mesmo com tabelas grandes
+                conn.execute("PRAGMA analysis_limit = 1000;")
+                conn.execute("PRAGMA optimize;")
+            conn.commit()
+            stat1 = int(conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1';").fetchone()[0])
+            rows = int(conn.execute("SELECT COUNT(*) FROM sqlite_stat1;").fetchone()[0]) if stat1 else 0
+        return StepResult("optimize", detail={"mode": "ANALYZE" if analyze else "optimize", "stat1_rows": rows})
+
+    def incremental_vacuum(self, max_pages: int | None = None) -> StepResult:
+        """Devolve até `max_pages` páginas livres (todas se None) ao sistema de arquivos."""
+        with closing(self.db._connect()) as conn:
+            mode = int(conn.execute("PRAGMA auto_vacuum;").fetchone()[0])
+            before = int(conn.execute("PRAGMA freelist_count;").fetchone()[0])
+            if mode != 2:
+                return StepResult("vacuum", ok=False, detail={
+                    "auto_vacuum": _AUTO_VACUUM.get(mode, str(mode)), "freelist_pages": before,
+                    "error": "auto_vacuum não é INCREMENTAL (rode enable_incremental_vacuum fora do expediente)",
+                })
+            arg = "" if max_pages is None else f"({int(max_pages)})"
+            # O pragma devolve uma linha por página; é preciso consumir tudo
+            conn.execute(f"PRAGMA incremental_vacuum{arg};").fetchall()
+            conn.commit()
+            after = int(conn.execute("PRAGMA freelist_count;").fetchone()[0])
+        return StepResult("vacuum", detail={"freed_pages": before - after, "freelist_pages": after})
+
+    def enable_incremental_vacuum(self) -> StepResult:
+        """Liga auto_vacuum=INCREMENTAL num banco existente (VACUUM completo: reescreve tudo)."""
+        started = time.perf_counter()
+        with closing(self.db._connect()) as conn:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            conn.execute("VACUUM;")
+            mode = int(conn.execute("PRAGMA auto_vacuum;").fetchone()[0])
+        return StepResult("enable_incremental_vacuum", time.perf_counter() - started, ok=mode == 2,
+                          detail={"auto_vacuum": _AUTO_VACUUM.get(mode, str(mode))})
+
+    def checkpoint(self, mode: str = "PASSIVE") -> StepResult:
+        """Copia o WAL para o banco; TRUNCATE também zera o arquivo -wal."""
+        mode = mode.upper()
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Modo de checkpoint inválido: {mode} (use {', '.join(CHECKPOINT_MODES)})")
+        with closing(self.db._connect()) as conn:
+            journal = str(conn.execute("PRAGMA journal_mode;").fetchone()[0]).lower()
+            if journal != "wal":
+                return StepResult("checkpoint", detail={"journal_mode": journal, "skipped": True})
+            busy, log, done = conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
+        # busy=1: algum leitor/escritor impediu completar (normal em PASSIVE com a loja aberta)
+        return StepResult("checkpoint", ok=not busy, detail={
+            "mode": mode, "busy": bool(busy), "wal_frames": int(log), "checkpointed_frames": int(done),
+        })
+
+    # ---------------------------- Interno -------------------------------
+    @staticmethod
+    def _object_sizes(conn: sqlite3.Connection) -> list[ObjectSize] | None:
+        """Tamanho por tabela/índice via `dbstat`; None se a extensão não existe."""
+        try:
+            rows = conn.execute(
+                """
+                SELECT s.name, COALESCE(m.tbl_name, s.name), COALESCE(m.type, 'table'),
+                       COUNT(*), SUM(s.pgsize), SUM(s.unused)
+                FROM dbstat s LEFT JOIN sqlite_master m ON m.name = s.name
+                GROUP BY s.name ORDER BY SUM(s.pgsize) DESC;
+                """
+            ).fetchall()
+        except sqlite3.OperationalError:  # SQLite compilado sem SQLITE_ENABLE_DBSTAT_VTAB
+            return None
+        return [ObjectSize(r[0], r[1], r[2], int(r[3]), int(r[4]), int(r[5])) for r in rows]
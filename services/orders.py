@@ -0,0 +1,93 @@
+"""
+Módulo: services/orders.py
+
+Visão geral
+    Operações de pedido usadas pela tela de Pedidos e pela linha de comando.
+    A regra "avançar" fica aqui (e não na tela): pedido PREPARADO é enviado
+    com `ship` (baixa de estoque); os demais avançam com `advance_status`.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Callable, Iterable, TypeVar
+
+from db import Database
+from models.order_model import OrderModel, OrderRecord
+from services.writer import WriteQueue
+
+T = TypeVar("T")
+
+
+@dataclass
+class AdvanceResult:
+    order_id: int
+    status: str     # novo status
+    shipped: bool   # True quando houve baixa de estoque (ship)
+
+
+class OrderService:
+    """Listagem, detalhes e transições de status de pedidos."""
+
+    def __init__(self, db: Database, writer: WriteQueue | None = None) -> None:
+        self.db = db
+        self.writer = writer
+        self.model = OrderModel(db)
+
+    def _write(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        """Transação própria, ou o próximo lote da fila de escrita se houver."""
+        if self.writer is None:
+            return self.db.run_in_transaction(work)
+        return self.writer.run(work)
+
+    def list(self, status: str | None = None, search: str | None = None,
+             ids: Iterable[int] | None = None) -> list[OrderRecord]:
+        return self.model.list(status=status, search=search, with_item_counts=True, ids=ids)
+
+    def details(self, order_id: int) -> tuple[dict, list[dict]] | None:
+        """(cabeçalho, itens) do pedido; None se não existir."""
+        with closing(self.db._connect()) as conn:
+            o = conn.execute("SELECT * FROM orders WHERE id=?;", (order_id,)).fetchone()
+            if not o:
+                return None
+            cur = conn.execute(
+                "SELECT sku, name, qty, unit_price, discount_percent, discount_value, subtotal_net"
+                " FROM order_items WHERE order_id=? ORDER BY id;",
+                (order_id,),
+            )
+            return dict(o), [dict(r) for r in cur.fetchall()]
+
+    def status_of(self, order_id: int) -> str:
+        with closing(self.db._connect()) as conn:
+            row = conn.execute("SELECT status FROM orders WHERE id=?;", (order_id,)).fetchone()
+        if not row:
+            raise ValueError("Pedido inexistente")
+        return row[0]
+
+    def advance(self, order_id: int) -> AdvanceResult:
+        """Avança uma fase: PREPARADO -> ENVIADO via `ship`; demais via `advance_status`.
+
+        Status lido e transição gravada na mesma transação.
+        """
+        def work(conn: sqlite3.Connection) -> AdvanceResult:
+            row = conn.execute("SELECT status FROM orders WHERE id=?;", (order_id,)).fetchone()
+            if row and row[0] == "PREPARADO":
+                self.model._ship(conn, order_id)
+                return AdvanceResult(order_id, "ENVIADO", True)
+            return AdvanceResult(order_id, self.model._advance_status(conn, order_id), False)
+
+        return self._write(work)
+
+    def ship(self, order_id: int) -> None:
+        self._write(lambda conn: self.model._ship(conn, order_id))
+
+    def cancel(self, order_id: int) -> None:
+        self._write(lambda conn: self.model._cancel(conn, order_id))
+
+    def prepared_ids(self) -> list[int]:
+        """Pedidos prontos para envio, do mais antigo ao mais novo."""
+        with closing(self.db._connect()) as conn:
+            cur = conn.execute("SELECT id FROM orders WHERE status = 'PREPARADO' ORDER BY created_at, id;")
+            return [int(r[0]) for r in cur.fetchall()]
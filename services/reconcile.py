@@ -0,0 +1,223 @@
+"""
+Módulo: services/reconcile.py
+
+Visão geral
+    Conciliação do estoque com o ledger: para cada produto, o estoque
+    esperado é
+
+        stock_baselines.qty + SUM(stock_movements.change WHERE id > through_movement_id)
+
+    e é comparado com `products.stock_qty`. O baseline nasce com o estoque
+    inicial do produto (trigger em `db.py`) e acumula o que foi arquivado
+    (`services.archive`). Produtos antigos, de antes dos baselines, são
+    contados como "sem baseline" até rodar `seed_baselines`.
+
+Paralelismo
+    - Os produtos são divididos em faixas de id com o mesmo número de
+      produtos (`shard_size`); cada faixa é uma tarefa de um ProcessPool.
+    - Cada processo abre a própria conexão `mode=ro` + `query_only`: nenhum
+      worker grava nem pega lock de escrita.
+    - Cada faixa é lida numa transação curta (produtos e movimentações do
+      mesmo instante). A soma usa só o índice (product_id, id, change).
+
+Para não disputar o arquivo com os caixas
+    Com journal DELETE/TRUNCATE, um leitor segura o COMMIT dos caixas pelo
+    tempo da faixa. Use `--snapshot` (lê a cópia de `services.snapshot`) ou
+    WAL; faixas pequenas mantêm cada leitura em milissegundos.
+
+Uso
+    python -m services reconcile [--workers 4] [--snapshot] [--out divergencias.csv]
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from db import Database
+from utils.exports import export_csv
+from utils.time import now_iso
+
+DEFAULT_SHARD_SIZE = 2000  # produtos por tarefa
+
+
+@dataclass
+class Mismatch:
+    product_id: int
+    sku: str
+    name: str
+    stock_qty: int
+    expected: int
+    baseline: int
+    movements: int      # soma das movimentações após o baseline
+
+    @property
+    def diff(self) -> int:
+        return self.stock_qty - self.expected
+
+
+@dataclass
+class ShardResult:
+    first_id: int
+    last_id: int
+    checked: int = 0
+    unchecked: int = 0   # produtos sem baseline
+    movements: int = 0   # linhas de movimentação somadas
+    mismatches: list[Mismatch] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+@dataclass
+class ReconcileResult:
+    checked: int = 0
+    unchecked: int = 0
+    movements: int = 0
+    shards: int = 0
+    workers: int = 0
+    elapsed: float = 0.0
+    mismatches: list[Mismatch] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+
+# ------------------------------ Worker -------------------------------
+_conn: sqlite3.Connection | None = None
+
+# Por produto: uma busca no índice (product_id, id, change) a partir do baseline
+_SHARD_SQL = """
+SELECT p.id, p.sku, p.name, p.stock_qty, b.qty, COALESCE(SUM(m.change), 0), COUNT(m.id)
+  FROM products p
+  LEFT JOIN stock_baselines b ON b.product_id = p.id
+  LEFT JOIN stock_movements m ON m.product_id = p.id AND m.id > COALESCE(b.through_movement_id, 0)
+ WHERE p.id BETWEEN ? AND ?
+ GROUP BY p.id;
+"""
+
+
+def _open_readonly(db_path: str) -> sqlite3.Connection:
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=30.0)
+    conn.execute("PRAGMA query_only = ON;")
+    return conn
+
+
+def _init_worker(db_path: str) -> None:
+    global _conn
+    _conn = _open_readonly(db_path)
+
+
+def _check_shard(bounds: tuple[int, int]) -> ShardResult:
+    """Roda num processo do pool (ou no principal, com workers=1)."""
+    first, last = bounds
+    started = time.perf_counter()
+    res = ShardResult(first, last)
+    conn = _conn
+    assert conn is not None, "_init_worker não foi chamado"
+    conn.execute("BEGIN;")  # produtos e movimentações do mesmo instante
+    try:
+        rows = conn.execute(_SHARD_SQL, (first, last)).fetchall()
+    finally:
+        conn.rollback()
+    for pid, sku, name, stock, base, total, n in rows:
+        res.movements += int(n)
+        if base is None:
+            res.unchecked += 1
+            continue
+        res.checked += 1
+        expected = int(base) + int(total)
+        if expected != int(stock):
+            res.mismatches.append(Mismatch(int(pid), sku, name, int(stock), expected, int(base), int(total)))
+    res.seconds = time.perf_counter() - started
+    return res
+
+
+# ----------------------------- Serviço -------------------------------
+class StockReconciler:
+    """Confere `products.stock_qty` contra baseline + movimentações, em paralelo."""
+
+    def __init__(self, db: Database, shard_size: int = DEFAULT_SHARD_SIZE) -> None:
+        self.db = db
+        self.shard_size = max(1, int(shard_size))
+
+    def shards(self, db_path: str | None = None) -> list[tuple[int, int]]:
+        """Faixas [primeiro, último] de ids com até `shard_size` produtos cada."""
+        with closing(_open_readonly(db_path or self.db.db_path)) as conn:
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS rn FROM products)"
+                " WHERE (rn - 1) % ? = 0 ORDER BY id;", (self.shard_size,))]
+            top = conn.execute("SELECT MAX(id) FROM products;").fetchone()[0]
+        if not ids:
+            return []
+        ends = [b - 1 for b in ids[1:]] + [int(top)]
+        return list(zip(ids, ends))
+
+    def run(self, workers: int | None = None, db_path: str | None = None) -> ReconcileResult:
+        """Confere todos os produtos; `db_path` permite ler uma cópia (snapshot)."""
+        path = db_path or self.db.db_path
+        workers = max(1, int(workers or os.cpu_count() or 1))
+        started = time.perf_counter()
+        bounds = self.shards(path)
+        result = ReconcileResult(shards=len(bounds), workers=workers)
+        if workers == 1 or len(bounds) <= 1:
+            _init_worker(path)
+            try:
+                parts = [_check_shard(b) for b in bounds]
+            finally:
+                _close_worker()
+            result.workers = 1
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(path,)) as pool:
+                parts = list(pool.map(_check_shard, bounds))
+        for part in parts:
+            result.checked += part.checked
+            result.unchecked += part.unchecked
+            result.movements += part.movements
+            result.mismatches.extend(part.mismatches)
+        result.mismatches.sort(key=lambda m: m.product_id)
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def seed_baselines(self) -> int:
+        """Cria baseline para produtos que não têm, aceitando o estoque atual como correto.
+
+        qty = estoque atual - todas as movimentações, through_movement_id = 0;
+        a partir daí qualquer divergência nova aparece na conciliação.
+        """
+        def work(conn: sqlite3.Connection) -> int:
+            return conn.execute(
+                """
+                INSERT INTO stock_baselines (product_id, qty, through_movement_id, updated_at)
+                SELECT p.id, p.stock_qty - COALESCE(
+                           (SELECT SUM(m.change) FROM stock_movements m WHERE m.product_id = p.id), 0),
+                       0, ?
+                  FROM products p
+                 WHERE NOT EXISTS (SELECT 1 FROM stock_baselines b WHERE b.product_id = p.id);
+                """,
+                (now_iso(),),
+            ).rowcount
+
+        return self.db.run_in_transaction(work)
+
+    @staticmethod
+    def export(result: ReconcileResult, file_path: str | Path) -> int:
+        export_csv(
+            file_path,
+            ("ID", "SKU", "Produto", "Estoque", "Esperado", "Diferença", "Baseline", "Movimentações"),
+            ((m.product_id, m.sku, m.name, m.stock_qty, m.expected, m.diff, m.baseline, m.movements)
+             for m in result.mismatches),
+        )
+        return len(result.mismatches)
+
+
+def _close_worker() -> None:
+    global _conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
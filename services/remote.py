@@ -0,0 +1,171 @@
+"""
+Módulo: services/remote.py
+
+Visão geral
+    Cliente do `services.server`: mesma interface de `Backend.sales` e
+    `Backend.orders`, mas falando HTTP/JSON com o servidor em vez de abrir o
+    arquivo SQLite. As telas de Vendas e Pedidos usam `get_backend(db)`, que
+    escolhe o remoto quando `STOCK_API_URL` está definida
+    (ex.: `STOCK_API_URL=http://192.168.0.10:8765`).
+
+Erros
+    Respostas 4xx/409 viram `ValueError` com a mensagem do servidor — as telas
+    continuam mostrando o mesmo messagebox de antes.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import threading
+from datetime import datetime
+from decimal import Decimal
+from urllib.parse import urlencode, urlsplit
+
+from db import Database
+from models.product_model import Product
+from models.promotions import Promotion, PromotionBook
+from models.sale_model import SaleItemInput
+from services import Backend
+from services.orders import AdvanceResult
+
+API_URL_ENV = "STOCK_API_URL"
+
+
+class RemoteError(RuntimeError):
+    """Falha de transporte ou erro interno do servidor (5xx)."""
+
+
+class ApiClient:
+    """HTTP/1.1 keep-alive com uma conexão por thread (as telas usam threads)."""
+
+    def __init__(self, base_url: str, timeout: float = 10.0) -> None:
+        u = urlsplit(base_url)
+        if u.scheme != "http" or not u.hostname:
+            raise ValueError(f"URL da API inválida: {base_url}")
+        self.host, self.port = u.hostname, u.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method: str, path: str, params: dict | None = None, body: dict | None = None):
+        if params:
+            path += "?" + urlencode({k: v for k, v in params.items() if v not in (None, "")})
+        data = json.dumps(body, default=str).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        # GET reconecta uma vez se o keep-alive caiu; POST nunca é repetido
+        # (a venda pode ter sido gravada antes da queda da conexão)
+        attempts = 2 if method == "GET" else 1
+        for attempt in range(1, attempts + 1):
+            conn = self._conn()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                payload = json.loads(resp.read() or b"null")
+                break
+            except (ConnectionError, http.client.HTTPException, OSError) as e:
+                conn.close()
+                self._local.conn = None
+                if attempt == attempts:
+                    raise RemoteError(f"Servidor indisponível ({self.host}:{self.port}): {e}") from e
+        if resp.status >= 500:
+            raise RemoteError((payload or {}).get("error", f"HTTP {resp.status}"))
+        if resp.status >= 400:
+            raise ValueError((payload or {}).get("error", f"HTTP {resp.status}"))
+        return payload
+
+
+class RemoteSaleService:
+    def __init__(self, api: ApiClient) -> None:
+        self.api = api
+
+    def suggest(self, q: str) -> list[Product]:
+        return [Product(**p) for p in self.api.request("GET", "/products/suggest", {"q": q})]
+
+    def find_by_sku(self, sku: str) -> Product | None:
+        try:
+            return Product(**self.api.request("GET", "/products/by-sku", {"sku": sku}))
+        except ValueError:
+            return None
+
+    def add_ons(self, product_ids: list[int], limit: int = 8) -> list[Product]:
+        if not product_ids:
+            return []
+        ids = ",".join(str(int(p)) for p in product_ids)
+        return [Product(**p) for p in self.api.request("GET", "/products/add-ons", {"ids": ids, "limit": limit})]
+
+    def promotions(self) -> PromotionBook:
+        return PromotionBook.compile(self.list_promotions(active_only=True))
+
+    def list_promotions(self, active_only: bool = False) -> list[Promotion]:
+        rows = self.api.request("GET", "/promotions", {"active": 1 if active_only else None})
+        return [Promotion(**p) for p in rows]
+
+    def create_sale(self, items: list[SaleItemInput], **kwargs) -> int:
+        body = {
+            "items": [
+                {"product_id": it.product_id, "sku": it.sku, "name": it.name, "qty": it.qty,
+                 "unit_price": str(it.unit_price), "discount_percent": str(it.discount_percent)}
+                for it in items
+            ],
+            **{k: (str(v) if isinstance(v, Decimal) else v.isoformat() if isinstance(v, datetime) else v)
+               for k, v in kwargs.items()},
+        }
+        return int(self.api.request("POST", "/sales", body=body)["sale_id"])
+
+
+class RemoteOrderService:
+    def __init__(self, api: ApiClient) -> None:
+        self.api = api
+
+    def list(self, status: str | None = None, search: str | None = None) -> list[dict]:
+        return self.api.request("GET", "/orders", {"status": status, "search": search})
+
+    def details(self, order_id: int) -> tuple[dict, list[dict]] | None:
+        try:
+            data = self.api.request("GET", f"/orders/{int(order_id)}")
+        except ValueError:
+            return None
+        return data["order"], data["items"]
+
+    def advance(self, order_id: int) -> AdvanceResult:
+        return AdvanceResult(**self.api.request("POST", f"/orders/{int(order_id)}/advance"))
+
+    def ship(self, order_id: int) -> None:
+        self.api.request("POST", f"/orders/{int(order_id)}/ship")
+
+    def cancel(self, order_id: int) -> None:
+        self.api.request("POST", f"/orders/{int(order_id)}/cancel")
+
+
+class RemoteBackend:
+    """Equivalente remoto de `services.Backend` (vendas e pedidos)."""
+
+    def __init__(self, base_url: str) -> None:
+        self.api = ApiClient(base_url)
+        self.sales = RemoteSaleService(self.api)
+        self.orders = RemoteOrderService(self.api)
+
+
+_remote: RemoteBackend | None = None
+
+
+def using_remote() -> bool:
+    """True quando as telas falam com o servidor (`STOCK_API_URL` definida)."""
+    return bool(os.environ.get(API_URL_ENV, "").strip())
+
+
+def get_backend(db: Database):
+    """`RemoteBackend` se `STOCK_API_URL` estiver definida; senão `Backend(db)` local."""
+    global _remote
+    if not using_remote():
+        return Backend(db)
+    if _remote is None:
+        _remote = RemoteBackend(os.environ[API_URL_ENV].strip())
+    return _remote
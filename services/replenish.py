@@ -0,0 +1,246 @@
+"""
+Módulo: services/replenish.py
+
+Visão geral
+    Reposição calculada a partir do livro-razão, em vez do `min_stock`
+    digitado: para cada produto, venda por dia, cobertura em dias, ponto de
+    pedido e quantidade sugerida de compra. A demanda são as saídas por envio
+    de pedido (ORDER_SHIP), somadas por dia em `movement_daily`
+    (models/rollup_model.py) — caixa e pedidos da loja passam por ali.
+
+Cálculo (por produto; janela longa W e curta S em dias completos, UTC)
+    v      = saídas na janela / W           venda média por dia
+    v_rec  = saídas na janela curta / S     tendência recente
+    taxa   = max(v, v_rec)                  não subestima um produto que acelerou
+    sigma  = desvio padrão diário na janela (dias sem venda contam como zero)
+    segurança = z(nível de serviço) · sigma · √prazo
+    ponto de pedido = ⌈taxa · prazo + segurança⌉, nunca abaixo do `min_stock`
+    estoque alvo    = ⌈taxa · (prazo + revisão) + segurança⌉
+    cobertura       = estoque / taxa
+    sugerido        = alvo − (estoque + em compra), quando estoque + em
+                      compra <= ponto de pedido ("em compra" = pedidos de
+                      compra ABERTO/PARCIAL ainda não recebidos)
+
+NumPy
+    Com NumPy instalado, as contas rodam sobre vetores (um por coluna, todos
+    os produtos de uma vez); sem ele, o mesmo cálculo roda em Python puro,
+    na mesma ordem de operações — os dois caminhos dão o mesmo resultado.
+
+Uso
+    python -m services replenish [--window 28] [--lead 7] [--review 7] [--service 0.95] [--out compra.csv]
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from statistics import NormalDist
+
+from db import STREAM_BATCH, Database, fetch_batches
+from models.rollup_model import RollupModel, RollupResult
+from utils.exports import export_csv
+from utils.formatting import br_number
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sem NumPy o cálculo roda em Python puro
+    np = None
+
+ENGINES = ("numpy", "python")
+_EPS = 1e-9  # ⌈x⌉ sem arredondar 14,000000000002 para 15
+
+_DEMAND_SQL = """
+SELECT p.id, p.sku, p.name, p.stock_qty, COALESCE(p.min_stock, 0),
+       COALESCE(o.open_qty, 0), COALESCE(d.total, 0), COALESCE(d.sumsq, 0), COALESCE(d.recent, 0)
+  FROM products p
+  LEFT JOIN (SELECT product_id, SUM(out_qty) AS total, SUM(out_qty * out_qty) AS sumsq,
+                    SUM(CASE WHEN day >= ? THEN out_qty ELSE 0 END) AS recent
+               FROM movement_daily
+              WHERE day >= ? AND day < ?
+              GROUP BY product_id) d ON d.product_id = p.id
+  LEFT JOIN (SELECT i.product_id, SUM(MAX(i.qty_ordered - i.qty_received, 0)) AS open_qty
+               FROM purchase_order_items i JOIN purchase_orders po ON po.id = i.po_id
+              WHERE po.status IN ('ABERTO', 'PARCIAL')
+              GROUP BY i.product_id) o ON o.product_id = p.id
+ ORDER BY p.id;
+"""
+
+
+@dataclass
+class ReplenishParams:
+    window_days: int = 28       # janela longa (média e desvio)
+    short_days: int = 7         # janela curta (tendência)
+    lead_days: float = 7.0      # prazo do fornecedor
+    review_days: float = 7.0    # intervalo entre compras
+    service_level: float = 0.95
+
+    def validate(self) -> None:
+        if self.window_days < 1 or not 1 <= self.short_days <= self.window_days:
+            raise ValueError("Janelas inválidas: use 1 <= curta <= longa (dias).")
+        if self.lead_days < 0 or self.review_days < 0:
+            raise ValueError("Prazo e revisão não podem ser negativos.")
+        if not 0.5 <= self.service_level < 1:
+            raise ValueError("Nível de serviço deve estar entre 0,5 e 1 (ex.: 0,95).")
+
+    @property
+    def z(self) -> float:
+        return NormalDist().inv_cdf(self.service_level)
+
+
+@dataclass
+class ReplenishRow:
+    product_id: int
+    sku: str
+    name: str
+    stock_qty: int
+    on_order: int
+    velocity: float             # venda/dia na janela longa
+    recent_velocity: float      # venda/dia na janela curta
+    cover_days: float | None    # None: sem venda na janela
+    reorder_point: int
+    target: int
+    suggested: int
+
+
+@dataclass
+class ReplenishResult:
+    rows: list[ReplenishRow] = field(default_factory=list)
+    products: int = 0
+    to_order: int = 0           # produtos com sugestão de compra
+    engine: str = ""
+    window_start: str = ""
+    window_end: str = ""        # exclusivo
+    rollup: RollupResult | None = None
+    seconds: float = 0.0
+
+
+class _Columns:
+    """Uma lista por coluna de `_DEMAND_SQL` (entrada dos dois cálculos)."""
+
+    __slots__ = ("ids", "skus", "names", "stock", "min_stock", "on_order", "total", "sumsq", "recent")
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, [])
+
+    def load(self, rows) -> "_Columns":
+        cols = [getattr(self, name) for name in self.__slots__]
+        for r in rows:
+            for col, value in zip(cols, r):
+                col.append(value)
+        return self
+
+
+def _compute_numpy(c: _Columns, p: ReplenishParams) -> dict:
+    f = np.float64
+    total, sumsq, recent = (np.asarray(x, dtype=f) for x in (c.total, c.sumsq, c.recent))
+    stock = np.asarray(c.stock, dtype=np.int64)
+    position = stock + np.asarray(c.on_order, dtype=np.int64)
+    v = total / p.window_days
+    v_rec = recent / p.short_days
+    rate = np.maximum(v, v_rec)
+    sigma = np.sqrt(np.maximum(sumsq / p.window_days - v * v, 0.0))
+    safety = p.z * sigma * math.sqrt(p.lead_days)
+    rop = np.maximum(np.ceil(rate * p.lead_days + safety - _EPS).astype(np.int64),
+                     np.asarray(c.min_stock, dtype=np.int64))
+    target = np.maximum(np.ceil(rate * (p.lead_days + p.review_days) + safety - _EPS).astype(np.int64), rop)
+    suggested = np.where(position <= rop, np.maximum(target - position, 0), 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cover = np.where(rate > 0, stock / rate, np.inf)
+    return {"v": v.tolist(), "v_rec": v_rec.tolist(), "cover": cover.tolist(),
+            "rop": rop.tolist(), "target": target.tolist(), "suggested": suggested.tolist()}
+
+
+def _compute_python(c: _Columns, p: ReplenishParams) -> dict:
+    z, sqrt_lead, horizon = p.z, math.sqrt(p.lead_days), p.lead_days + p.review_days
+    out = {k: [] for k in ("v", "v_rec", "cover", "rop", "target", "suggested")}
+    for total, sumsq, recent, stock, on_order, min_stock in zip(
+            c.total, c.sumsq, c.recent, c.stock, c.on_order, c.min_stock):
+        v = float(total) / p.window_days
+        v_rec = float(recent) / p.short_days
+        rate = max(v, v_rec)
+        sigma = math.sqrt(max(float(sumsq) / p.window_days - v * v, 0.0))
+        safety = z * sigma * sqrt_lead
+        rop = max(math.ceil(rate * p.lead_days + safety - _EPS), min_stock)
+        target = max(math.ceil(rate * horizon + safety - _EPS), rop)
+        position = stock + on_order
+        out["v"].append(v)
+        out["v_rec"].append(v_rec)
+        out["cover"].append(stock / rate if rate > 0 else math.inf)
+        out["rop"].append(rop)
+        out["target"].append(target)
+        out["suggested"].append(max(target - position, 0) if position <= rop else 0)
+    return out
+
+
+class ReplenishmentService:
+    """Sugestão de compra por produto a partir de `movement_daily`."""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.rollups = RollupModel(db)
+
+    def plan(self, params: ReplenishParams | None = None, only_to_order: bool = True,
+             today: date | None = None, refresh: bool = True, engine: str | None = None) -> ReplenishResult:
+        """Calcula a reposição; por padrão só os produtos com compra sugerida.
+
+        Linhas em ordem de cobertura (quem acaba primeiro no topo). `refresh`
+        soma antes as movimentações novas (incremental; ignorado em banco
+        somente leitura, como a cópia de relatórios).
+        """
+        params = params or ReplenishParams()
+        params.validate()
+        engine = engine or ("numpy" if np is not None else "python")
+        if engine not in ENGINES or (engine == "numpy" and np is None):
+            raise ValueError(f"Cálculo indisponível: {engine}")
+        started = time.perf_counter()
+        res = ReplenishResult(engine=engine)
+        if refresh and not self.db.read_only:
+            res.rollup = self.rollups.refresh()
+
+        end = today or datetime.utcnow().date()
+        res.window_start = (end - timedelta(days=params.window_days)).isoformat()
+        res.window_end = end.isoformat()
+        recent_start = (end - timedelta(days=params.short_days)).isoformat()
+        with closing(self.db._connect()) as conn:
+            cur = conn.execute(_DEMAND_SQL, (recent_start, res.window_start, res.window_end))
+            cols = _Columns().load(fetch_batches(cur, STREAM_BATCH))
+
+        out = (_compute_numpy if engine == "numpy" else _compute_python)(cols, params)
+        suggested, cover = out["suggested"], out["cover"]
+        res.products = len(cols.ids)
+        res.to_order = sum(1 for s in suggested if s > 0)
+        picked = [i for i, s in enumerate(suggested) if s > 0 or not only_to_order]
+        picked.sort(key=lambda i: (cover[i], cols.ids[i]))
+        res.rows = [
+            ReplenishRow(
+                product_id=cols.ids[i], sku=cols.skus[i], name=cols.names[i], stock_qty=cols.stock[i],
+                on_order=cols.on_order[i], velocity=out["v"][i], recent_velocity=out["v_rec"][i],
+                cover_days=cover[i] if math.isfinite(cover[i]) else None,
+                reorder_point=out["rop"][i], target=out["target"][i], suggested=suggested[i],
+            )
+            for i in picked
+        ]
+        res.seconds = time.perf_counter() - started
+        return res
+
+    def export(self, file_path: str | Path, params: ReplenishParams | None = None,
+               only_to_order: bool = True) -> int:
+        result = self.plan(params, only_to_order=only_to_order)
+        return self.export_result(result, file_path)
+
+    @staticmethod
+    def export_result(result: ReplenishResult, file_path: str | Path) -> int:
+        return export_csv(
+            file_path,
+            ("ID", "SKU", "Produto", "Estoque", "Em compra", "Venda/dia", "Venda/dia recente",
+             "Cobertura (dias)", "Ponto de pedido", "Estoque alvo", "Sugerido"),
+            ((r.product_id, r.sku, r.name, r.stock_qty, r.on_order, br_number(r.velocity),
+              br_number(r.recent_velocity), "" if r.cover_days is None else br_number(r.cover_days),
+              r.reorder_point, r.target, r.suggested)
+             for r in result.rows),
+        )
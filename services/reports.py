@@ -0,0 +1,202 @@
+"""
+Módulo: services/reports.py
+
+Visão geral
+    Consultas de relatório (resumo de vendas por período, produtos em falta)
+    e exportações CSV, sem nenhuma dependência de Tkinter. Usado pela aba
+    Relatórios e pela linha de comando (`python -m services report/export`).
+
+Período
+    Datas de entrada são ISO (`aaaa-mm-dd`); o fim é inclusivo (até 23:59:59).
+    `parse_date` aceita também `dd/mm/aaaa` e `quick_range` converte os
+    intervalos rápidos da tela ("Hoje", "Este mês", ...) em (início, fim).
+
+Arquivo frio
+    Com `archive` (services.archive), vendas e pedidos são lidos das views
+    `all_*`, que juntam o banco quente aos anos arquivados do período — só os
+    arquivos desses anos são anexados.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import AbstractContextManager, closing
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+
+from db import STREAM_BATCH, Database, fetch_batches
+from services.archive import ArchiveService, period_connection
+from utils.exports import export_csv
+from utils.formatting import br_number, fmt_datetime_br
+
+QUICK_RANGES = ("Hoje", "Ontem", "Últimos 7 dias", "Esta semana", "Este mês", "Mês passado")
+
+
+@dataclass
+class SalesSummary:
+    count: int = 0
+    gross: float = 0.0
+    discount: float = 0.0
+    net: float = 0.0
+
+
+# ----------------------------- Período -----------------------------
+def parse_date(value: str | None) -> str | None:
+    """Converte `dd/mm/aaaa` ou `aaaa-mm-dd` em ISO; vazio/inválido -> None."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        if "/" in value:
+            dd, mm, yy = value.split("/")
+            return date(int(yy), int(mm), int(dd)).isoformat()
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
+def _month_end(start: date) -> date:
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1, day=1) - timedelta(days=1)
+    return start.replace(month=start.month + 1, day=1) - timedelta(days=1)
+
+
+def quick_range(label: str, today: date | None = None) -> tuple[date, date] | None:
+    """(início, fim) de um intervalo rápido; None para "Personalizado"/desconhecido."""
+    today = today or date.today()
+    if label == "Hoje":
+        return today, today
+    if label == "Ontem":
+        d = today - timedelta(days=1)
+        return d, d
+    if label == "Últimos 7 dias":
+        return today - timedelta(days=6), today
+    if label == "Esta semana":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if label == "Este mês":
+        start = today.replace(day=1)
+        return start, _month_end(start)
+    if label == "Mês passado":
+        if today.month == 1:
+            start = today.replace(year=today.year - 1, month=12, day=1)
+        else:
+            start = today.replace(month=today.month - 1, day=1)
+        return start, _month_end(start)
+    return None
+
+
+def _period_where(column: str, start_iso: str | None, end_iso: str | None) -> tuple[str, list[str]]:
+    where: list[str] = []
+    params: list[str] = []
+    if start_iso:
+        where.append(f"{column} >= ?")
+        params.append(start_iso)
+    if end_iso:
+        where.append(f"{column} <= ?")
+        params.append(end_iso + "T23:59:59")
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+
+# ---------------------------- Relatórios ----------------------------
+class ReportService:
+    """Resumo, produtos em falta e exportações CSV (formato brasileiro)."""
+
+    def __init__(self, db: Database, archive: ArchiveService | None = None) -> None:
+        self.db = db
+        self.archive = archive
+
+    def _period(self, start_iso: str | None, end_iso: str | None) -> AbstractContextManager[sqlite3.Connection]:
+        """Conexão com as views `all_sales`/`all_sale_items`/`all_orders` do período."""
+        return period_connection(self.db, self.archive, start_iso, end_iso)
+
+    def sales_summary(self, start_iso: str | None = None, end_iso: str | None = None) -> SalesSummary:
+        where, params = _period_where("datetime", start_iso, end_iso)
+        sql = (
+            "SELECT COUNT(*), COALESCE(SUM(total_gross),0), COALESCE(SUM(total_discount),0),"
+            " COALESCE(SUM(total_net),0) FROM all_sales" + where
+        )
+        with self._period(start_iso, end_iso) as conn:
+            n, gross, disc, net = conn.execute(sql, params).fetchone()
+        return SalesSummary(int(n), float(gross), float(disc), float(net))
+
+    def missing_products(self) -> list[dict]:
+        """Produtos abaixo do estoque mínimo, por nome."""
+        with closing(self.db._connect()) as conn:
+            cur = conn.execute(
+                "SELECT id, sku, name, category, sale_price, stock_qty, min_stock FROM products"
+                " WHERE stock_qty < min_stock ORDER BY name;"
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    # ----------------------------- Geradores ----------------------------
+    # Linhas em blocos (memória constante). O período vira WHERE no SQL e só
+    # anexa os anos arquivados necessários; `break` fecha a conexão.
+    def iter_sales(self, start_iso: str | None = None, end_iso: str | None = None,
+                   batch_size: int = STREAM_BATCH) -> Iterator[sqlite3.Row]:
+        where, params = _period_where("datetime", start_iso, end_iso)
+        sql = ("SELECT id, sale_number, datetime, total_gross, total_discount, total_net, items_count FROM all_sales"
+               + where + " ORDER BY datetime DESC;")
+        return self._iter(sql, params, start_iso, end_iso, batch_size)
+
+    def iter_sale_items(self, start_iso: str | None = None, end_iso: str | None = None,
+                        batch_size: int = STREAM_BATCH) -> Iterator[sqlite3.Row]:
+        where, params = _period_where("s.datetime", start_iso, end_iso)
+        sql = (
+            "SELECT s.sale_number, s.datetime, i.sale_id, i.product_id, i.sku, i.name, i.qty, i.unit_price,"
+            " i.discount_percent, i.discount_value, i.subtotal_gross, i.subtotal_net"
+            " FROM all_sale_items i JOIN all_sales s ON s.id = i.sale_id" + where
+            + " ORDER BY s.datetime DESC, s.sale_number;"
+        )
+        return self._iter(sql, params, start_iso, end_iso, batch_size)
+
+    def iter_orders(self, start_iso: str | None = None, end_iso: str | None = None,
+                    batch_size: int = STREAM_BATCH) -> Iterator[sqlite3.Row]:
+        where, params = _period_where("created_at", start_iso, end_iso)
+        sql = ("SELECT id, order_number, customer_name, status, total_net, created_at, prepared_at, shipped_at"
+               " FROM all_orders" + where + " ORDER BY created_at DESC;")
+        return self._iter(sql, params, start_iso, end_iso, batch_size)
+
+    def _iter(self, sql: str, params: list[str], start_iso: str | None, end_iso: str | None,
+              batch_size: int) -> Iterator[sqlite3.Row]:
+        with self._period(start_iso, end_iso) as conn:
+            cur = conn.cursor()
+            try:
+                yield from fetch_batches(cur.execute(sql, params), batch_size)
+            finally:
+                cur.close()  # antes de desfazer as views/anexos
+
+    # ---------------------------- Exportações ---------------------------
+    def export_sales(self, file_path: str | Path, start_iso: str | None = None, end_iso: str | None = None) -> int:
+        return export_csv(
+            file_path,
+            ("ID", "Número", "Data/Hora", "Bruto", "Descontos", "Líquido", "Itens"),
+            ((r["id"], r["sale_number"], fmt_datetime_br(r["datetime"]), br_number(r["total_gross"]),
+              br_number(r["total_discount"]), br_number(r["total_net"]), r["items_count"])
+             for r in self.iter_sales(start_iso, end_iso)),
+        )
+
+    def export_items(self, file_path: str | Path, start_iso: str | None = None, end_iso: str | None = None) -> int:
+        return export_csv(
+            file_path,
+            ("Número", "Data/Hora", "SKU", "Produto", "Qtd", "Preço Unit.", "Desc.%", "Desc.R$", "Subtotal Bruto", "Subtotal Líquido"),
+            (
+                (r["sale_number"], fmt_datetime_br(r["datetime"]), r["sku"], r["name"], r["qty"],
+                 br_number(r["unit_price"]), br_number(r["discount_percent"]), br_number(r["discount_value"]),
+                 br_number(r["subtotal_gross"]), br_number(r["subtotal_net"]))
+                for r in self.iter_sale_items(start_iso, end_iso)
+            ),
+        )
+
+    def export_orders(self, file_path: str | Path, start_iso: str | None = None, end_iso: str | None = None) -> int:
+        return export_csv(
+            file_path,
+            ("ID", "Número", "Cliente", "Status", "Total", "Criado", "Preparado", "Enviado"),
+            ((r["id"], r["order_number"], r["customer_name"], r["status"], br_number(r["total_net"]),
+              fmt_datetime_br(r["created_at"]) if r["created_at"] else "",
+              fmt_datetime_br(r["prepared_at"]) if r["prepared_at"] else "",
+              fmt_datetime_br(r["shipped_at"]) if r["shipped_at"] else "")
+             for r in self.iter_orders(start_iso, end_iso)),
+        )
@@ -0,0 +1,83 @@
+"""
+Módulo: services/sales.py
+
+Visão geral
+    Venda de balcão sem Tkinter: sugestões de produto ranqueadas (as mesmas
+    da caixa de busca da tela de Vendas), complementos "comprados juntos",
+    promoções do caixa e gravação da venda.
+"""
+
+from __future__ import annotations
+
+from db import Database
+from models.product_model import Product, ProductModel
+from models.promotions import Promotion, PromotionBook, PromotionModel
+from models.sale_model import SaleItemInput, SaleModel
+from services.basket import BasketService
+from services.writer import WriteQueue
+
+
+def _suggestion_score(q: str, p: Product) -> tuple:
+    """startswith > contém > sem relação; desempate pelo nome."""
+    s = q.lower()
+
+    def part_sc(txt: str) -> tuple:
+        if not s:
+            return (2, 9999)  # menor prioridade quando sem busca
+        if txt.startswith(s):
+            return (0, len(txt))
+        if s in txt:
+            return (1, txt.find(s))
+        return (2, 9999)
+
+    parts = [part_sc(p.sku.lower()), part_sc(p.name.lower()),
+             part_sc((p.category or "").lower()), part_sc((p.group_code or "").lower())]
+    return min(parts) + (p.name.lower(),)
+
+
+class SaleService:
+    """Busca para o caixa e registro de vendas."""
+
+    def __init__(self, db: Database, writer: WriteQueue | None = None) -> None:
+        self.db = db
+        self.writer = writer
+        self.products = ProductModel(db)
+        self.model = SaleModel(db)
+        self.basket = BasketService(db)
+
+    def suggest(self, q: str) -> list[Product]:
+        """Produtos para a caixa de sugestões (até 30 com busca, 50 sem)."""
+        q = (q or "").strip()
+        # Busca ampla por SKU/nome/categoria/grupo (se vazio, lista até 50 por nome)
+        candidates = self.products.search(q, q, q, q) if q else self.products.search(limit=50)
+        ordered = sorted(candidates, key=lambda p: _suggestion_score(q, p))
+        return ordered[:30] if q else ordered[:50]
+
+    def find_by_sku(self, sku: str) -> Product | None:
+        """SKU exato; sem ele, o primeiro que contém o texto (como na busca)."""
+        sku = (sku or "").strip().upper()
+        found = self.products.search(sku=sku)
+        return next((p for p in found if p.sku == sku), found[0] if found else None)
+
+    def add_ons(self, product_ids: list[int], limit: int = 8) -> list[Product]:
+        """Complementos para os produtos da cesta (ver `BasketService.add_ons`)."""
+        return self.basket.add_ons(product_ids, limit=limit)
+
+    def promotions(self) -> PromotionBook:
+        """Promoções ativas compiladas para o `Cart` da tela (recompila só quando mudam)."""
+        return PromotionModel(self.db).book()
+
+    def list_promotions(self, active_only: bool = False) -> list[Promotion]:
+        return PromotionModel(self.db).list(active_only=active_only)
+
+    def create_sale(self, items: list[SaleItemInput], **kwargs) -> int:
+        """Grava a venda (e o pedido AGUARDANDO); ver `SaleModel.create_sale`.
+
+        Passe `priced_at=cart.at` para precificar as promoções no mesmo
+        instante que a tela.
+
+        Com fila de escrita, a venda entra no próximo lote (group commit).
+        """
+        if self.writer is None:
+            return self.model.create_sale(items, **kwargs)
+        return self.writer.run(self.model.sale_writer(items, **kwargs))
@@ -0,0 +1,264 @@
+"""
+Módulo: services/server.py
+
+Visão geral
+    Servidor HTTP/JSON local (stdlib) que é o ÚNICO processo a abrir o
+    `estoque.db`. Os caixas usam `services.remote.RemoteBackend` em vez de
+    abrir o arquivo por compartilhamento de rede.
+
+Concorrência
+    - Um escritor: todo POST passa por `write_lock`, então nunca há duas
+      transações de escrita disputando o arquivo (sem "database is locked").
+    - Leitores em pool: GETs usam um `PooledDatabase(read_only=True)` e rodam
+      em paralelo (uma thread por requisição; WAL ligado na partida).
+    - `--group-commit`: em vez do `write_lock`, os POSTs entram na fila de
+      escrita (`services.writer.WriteQueue`), que grava vários numa só
+      transação. Métricas dos lotes em `/metrics`.
+
+Uso:
+    python -m services.server [--db data/estoque.db] [--host 0.0.0.0] [--port 8765]
+    python -m services.server --group-commit [--max-delay-ms 5] [--max-batch 64]
+
+Rotas (JSON)
+    GET  /health
+    GET  /metrics                    (espera por lock/commit do escritor, lotes)
+    GET  /products?sku=&name=&category=&group=&limit=
+    GET  /products/suggest?q=
+    GET  /products/by-sku?sku=
+    GET  /products/add-ons?ids=1,2,3&limit=8
+    GET  /promotions?active=1
+    POST /sales                      {"items": [...], "customer_name": ...}
+    GET  /orders?status=&search=
+    GET  /orders/<id>
+    POST /orders/<id>/advance | /ship | /cancel
+    GET  /reports/summary?start=&end=
+    GET  /reports/missing
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import closing, nullcontext
+from dataclasses import asdict
+from datetime import datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from db import PooledDatabase
+from models.sale_model import SaleItemInput
+from services import Backend
+from services.reports import parse_date
+from services.writer import WriteQueue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+_ORDER_ACTION = re.compile(r"^/orders/(\d+)(?:/(advance|ship|cancel))?$")
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class StockServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer com um escritor serializado e leitores em pool."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], db_path: str, readers: int = 8,
+                 group_commit: bool = False, max_delay: float = 0.005, max_batch: int = 64) -> None:
+        # O escritor cria/migra o esquema antes de qualquer leitor abrir o arquivo
+        self.writer_db = PooledDatabase(db_path, pool_size=1)
+        with closing(self.writer_db._connect()) as conn:
+            conn.execute("PRAGMA journal_mode = WAL;")
+        self.reader_db = PooledDatabase(db_path, pool_size=readers, read_only=True)
+        self.write_queue = WriteQueue(self.writer_db, max_delay, max_batch) if group_commit else None
+        self.writer = Backend(self.writer_db, writer=self.write_queue)
+        self.reader = Backend(self.reader_db)
+        self.write_lock = threading.Lock()
+        super().__init__(address, _Handler)
+
+    def write_guard(self):
+        """`write_lock` no modo simples; com a fila, ela mesma serializa."""
+        return nullcontext() if self.write_queue is not None else self.write_lock
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.write_queue is not None:
+            self.write_queue.close()
+        self.reader_db.close_all()
+        self.writer_db.close_all()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: um socket por caixa
+    disable_nagle_algorithm = True  # cabeçalho e corpo saem em writes separados
+    server: StockServer
+
+    # ------------------------------ HTTP ------------------------------
+    def do_GET(self) -> None:
+        self._dispatch(self._get)
+
+    def do_POST(self) -> None:
+        self._dispatch(self._post)
+
+    def log_message(self, fmt: str, *args) -> None:
+        logger.debug("%s - " + fmt, self.address_string(), *args)
+
+    def _dispatch(self, route) -> None:
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            status, payload = 200, route(url.path.rstrip("/") or "/", query)
+        except HttpError as e:
+            status, payload = e.status, {"error": str(e)}
+        except ValueError as e:  # regra de negócio (estoque, status...)
+            status, payload = 409, {"error": str(e)}
+        except sqlite3.OperationalError as e:
+            status, payload = 503, {"error": str(e)}
+        except Exception as e:  # pragma: no cover - log e 500
+            logger.exception("Falha em %s %s", self.command, self.path)
+            status, payload = 500, {"error": str(e)}
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            raise HttpError(400, "JSON inválido")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Corpo deve ser um objeto JSON")
+        return data
+
+    # ----------------------------- Leitura ----------------------------
+    def _get(self, path: str, q: dict[str, str]):
+        r = self.server.reader
+        if path == "/health":
+            return {"ok": True}
+        if path == "/metrics":
+            wq = self.server.write_queue
+            return {"writer": self.server.writer_db.lock_metrics(), "readers": self.server.reader_db.lock_metrics(),
+                    "write_queue": wq.metrics() if wq is not None else None}
+        if path == "/products":
+            limit = int(q["limit"]) if q.get("limit") else None
+            return r.catalog.search(q.get("sku", ""), q.get("name", ""), q.get("category", ""),
+                                    q.get("group", ""), limit=limit)
+        if path == "/products/suggest":
+            return r.sales.suggest(q.get("q", ""))
+        if path == "/products/by-sku":
+            p = r.sales.find_by_sku(q.get("sku", ""))
+            if p is None:
+                raise HttpError(404, "Produto não encontrado")
+            return p
+        if path == "/products/add-ons":
+            try:
+                ids = [int(x) for x in q.get("ids", "").split(",") if x.strip()]
+                limit = int(q.get("limit") or 8)
+            except ValueError:
+                raise HttpError(400, "ids/limit inválidos")
+            return r.sales.add_ons(ids, limit=limit)
+        if path == "/promotions":
+            return r.sales.list_promotions(active_only=bool(q.get("active")))
+        if path == "/orders":
+            return r.orders.list(status=q.get("status") or None, search=q.get("search") or None)
+        if path == "/reports/summary":
+            return r.reports.sales_summary(parse_date(q.get("start")), parse_date(q.get("end")))
+        if path == "/reports/missing":
+            return r.reports.missing_products()
+        m = _ORDER_ACTION.match(path)
+        if m and not m.group(2):
+            found = r.orders.details(int(m.group(1)))
+            if found is None:
+                raise HttpError(404, "Pedido inexistente")
+            return {"order": found[0], "items": found[1]}
+        raise HttpError(404, f"Rota inexistente: {path}")
+
+    # ----------------------------- Escrita ----------------------------
+    def _post(self, path: str, _q: dict[str, str]):
+        body = self._read_json()
+        w = self.server.writer
+        if path == "/sales":
+            items = [_sale_item(it) for it in body.get("items") or []]
+            opts = {k: body.get(k) for k in ("notes", "customer_name", "customer_email",
+                                             "customer_address", "shipping_method", "shipping_cost")
+                    if body.get(k) is not None}
+            if body.get("priced_at"):
+                try:
+                    opts["priced_at"] = datetime.fromisoformat(str(body["priced_at"]))
+                except ValueError:
+                    raise HttpError(400, "priced_at inválido")
+            with self.server.write_guard():
+                return {"sale_id": w.sales.create_sale(items, **opts)}
+        m = _ORDER_ACTION.match(path)
+        if m and m.group(2):
+            oid, action = int(m.group(1)), m.group(2)
+            with self.server.write_guard():
+                if action == "advance":
+                    return w.orders.advance(oid)
+                getattr(w.orders, action)(oid)
+                return {"order_id": oid, "status": w.orders.status_of(oid)}
+        raise HttpError(404, f"Rota inexistente: {path}")
+
+
+def _sale_item(d: dict) -> SaleItemInput:
+    try:
+        return SaleItemInput(
+            product_id=int(d["product_id"]), sku=str(d["sku"]), name=str(d["name"]), qty=int(d["qty"]),
+            unit_price=Decimal(str(d["unit_price"])), discount_percent=Decimal(str(d.get("discount_percent", 0))),
+        )
+    except (KeyError, TypeError, ValueError, ArithmeticError):
+        raise HttpError(400, "Item de venda inválido")
+
+
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, "__dataclass_fields__"):
+        return asdict(obj)
+    if isinstance(obj, Mapping):  # ex.: OrderRecord
+        return dict(obj)
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m services.server", description="Servidor HTTP/JSON do estoque")
+    ap.add_argument("--db", default="data/estoque.db")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--readers", type=int, default=8, help="conexões de leitura mantidas no pool")
+    ap.add_argument("--group-commit", action="store_true", help="agrupa escritas simultâneas numa transação")
+    ap.add_argument("--max-delay-ms", type=float, default=5.0, help="espera máxima para formar um lote (padrão 5)")
+    ap.add_argument("--max-batch", type=int, default=64, help="escritas por lote (padrão 64)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    server = StockServer((args.host, args.port), args.db, readers=args.readers, group_commit=args.group_commit,
+                         max_delay=args.max_delay_ms / 1000, max_batch=args.max_batch)
+    logger.info("Servindo %s em http://%s:%d", args.db, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Módulo: services/snapshot.py
+
+Visão geral
+    Cópia do banco para relatórios ("snapshot"), feita com a API de backup
+    online do SQLite (`sqlite3.Connection.backup`). Relatórios e exportações
+    grandes leem a cópia e nunca seguram lock de leitura no `estoque.db`
+    enquanto os caixas gravam.
+
+Como a cópia é feita
+    - Incremental: `pages_per_step` páginas por passo, com uma pausa entre
+      passos — entre um passo e outro o arquivo fica livre para os caixas.
+    - Se alguém grava durante a cópia, o SQLite recomeça do início. Depois de
+      `max_restarts` recomeços (loja muito movimentada) a cópia é terminada
+      num passo só, para sempre concluir.
+    - Grava num arquivo temporário ao lado e troca com `os.replace` (atômico):
+      quem está lendo nunca vê uma cópia pela metade.
+    - A data da cópia fica dentro dela (tabela `snapshot_info`).
+
+Uso
+    snap = SnapshotManager(db)            # data/estoque.snapshot.db
+    snap.ensure(max_age=900)              # refaz se tiver mais de 15 min
+    ReportService(snap.database())        # consultas na cópia
+    python -m services snapshot [--every 900]
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from db import Database
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAX_AGE_ENV = "STOCK_SNAPSHOT_MAX_AGE"  # segundos; padrão 900 (15 min)
+DEFAULT_MAX_AGE = 900.0
+
+
+@dataclass
+class SnapshotInfo:
+    path: str
+    taken_at: datetime      # horário local do fim da cópia
+    pages: int
+    seconds: float          # duração da cópia
+    restarts: int           # recomeços por gravação concorrente
+
+    @property
+    def age(self) -> float:
+        """Idade da cópia em segundos."""
+        return max(0.0, (datetime.now() - self.taken_at).total_seconds())
+
+
+class _Restart(Exception):
+    """Muitos recomeços: interrompe a cópia incremental."""
+
+
+def snapshot_path_for(db_path: str) -> str:
+    """`data/estoque.db` -> `data/estoque.snapshot.db`."""
+    p = Path(db_path)
+    return str(p.with_name(f"{p.stem}.snapshot{p.suffix or '.db'}"))
+
+
+def default_max_age() -> float:
+    return float(os.environ.get(SNAPSHOT_MAX_AGE_ENV) or DEFAULT_MAX_AGE)
+
+
+class SnapshotManager:
+    """Cria, renova e abre a cópia de relatórios de um `Database`."""
+
+    def __init__(self, db: Database, path: str | None = None, pages_per_step: int = 256,
+                 pause: float = 0.005, max_restarts: int = 5) -> None:
+        self.db = db
+        self.path = path or snapshot_path_for(db.db_path)
+        self.pages_per_step = int(pages_per_step)
+        self.pause = float(pause)
+        self.max_restarts = int(max_restarts)
+        self._reader: Database | None = None
+
+    # ------------------------------ Leitura ------------------------------
+    def database(self) -> Database:
+        """`Database` somente leitura sobre a cópia (cria a cópia se não existir)."""
+        if not os.path.exists(self.path):
+            self.refresh()
+        if self._reader is None:
+            self._reader = Database(self.path, read_only=True)
+        return self._reader
+
+    def info(self) -> SnapshotInfo | None:
+        """Dados da cópia atual; None se ainda não existe (ou está ilegível)."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+            with closing(sqlite3.connect(uri, uri=True)) as conn:
+                row = conn.execute("SELECT taken_at, pages, seconds, restarts FROM snapshot_info;").fetchone()
+        except sqlite3.Error:
+            return None
+        if not row:
+            return None
+        return SnapshotInfo(self.path, datetime.fromisoformat(row[0]), int(row[1]), float(row[2]), int(row[3]))
+
+    def ensure(self, max_age: float | None = None) -> SnapshotInfo:
+        """Refaz a cópia se não existir ou tiver mais de `max_age` segundos."""
+        max_age = default_max_age() if max_age is None else max_age
+        info = self.info()
+        if info is None or info.age > max_age:
+            info = self.refresh()
+        return info
+
+    # ------------------------------ Cópia --------------------------------
+    def refresh(self, progress: Callable[[int, int], None] | None = None) -> SnapshotInfo:
+        """Copia o banco vivo para um temporário e troca pela cópia atual.
+
+        progress(restante, total) é chamado a cada passo (páginas).
+        """
+        tmp = f"{self.path}.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        started = time.perf_counter()
+        restarts = 0
+        last_remaining: list[int] = []
+
+        def on_step(_status: int, remaining: int, total: int) -> None:
+            nonlocal restarts
+            if last_remaining and remaining > last_remaining[0]:
+                restarts += 1  # houve gravação no meio: o SQLite recomeçou
+                if restarts > self.max_restarts:
+                    raise _Restart()
+            last_remaining[:] = [remaining]
+            if progress is not None:
+                progress(remaining, total)
+
+        with closing(self.db._connect()) as src, closing(sqlite3.connect(tmp)) as dst:
+            try:
+                src.backup(dst, pages=self.pages_per_step, progress=on_step, sleep=self.pause)
+            except _Restart:
+                logger.info("Snapshot: %d recomeços; concluindo em um passo", restarts)
+                src.backup(dst, pages=-1)
+            pages = int(dst.execute("PRAGMA page_count;").fetchone()[0])
+            seconds = time.perf_counter() - started
+            taken_at = datetime.now()
+            # Cópia em journal DELETE: abre com mode=ro mesmo se o original é WAL
+            dst.execute("PRAGMA journal_mode = DELETE;")
+            # A cópia é só para leitura: registra quando foi feita
+            dst.execute("DROP TABLE IF EXISTS snapshot_info;")
+            dst.execute("CREATE TABLE snapshot_info (taken_at TEXT, pages INTEGER, seconds REAL, restarts INTEGER);")
+            dst.execute("INSERT INTO snapshot_info VALUES (?, ?, ?, ?);",
+                        (taken_at.isoformat(timespec="seconds"), pages, round(seconds, 3), restarts))
+            dst.commit()
+        self._replace(tmp)
+        logger.info("Snapshot %s: %d páginas em %.2fs (%d recomeços)", self.path, pages, seconds, restarts)
+        return SnapshotInfo(self.path, taken_at.replace(microsecond=0), pages, seconds, restarts)
+
+    def _replace(self, tmp: str) -> None:
+        # No Windows a troca falha enquanto alguém lê o arquivo antigo; as
+        # leituras são curtas (uma conexão por consulta), então tenta de novo
+        for attempt in range(20):
+            try:
+                os.replace(tmp, self.path)
+                return
+            except PermissionError:
+                if attempt == 19:
+                    raise
+                time.sleep(0.1)
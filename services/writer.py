@@ -0,0 +1,194 @@
+"""
+Módulo: services/writer.py
+
+Visão geral
+    Fila de escrita com "group commit" para picos de venda (promoções).
+    Cada `create_sale` isolado é uma transação com fsync próprio; com a fila,
+    vendas e operações de pedido que chegam dentro de uma janela curta são
+    gravadas numa ÚNICA transação (um fsync para o lote inteiro).
+
+Como funciona
+    - `submit(work)` enfileira uma unidade `work(conn)` e devolve um
+      `concurrent.futures.Future`; `run(work)` espera o resultado.
+    - Uma thread escritora junta unidades até `max_batch` ou até `max_delay`
+      segundos depois da primeira, abre BEGIN IMMEDIATE e roda cada unidade
+      num SAVEPOINT próprio: a que falha (estoque, status...) é desfeita
+      sozinha e recebe sua exceção; as demais seguem no mesmo COMMIT.
+    - Resultados só são entregues DEPOIS do COMMIT — quem recebe um sale_id
+      sabe que a venda está gravada. Se o COMMIT falhar, todo o lote recebe
+      o erro.
+
+    A fila é opcional: `Backend(db, writer=WriteQueue(db))`, ou
+    `python -m services.server --group-commit`.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, TypeVar
+
+from db import Database
+from utils.stats import latency_summary, percentile
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_STOP = object()
+_SAMPLES = 2000  # janelas das métricas (lotes mais recentes)
+
+
+class WriteQueue:
+    """Escritor único que agrupa unidades de escrita em transações por lote."""
+
+    def __init__(self, db: Database, max_delay: float = 0.005, max_batch: int = 64) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch deve ser >= 1")
+        self.db = db
+        self.max_delay = max(0.0, float(max_delay))
+        self.max_batch = int(max_batch)
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        # Métricas
+        self._batches = 0
+        self._jobs = 0
+        self._failed = 0
+        self._batch_errors = 0
+        self._sizes: deque[int] = deque(maxlen=_SAMPLES)
+        self._commits: deque[float] = deque(maxlen=_SAMPLES)
+        self._transactions: deque[float] = deque(maxlen=_SAMPLES)
+        self._waits: deque[float] = deque(maxlen=_SAMPLES)
+        self._thread = threading.Thread(target=self._loop, name="write-queue", daemon=True)
+        self._thread.start()
+
+    # ------------------------------ API -------------------------------
+    def submit(self, work: Callable[[sqlite3.Connection], T]) -> "Future[T]":
+        """Enfileira `work(conn)`; o Future recebe o retorno ou a exceção."""
+        if self._closed:
+            raise RuntimeError("Fila de escrita encerrada")
+        fut: Future = Future()
+        self._queue.put((work, fut, time.perf_counter()))
+        return fut
+
+    def run(self, work: Callable[[sqlite3.Connection], T], timeout: float | None = None) -> T:
+        """`submit` + espera: mesma semântica de `Database.run_in_transaction`."""
+        return self.submit(work).result(timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Grava o que já está na fila e encerra a thread escritora."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def metrics(self) -> dict:
+        """Tamanho dos lotes, COMMIT, transação inteira e espera na fila (amostras recentes)."""
+        with self._lock:
+            sizes = sorted(self._sizes)
+            commits, txs, waits = list(self._commits), list(self._transactions), list(self._waits)
+            return {
+                "batches": self._batches,
+                "jobs": self._jobs,
+                "failed_jobs": self._failed,
+                "batch_errors": self._batch_errors,
+                "pending": self._queue.qsize(),
+                "max_delay_ms": round(self.max_delay * 1000, 3),
+                "max_batch": self.max_batch,
+                "batch_size": {
+                    "mean": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+                    "p50": round(percentile(sizes, 50), 1),
+                    "p95": round(percentile(sizes, 95), 1),
+                    "max": sizes[-1] if sizes else 0,
+                },
+                "commit": latency_summary(commits),
+                "transaction": latency_summary(txs),
+                "queue_wait": latency_summary(waits),
+            }
+
+    # ---------------------------- Escritor ----------------------------
+    def _loop(self) -> None:
+        stop = False
+        while not stop:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            batch = [job]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    # O que já está na fila entra sem esperar; depois, até o prazo
+                    job = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stop = True
+                    break
+                batch.append(job)
+            self._write(batch)
+        # Corrida com close(): o que entrou depois do _STOP não será gravado
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP and job[1].set_running_or_notify_cancel():
+                job[1].set_exception(RuntimeError("Fila de escrita encerrada"))
+
+    def _write(self, batch: list[tuple]) -> None:
+        started = time.perf_counter()
+        jobs = [(work, fut) for work, fut, _ in batch if fut.set_running_or_notify_cancel()]
+        waits = [started - queued for _, _, queued in batch]
+        if not jobs:
+            return
+
+        def work_all(conn: sqlite3.Connection) -> list[tuple[bool, object]]:
+            # Refeito do zero se o lote inteiro precisar de nova tentativa
+            outcomes: list[tuple[bool, object]] = []
+            for work, _ in jobs:
+                conn.execute("SAVEPOINT job;")
+                try:
+                    outcomes.append((True, work(conn)))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job;")
+                    outcomes.append((False, e))
+                conn.execute("RELEASE job;")
+            work_done[0] = time.perf_counter()
+            return outcomes
+
+        work_done = [0.0]
+        t0 = time.perf_counter()
+        try:
+            outcomes = self.db.run_in_transaction(work_all)
+        except Exception as e:  # BEGIN/COMMIT falhou: ninguém foi gravado
+            logger.warning("Lote de %d escrita(s) falhou: %s", len(jobs), e)
+            with self._lock:
+                self._batches += 1
+                self._jobs += len(jobs)
+                self._failed += len(jobs)
+                self._batch_errors += 1
+            for _, fut in jobs:
+                fut.set_exception(e)
+            return
+        finished = time.perf_counter()
+        failed = sum(1 for ok, _ in outcomes if not ok)
+        with self._lock:
+            self._batches += 1
+            self._jobs += len(jobs)
+            self._failed += failed
+            self._sizes.append(len(jobs))
+            self._commits.append(finished - work_done[0])
+            self._transactions.append(finished - t0)
+            self._waits.extend(waits)
+        for (_, fut), (ok, value) in zip(jobs, outcomes):
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)  # type: ignore[arg-type]
@@ -9,12 +9,16 @@ from pathlib import Path
 from typing import Iterable, Sequence
 
 
-def export_csv(file_path: str | Path, headers: Sequence[str], rows: Iterable[Sequence[object]]) -> None:
+def export_csv(file_path: str | Path, headers: Sequence[str], rows: Iterable[Sequence[object]]) -> int:
+    """Grava `rows` (pode ser um gerador) e retorna quantas linhas foram escritas."""
     p = Path(file_path)
     p.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
     with p.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f, delimiter=";")
         w.writerow(headers)
         for r in rows:
             w.writerow(r)
+            n += 1
+    return n
 
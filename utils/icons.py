@@ -0,0 +1,55 @@
+"""
+Cache de ícones pré-renderizados para a janela e o cabeçalho.
+
+Na inicialização, o app lê `data/icon_cache/logo_<N>.png` direto com
+`tk.PhotoImage` — sem importar o Pillow e sem redimensionar nada. O cache é
+válido enquanto o mtime de `assets/logo.png` bater com o do manifesto; se
+faltar ou estiver velho, é regerado por `assets/generate_logo.py` (só então o
+Pillow é importado). Sem Pillow e sem cache, retorna vazio e o app usa o PNG
+original como fallback.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+
+LOGO_PNG = Path("assets") / "logo.png"
+CACHE_DIR = Path("data") / "icon_cache"
+
+
+def icon_cache(src: Path = LOGO_PNG, cache_dir: Path = CACHE_DIR) -> dict[int, Path]:
+    """Retorna {tamanho: caminho do PNG}, regerando o cache se necessário."""
+    if not src.exists():
+        return {}
+    paths = _read_manifest(src, cache_dir)
+    if paths is not None:
+        return paths
+    try:
+        return _load_renderer()(src, cache_dir)
+    except Exception:
+        # Pillow ausente ou falha ao gravar: segue sem cache
+        return {}
+
+
+def _read_manifest(src: Path, cache_dir: Path) -> dict[int, Path] | None:
+    try:
+        manifest = json.loads((cache_dir / "manifest.json").read_text(encoding="utf-8"))
+        if int(manifest["source_mtime_ns"]) != src.stat().st_mtime_ns:
+            return None
+        paths = {int(s): cache_dir / f"logo_{int(s)}.png" for s in manifest["sizes"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not all(p.exists() for p in paths.values()):
+        return None
+    return paths
+
+
+def _load_renderer():
+    """Carrega `render_icon_cache` de assets/generate_logo.py (não é pacote)."""
+    path = Path(__file__).resolve().parents[1] / "assets" / "generate_logo.py"
+    spec = importlib.util.spec_from_file_location("generate_logo", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module.render_icon_cache
@@ -5,6 +5,7 @@ Geração de identificadores (ex.: sale_number sequencial AAA-000001).
 from __future__ import annotations
 
 import re
+import sqlite3
 from contextlib import closing
 from typing import Tuple
 
@@ -14,43 +15,62 @@ from db import Database
 PAT = re.compile(r"^([A-Z]{3})-(\d{6})$")
 
 
-def next_sale_number(db: Database, prefix: str = "HND") -> str:
+def next_sale_number(db: Database | sqlite3.Connection, prefix: str = "HND") -> str:
     """Gera próximo número de venda sequencial com prefixo de 3 letras.
 
     Formato: XXX-000001
+    Aceita a conexão do chamador: dentro de uma transação IMMEDIATE
+    (`Database.transaction`), dois caixas nunca recebem o mesmo número.
     """
     if not re.fullmatch(r"[A-Z]{3}", prefix.upper()):
         raise ValueError("Prefixo deve ter 3 letras maiúsculas")
-    with closing(db._connect()) as conn:
-        cur = conn.execute(
-            "SELECT sale_number FROM sales WHERE sale_number LIKE ? ORDER BY id DESC LIMIT 1;",
-            (f"{prefix}-%",),
-        )
-        row = cur.fetchone()
-        if not row or not row[0]:
-            return f"{prefix}-000001"
-        m = PAT.match(row[0])
-        if not m:
-            return f"{prefix}-000001"
-        num = int(m.group(2)) + 1
-        return f"{prefix}-{num:06d}"
-
-
-def next_order_number(db: Database, prefix: str = "HND-ORD") -> str:
+    if isinstance(db, Database):
+        with closing(db._connect()) as conn:
+            return next_sale_number(conn, prefix)
+    cur = db.execute(
+        "SELECT sale_number FROM sales WHERE sale_number LIKE ? ORDER BY id DESC LIMIT 1;",
+        (f"{prefix}-%",),
+    )
+    row = cur.fetchone()
+    if not row or not row[0]:
+        return f"{prefix}-000001"
+    m = PAT.match(row[0])
+    if not m:
+        return f"{prefix}-000001"
+    num = int(m.group(2)) + 1
+    return f"{prefix}-{num:06d}"
+
+
+def next_order_number(db: Database | sqlite3.Connection, prefix: str = "HND-ORD") -> str:
     """Gera próximo número de pedido sequencial.
 
     Formato: HHH-XXX-000001 (prefixo com hífen é aceito)
     """
-    with closing(db._connect()) as conn:
-        cur = conn.execute(
-            "SELECT order_number FROM orders WHERE order_number LIKE ? ORDER BY id DESC LIMIT 1;",
-            (f"{prefix}-%",),
-        )
-        row = cur.fetchone()
-        if not row or not row[0]:
-            return f"{prefix}-000001"
-        try:
-            suffix = int(row[0].rsplit("-", 1)[1]) + 1
-        except Exception:
-            suffix = 1
-        return f"{prefix}-{suffix:06d}"
+    if isinstance(db, Database):
+        with closing(db._connect()) as conn:
+            return next_order_number(conn, prefix)
+    return format_order_number(last_order_suffix(db, prefix) + 1, prefix)
+
+
+def last_order_suffix(conn: sqlite3.Connection, prefix: str = "HND-ORD") -> int:
+    """Retorna o sufixo numérico do último pedido com o prefixo (0 se não houver).
+
+    Recebe a conexão do chamador para que a leitura aconteça dentro da mesma
+    transação da gravação (ex.: `OrderModel.create_many` pré-aloca um bloco de
+    números a partir deste valor).
+    """
+    cur = conn.execute(
+        "SELECT order_number FROM orders WHERE order_number LIKE ? ORDER BY id DESC LIMIT 1;",
+        (f"{prefix}-%",),
+    )
+    row = cur.fetchone()
+    if not row or not row[0]:
+        return 0
+    try:
+        return int(row[0].rsplit("-", 1)[1])
+    except Exception:
+        return 0
+
+
+def format_order_number(suffix: int, prefix: str = "HND-ORD") -> str:
+    return f"{prefix}-{suffix:06d}"
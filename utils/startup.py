@@ -0,0 +1,49 @@
+"""
+Relatório de tempo de inicialização (onde vai o orçamento do launch).
+
+Uso:
+    python app.py --startup-report       (ou STOCK_STARTUP_REPORT=1)
+
+Mostra, em ms, cada fase marcada pelo App (imports, Tk, ícones, cabeçalho,
+banco, login, primeiro desenho). Para detalhar o custo de cada import, use
+também `python -X importtime app.py 2> importtime.log`.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+
+class StartupReport:
+    """Marca fases com `mark(nome)`; cada fase mede desde a marca anterior."""
+
+    def __init__(self, t0: float | None = None) -> None:
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self._last = self.t0
+        self.phases: list[tuple[str, float]] = []
+        self.enabled = "--startup-report" in sys.argv or bool(os.environ.get("STOCK_STARTUP_REPORT"))
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000.0))
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self.t0) * 1000.0
+
+    def render(self) -> str:
+        total = self.total_ms or 1.0
+        lines = ["Inicialização (ms):"]
+        for phase, ms in self.phases:
+            lines.append(f"  {phase:<22} {ms:8.1f}  {ms / total * 100:5.1f}%")
+        lines.append(f"  {'total':<22} {self.total_ms:8.1f}")
+        mods = [m for m in ("PIL", "PIL.Image", "PIL.ImageTk") if m in sys.modules]
+        lines.append(f"  Pillow carregado: {'sim (' + ', '.join(mods) + ')' if mods else 'não'}")
+        return "\n".join(lines)
+
+    def emit(self) -> None:
+        if self.enabled:
+            print(self.render(), file=sys.stderr)
@@ -0,0 +1,32 @@
+"""
+Estatísticas simples para benchmarks e testes de carga (latências).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Percentil `p` (0..100) por interpolação linear; lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * (p / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def latency_summary(samples_s: Iterable[float]) -> dict[str, float]:
+    """Resumo em milissegundos: n, média, p50, p95, p99 e máximo."""
+    v = sorted(samples_s)
+    if not v:
+        return {"n": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "n": len(v),
+        "mean_ms": round(sum(v) / len(v) * 1000, 3),
+        "p50_ms": round(percentile(v, 50) * 1000, 3),
+        "p95_ms": round(percentile(v, 95) * 1000, 3),
+        "p99_ms": round(percentile(v, 99) * 1000, 3),
+        "max_ms": round(v[-1] * 1000, 3),
+    }
@@ -1,5 +1,5 @@
 """
-Funções auxiliares de tempo: timestamps ISO e cálculos de SLA.
+Funções auxiliares de tempo: timestamps ISO, cálculos de SLA e idade legível.
 """
 
 from __future__ import annotations
@@ -26,3 +26,14 @@ def compute_sla_deadline(created_iso: str, hours: int = 24) -> str:
     dt = datetime.fromisoformat(created_iso.replace("T", " "))
     return (dt + timedelta(hours=hours)).isoformat()
 
+
+def fmt_age(seconds: float) -> str:
+    """Idade legível: "agora", "há 5 min", "há 2 h", "há 3 dias"."""
+    if seconds < 60:
+        return "agora"
+    if seconds < 3600:
+        return f"há {int(seconds // 60)} min"
+    if seconds < 86400:
+        return f"há {int(seconds // 3600)} h"
+    days = int(seconds // 86400)
+    return f"há {days} dia{'s' if days > 1 else ''}"
@@ -0,0 +1,147 @@
+"""
+Janela de Contagem de Inventário (cycle count).
+
+Fluxo: abrir a janela (inicia a sessão e fotografa o estoque) → bipar/digitar
+SKU + Qtd ou importar arquivo → conferir as variações → "Lançar contagem"
+(uma transação para todos os ajustes, ref_type COUNT).
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from db import Database
+from models.count_model import CountSession
+
+
+class CountDialog(tk.Toplevel):
+    """Janela de contagem: cada bipe atualiza só a linha do SKU na tabela."""
+
+    def __init__(self, parent: tk.Widget, db: Database, on_posted=None) -> None:
+        super().__init__(parent)
+        self.title("Contagem de Inventário")
+        self.geometry("760x520")
+        self.on_posted = on_posted
+        self.session = CountSession(db)
+        self.session.start()
+
+        # Entrada (leitor de código de barras envia Enter ao final)
+        top = ttk.Frame(self)
+        top.pack(fill=tk.X, padx=10, pady=(10, 6))
+        ttk.Label(top, text="SKU:").pack(side=tk.LEFT)
+        self.var_sku = tk.StringVar()
+        self.entry_sku = ttk.Entry(top, textvariable=self.var_sku, width=20)
+        self.entry_sku.pack(side=tk.LEFT, padx=(6, 12))
+        self.entry_sku.bind("<Return>", lambda _e: self._add())
+        ttk.Label(top, text="Qtd:").pack(side=tk.LEFT)
+        self.var_qty = tk.StringVar(value="1")
+        ttk.Entry(top, textvariable=self.var_qty, width=8).pack(side=tk.LEFT, padx=(6, 12))
+        ttk.Button(top, text="Adicionar", command=self._add).pack(side=tk.LEFT)
+        ttk.Button(top, text="Importar arquivo", command=self._import).pack(side=tk.LEFT, padx=6)
+        self.lbl_info = ttk.Label(top, text="", foreground="#555")
+        self.lbl_info.pack(side=tk.RIGHT)
+
+        # Tabela das contagens (iid = SKU)
+        self.tree = ttk.Treeview(self, columns=("sku", "name", "expected", "counted", "variance"), show="headings")
+        for col, text, w, anchor in (
+            ("sku", "SKU", 120, tk.W),
+            ("name", "Produto", 280, tk.W),
+            ("expected", "Sistema", 90, tk.CENTER),
+            ("counted", "Contado", 90, tk.CENTER),
+            ("variance", "Diferença", 90, tk.CENTER),
+        ):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=w, anchor=anchor)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.tree.tag_configure("diff", background="#fff3cd")
+
+        # Ações
+        bottom = ttk.Frame(self)
+        bottom.pack(fill=tk.X, padx=10, pady=10)
+        self.var_zero = tk.BooleanVar(value=False)
+        ttk.Checkbutton(bottom, text="Contagem completa (não contados = 0)", variable=self.var_zero).pack(side=tk.LEFT)
+        ttk.Button(bottom, text="Cancelar", command=self._cancel).pack(side=tk.RIGHT)
+        ttk.Button(bottom, text="Lançar contagem", command=self._post).pack(side=tk.RIGHT, padx=6)
+
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+        self.entry_sku.focus_set()
+        self._update_info()
+
+    def _add(self) -> None:
+        sku = self.var_sku.get().strip().upper()
+        if not sku:
+            return
+        try:
+            qty = int(self.var_qty.get() or "1")
+            self.session.add(sku, qty)
+        except ValueError as e:
+            messagebox.showwarning("Contagem", str(e), parent=self)
+            return
+        self._upsert_row(sku)
+        self.var_sku.set("")
+        self._update_info()
+
+    def _import(self) -> None:
+        from tkinter import filedialog
+        fp = filedialog.askopenfilename(
+            parent=self, title="Importar contagem",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Todos", "*.*")],
+        )
+        if not fp:
+            return
+        try:
+            errors = self.session.load_file(fp)
+        except Exception as e:
+            messagebox.showerror("Falha ao importar", str(e), parent=self)
+            return
+        self._reload_rows()
+        self._update_info()
+        if errors:
+            detail = "\n".join(f"Linha {n}: {msg}" for n, msg in errors[:15])
+            messagebox.showwarning("Linhas ignoradas", f"{len(errors)} linha(s) com erro:\n{detail}", parent=self)
+
+    def _upsert_row(self, sku: str) -> None:
+        pid, name, expected = self.session._snapshot[sku]
+        counted = self.session.counts.get(sku, 0)
+        values = (sku, name, expected, counted, counted - expected)
+        tags = ("diff",) if counted != expected else ()
+        if self.tree.exists(sku):
+            self.tree.item(sku, values=values, tags=tags)
+        else:
+            self.tree.insert("", 0, iid=sku, values=values, tags=tags)
+
+    def _reload_rows(self) -> None:
+        self.tree.delete(*self.tree.get_children())
+        for v in self.session.variances(only_differences=False):
+            self.tree.insert(
+                "", tk.END, iid=v.sku, values=(v.sku, v.name, v.expected, v.counted, v.variance),
+                tags=("diff",) if v.variance else (),
+            )
+
+    def _update_info(self) -> None:
+        counts = self.session.counts
+        self.lbl_info.configure(text=f"Sessão #{self.session.session_id} • {len(counts)} SKU(s) contados")
+
+    def _post(self) -> None:
+        diffs = self.session.variances(zero_uncounted=self.var_zero.get())
+        if not messagebox.askyesno("Lançar contagem", f"Lançar {len(diffs)} ajuste(s) de estoque?", parent=self):
+            return
+        try:
+            result = self.session.post(zero_uncounted=self.var_zero.get())
+        except Exception as e:
+            messagebox.showerror("Falha", str(e), parent=self)
+            return
+        msg = f"{result.adjusted} produto(s) ajustado(s)."
+        if result.errors:
+            msg += "\n\nNão lançados:\n" + "\n".join(f"{sku}: {m}" for sku, m in result.errors[:15])
+        messagebox.showinfo("Contagem lançada", msg, parent=self)
+        if self.on_posted:
+            self.on_posted()
+        self.destroy()
+
+    def _cancel(self) -> None:
+        if self.session.counts and not messagebox.askyesno("Cancelar", "Descartar a contagem em andamento?", parent=self):
+            return
+        self.session.cancel()
+        self.destroy()
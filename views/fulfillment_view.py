@@ -9,12 +9,16 @@ from __future__ import annotations
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from contextlib import closing
 from datetime import date, timedelta
 
 from db import Database
-from models.order_model import OrderModel
+from services.changes import feed_for
+from services.remote import get_backend, using_remote
 from utils.formatting import br_money, fmt_datetime_br
+from views.grid import TreeSync
+from views.lazy import BackgroundLoader, watch_changes
+
+LIVE_UPDATE_MAX = 200  # acima disso, recarrega a lista inteira
 
 
 STATUS_COLORS = {
@@ -31,7 +35,8 @@ class FulfillmentFrame(ttk.Frame):
     def __init__(self, parent: tk.Widget, db: Database) -> None:
         super().__init__(parent)
         self.db = db
-        self.model = OrderModel(db)
+        # Local (SQLite) ou remoto (STOCK_API_URL) — mesma interface
+        self.orders = get_backend(db).orders
 
         # Cabeçalho
         ttk.Label(self, text="Preparação e Envio de Pedidos", font=("Segoe UI", 14, "bold")).pack(anchor=tk.W, padx=10, pady=(8, 4))
@@ -77,6 +82,7 @@ class FulfillmentFrame(ttk.Frame):
         # Tags por status
         for st, color in STATUS_COLORS.items():
             self.tree.tag_configure(st, background=color)
+        self._sync = TreeSync(self.tree)  # iid = id do pedido
 
         # Ações
         actions = ttk.Frame(table_frame)
@@ -124,9 +130,17 @@ class FulfillmentFrame(ttk.Frame):
         self.bind_all("<F6>", lambda _: self._quick_filter("PREPARADO"))
         self.bind_all("<F7>", lambda _: self._quick_filter("ENVIADO"))
 
-        # Inicial
+        # Inicial (em segundo plano)
+        self._loader = BackgroundLoader(self)
+        self._changes_loader = BackgroundLoader(self)
         self.refresh()
 
+        # Ao vivo: pedidos alterados por qualquer caixa/processo são
+        # atualizados linha a linha (só no modo local — o remoto não vê o arquivo)
+        self._live = not using_remote()
+        if self._live:
+            watch_changes(self, db, ("orders",), self._on_orders_changed)
+
     def _clear_filters(self) -> None:
         self.var_status.set("")
         self.var_search.set("")
@@ -137,37 +151,67 @@ class FulfillmentFrame(ttk.Frame):
         self.refresh()
 
     def refresh(self) -> None:
-        # Lista pedidos conforme filtros
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        orders = self.model.list(status=self.var_status.get() or None, search=self.var_search.get().strip() or None)
-        with closing(self.db._connect()) as conn:
-            for o in orders:
-                # conta itens
-                cur = conn.execute("SELECT COALESCE(SUM(qty),0) FROM order_items WHERE order_id = ?;", (o["id"],))
-                itens = int(cur.fetchone()[0])
-                self.tree.insert(
-                    "",
-                    tk.END,
-                    values=(
-                        o["id"], o["order_number"], o.get("customer_name", ""), itens, br_money(o["total_net"]), o["status"],
-                        fmt_datetime_br(o["created_at"]) if o.get("created_at") else "",
-                        fmt_datetime_br(o["prepared_at"]) if o.get("prepared_at") else "",
-                        fmt_datetime_br(o["shipped_at"]) if o.get("shipped_at") else "",
-                    ),
-                    tags=(o["status"],),
-                )
-        # Limpa detalhes
-        self._show_details(None)
+        """Lista pedidos conforme filtros (consulta em segundo plano)."""
+        status = self.var_status.get() or None
+        search = self.var_search.get().strip() or None
+        self._loader.submit(
+            lambda: self.orders.list(status=status, search=search),
+            self._fill_table,
+        )
+
+    def _fill_table(self, orders: list[dict]) -> None:
+        # Diferença contra o que já está na tabela (mantém seleção e rolagem)
+        self._sync.replace_all((str(o["id"]), self._row_values(o), (o["status"],)) for o in orders)
+        # Detalhes do pedido selecionado (se continuou na lista)
+        self._show_details(self._selected_order_id())
+
+    @staticmethod
+    def _row_values(o: dict) -> tuple:
+        return (
+            o["id"], o["order_number"], o.get("customer_name", ""), int(o["items_qty"]), br_money(o["total_net"]), o["status"],
+            fmt_datetime_br(o["created_at"]) if o.get("created_at") else "",
+            fmt_datetime_br(o["prepared_at"]) if o.get("prepared_at") else "",
+            fmt_datetime_br(o["shipped_at"]) if o.get("shipped_at") else "",
+        )
+
+    # ---------------------------- Ao vivo -----------------------------
+    def _on_orders_changed(self, _table: str, ids: set[int] | None) -> None:
+        """Relê só os pedidos alterados (com os filtros atuais) e atualiza as linhas."""
+        if ids is None or len(ids) > LIVE_UPDATE_MAX:
+            self.refresh()
+            return
+        status = self.var_status.get() or None
+        search = self.var_search.get().strip() or None
+        self._changes_loader.submit(
+            lambda: self.orders.list(status=status, search=search, ids=ids),
+            lambda rows: self._apply_changes(ids, rows),
+        )
+
+    def _apply_changes(self, ids: set[int], rows: list[dict]) -> None:
+        found = {int(o["id"]): o for o in rows}
+        for oid in ids:
+            iid, o = str(oid), found.get(oid)
+            if o is None:  # excluído ou saiu do filtro
+                self._sync.remove(iid)
+            else:  # novos no topo (lista é do mais recente ao mais antigo)
+                self._sync.upsert(iid, self._row_values(o), (o["status"],), index=0)
+        selected = self._selected_order_id()
+        if selected in ids:
+            self._show_details(selected)
+
+    def _after_write(self) -> None:
+        """Depois de uma ação da própria tela: só a linha alterada (local) ou tudo (remoto)."""
+        if self._live:
+            feed_for(self.db).dispatch()
+        else:
+            self.refresh()
 
     def _on_select(self, _evt=None) -> None:
         sel = self.tree.selection()
         if not sel:
             self._show_details(None)
             return
-        values = self.tree.item(sel[0], "values")
-        order_id = int(values[0])
-        self._show_details(order_id)
+        self._show_details(int(sel[0]))
 
     def _show_details(self, order_id: int | None) -> None:
         for i in self.items_tree.get_children():
@@ -177,59 +221,53 @@ class FulfillmentFrame(ttk.Frame):
             self.lbl_customer.configure(text="")
             self.var_total.set(br_money(0))
             return
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute("SELECT * FROM orders WHERE id=?;", (order_id,))
-            o = cur.fetchone()
-            if not o:
-                return
-            self.lbl_head.configure(text=f"Pedido {o['order_number']} — {o['status']}")
-            cust = (o['customer_name'] or '').strip()
-            addr = (o['customer_address'] or '').strip() if 'customer_address' in o.keys() else ''
-            email = (o['customer_email'] or '').strip() if 'customer_email' in o.keys() else ''
-            extra = []
-            if cust:
-                extra.append(cust)
-            if email:
-                extra.append(email)
-            if addr:
-                extra.append(addr)
-            self.lbl_customer.configure(text=" • ".join(extra))
-            self.var_total.set(br_money(o["total_net"]))
-            cur = conn.execute("SELECT sku, name, qty, unit_price, discount_percent, discount_value, subtotal_net FROM order_items WHERE order_id=? ORDER BY id;", (order_id,))
-            for r in cur.fetchall():
-                self.items_tree.insert(
-                    "",
-                    tk.END,
-                    values=(
-                        r["sku"], r["name"], r["qty"], br_money(r["unit_price"]), f"{float(r['discount_percent']):.2f}%", br_money(r["discount_value"]), br_money(r["subtotal_net"])
-                    ),
-                )
+        found = self.orders.details(order_id)
+        if not found:
+            return
+        o, items = found
+        self.lbl_head.configure(text=f"Pedido {o['order_number']} — {o['status']}")
+        cust = (o.get('customer_name') or '').strip()
+        addr = (o.get('customer_address') or '').strip()
+        email = (o.get('customer_email') or '').strip()
+        extra = []
+        if cust:
+            extra.append(cust)
+        if email:
+            extra.append(email)
+        if addr:
+            extra.append(addr)
+        self.lbl_customer.configure(text=" • ".join(extra))
+        self.var_total.set(br_money(o["total_net"]))
+        for r in items:
+            self.items_tree.insert(
+                "",
+                tk.END,
+                values=(
+                    r["sku"], r["name"], r["qty"], br_money(r["unit_price"]), f"{float(r['discount_percent']):.2f}%", br_money(r["discount_value"]), br_money(r["subtotal_net"])
+                ),
+            )
 
     def _selected_order_id(self) -> int | None:
         sel = self.tree.selection()
         if not sel:
             return None
-        return int(self.tree.item(sel[0], "values")[0])
+        return int(sel[0])
 
     def _advance(self) -> None:
         oid = self._selected_order_id()
         if not oid:
             return
-        # Se estiver PREPARADO, chamar ship() para baixa de estoque
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute("SELECT status FROM orders WHERE id=?;", (oid,))
-            st = cur.fetchone()[0]
+        # A regra (PREPARADO -> ship com baixa de estoque) fica no serviço
         try:
-            if st == "PREPARADO":
-                self.model.ship(oid)
-                messagebox.showinfo("Pedido enviado", f"Pedido {oid} marcado como ENVIADO e estoque baixado.")
-            else:
-                new_st = self.model.advance_status(oid)
-                messagebox.showinfo("Status atualizado", f"Pedido {oid} avançou para {new_st}.")
+            res = self.orders.advance(oid)
         except Exception as e:
             messagebox.showerror("Falha", str(e))
             return
-        self.refresh()
+        if res.shipped:
+            messagebox.showinfo("Pedido enviado", f"Pedido {oid} marcado como ENVIADO e estoque baixado.")
+        else:
+            messagebox.showinfo("Status atualizado", f"Pedido {oid} avançou para {res.status}.")
+        self._after_write()
 
     def _cancel(self) -> None:
         oid = self._selected_order_id()
@@ -238,9 +276,9 @@ class FulfillmentFrame(ttk.Frame):
         if not messagebox.askyesno("Cancelar", "Deseja cancelar o pedido selecionado?"):
             return
         try:
-            self.model.cancel(oid)
+            self.orders.cancel(oid)
         except Exception as e:
             messagebox.showerror("Falha", str(e))
             return
         messagebox.showinfo("Cancelado", f"Pedido {oid} marcado como CANCELADO.")
-        self.refresh()
+        self._after_write()
@@ -0,0 +1,114 @@
+"""
+Atualização incremental de Treeview (sem apagar e reinserir tudo).
+
+`TreeSync` mantém, em Python, o mapa iid -> (valores, tags) e a ordem das
+linhas de um `ttk.Treeview`. Com isso:
+
+- `upsert`/`remove` alteram uma linha com no máximo UMA chamada Tcl (nenhuma
+  se os valores não mudaram);
+- `replace_all` aplica uma lista nova como diferença: remove o que sumiu,
+  insere o que é novo, move o que mudou de lugar e reescreve só as linhas
+  alteradas. Seleção e posição da barra de rolagem são preservadas.
+
+Convenção: iid = id da linha no banco (como texto).
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Iterable, Sequence
+
+Row = tuple[str, Sequence[Any], Sequence[str]]  # (iid, values, tags)
+
+
+class TreeSync:
+    """Espelho Python de um Treeview plano para aplicar mudanças em diferença."""
+
+    def __init__(self, tree: ttk.Treeview) -> None:
+        self.tree = tree
+        self._rows: dict[str, tuple[tuple, tuple]] = {}
+        self._order: list[str] = []
+
+    def __contains__(self, iid: str) -> bool:
+        return iid in self._rows
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def values(self, iid: str) -> tuple:
+        return self._rows[iid][0]
+
+    # ---------------------------- Linhas ------------------------------
+    def upsert(self, iid: str, values: Sequence[Any], tags: Sequence[str] = (), index: int | str = tk.END) -> None:
+        """Atualiza a linha no lugar ou insere em `index` (se nova)."""
+        row = (tuple(values), tuple(tags))
+        old = self._rows.get(iid)
+        if old == row:
+            return
+        if old is not None:
+            self.tree.item(iid, values=row[0], tags=row[1])
+        else:
+            self.tree.insert("", index, iid=iid, values=row[0], tags=row[1])
+            if index == tk.END or index >= len(self._order):
+                self._order.append(iid)
+            else:
+                self._order.insert(int(index), iid)
+        self._rows[iid] = row
+
+    def remove(self, *iids: str) -> None:
+        gone = [i for i in iids if i in self._rows]
+        if not gone:
+            return
+        self.tree.delete(*gone)
+        for i in gone:
+            del self._rows[i]
+        gone_set = set(gone)
+        self._order = [i for i in self._order if i not in gone_set]
+
+    def bisect(self, column: int, value: Any) -> int:
+        """Posição de inserção de `value` numa lista ordenada pela coluna `column`."""
+        lo, hi = 0, len(self._order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._rows[self._order[mid]][0][column] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # ---------------------------- Lista -------------------------------
+    def replace_all(self, rows: Iterable[Row]) -> None:
+        """Deixa o Treeview igual a `rows` (na ordem dada) mexendo só no que mudou."""
+        rows = [(iid, tuple(values), tuple(tags)) for iid, values, tags in rows]
+        top = self.tree.yview()[0]
+        keep = {iid for iid, _, _ in rows}
+        self.remove(*(i for i in self._order if i not in keep))
+
+        # Invariante: as i primeiras linhas do Treeview já são rows[:i]
+        current, j, moved = self._order, 0, set()
+        order: list[str] = []
+        for i, (iid, values, tags) in enumerate(rows):
+            while j < len(current) and current[j] in moved:
+                j += 1
+            old = self._rows.get(iid)
+            if old is None:
+                self.tree.insert("", i, iid=iid, values=values, tags=tags)
+            else:
+                if j < len(current) and current[j] == iid:
+                    j += 1
+                else:
+                    self.tree.move(iid, "", i)
+                    moved.add(iid)
+                if old != (values, tags):
+                    self.tree.item(iid, values=values, tags=tags)
+            self._rows[iid] = (values, tags)
+            order.append(iid)
+        self._order = order
+        self.tree.yview_moveto(top)
+
+    def clear(self) -> None:
+        if self._order:
+            self.tree.delete(*self._order)
+        self._rows.clear()
+        self._order = []
@@ -0,0 +1,126 @@
+"""
+Utilitários de carregamento preguiçoso (lazy) para as telas Tkinter.
+
+- LazyTab: aba do Notebook que só constrói a tela (e consulta o banco) quando
+  é exibida pela primeira vez. O login abre na hora, qualquer que seja o
+  tamanho do banco.
+- BackgroundLoader: roda a consulta numa thread e entrega o resultado na
+  thread do Tk (via `after`). Só o pedido mais recente é entregue — cliques
+  repetidos em "Filtrar" não pintam resultados antigos por cima dos novos.
+- watch_changes: assina alterações de tabelas (`services.changes`) e chama
+  a tela na thread do Tk só quando algo mudou — inclusive gravado por outro
+  processo/caixa.
+
+Regra de ouro: a função de trabalho NÃO pode tocar em widgets nem em
+`tk.StringVar`; leia os filtros antes e passe por closure.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+from typing import Any, Callable, Iterable
+
+from db import Database
+from services.changes import ChangeCallback, feed_for
+
+logger = logging.getLogger(__name__)
+
+
+class LazyTab(ttk.Frame):
+    """Contêiner de aba que cria o conteúdo real sob demanda."""
+
+    def __init__(self, parent: tk.Widget, factory: Callable[[tk.Widget], tk.Widget]) -> None:
+        super().__init__(parent)
+        self._factory = factory
+        self.content: tk.Widget | None = None
+
+    def ensure_built(self) -> tk.Widget:
+        if self.content is None:
+            self.content = self._factory(self)
+            self.content.pack(fill=tk.BOTH, expand=True)
+        return self.content
+
+
+class BackgroundLoader:
+    """Executa `work()` fora da thread do Tk e chama `on_done(resultado)` nela."""
+
+    POLL_MS = 25
+
+    def __init__(self, widget: tk.Widget) -> None:
+        self.widget = widget
+        self._seq = 0
+
+    def submit(self, work: Callable[[], Any], on_done: Callable[[Any], None],
+               on_error: Callable[[Exception], None] | None = None) -> None:
+        self._seq += 1
+        seq = self._seq
+        box: queue.SimpleQueue = queue.SimpleQueue()
+
+        def runner() -> None:
+            try:
+                box.put((True, work()))
+            except Exception as e:  # entregue na thread do Tk
+                box.put((False, e))
+
+        threading.Thread(target=runner, name="bg-loader", daemon=True).start()
+
+        def poll() -> None:
+            try:
+                ok, value = box.get_nowait()
+            except queue.Empty:
+                self._schedule(poll)
+                return
+            # Descarta resultados obsoletos ou de telas já destruídas
+            try:
+                if seq != self._seq or not self.widget.winfo_exists():
+                    return
+            except tk.TclError:
+                return
+            if ok:
+                on_done(value)
+            elif on_error is not None:
+                on_error(value)
+            else:
+                logger.error("Falha ao carregar dados: %s", value)
+                messagebox.showerror("Falha ao carregar", str(value))
+
+        self._schedule(poll)
+
+    def _schedule(self, fn: Callable[[], None]) -> None:
+        try:
+            self.widget.after(self.POLL_MS, fn)
+        except tk.TclError:
+            pass  # janela fechada
+
+
+CHANGE_POLL_MS = 1000
+_polling: set[int] = set()  # id(feed) com laço de `after` já ativo
+
+
+def watch_changes(widget: tk.Widget, db: Database, tables: Iterable[str], callback: ChangeCallback) -> None:
+    """Chama `callback(tabela, ids)` na thread do Tk quando `tables` mudarem.
+
+    Um único laço de `after` por banco consulta `PRAGMA data_version` a cada
+    `CHANGE_POLL_MS`; a assinatura é cancelada quando o widget é destruído.
+    """
+    feed = feed_for(db)
+    unsubscribe = feed.subscribe(tables, callback)
+    widget.bind("<Destroy>", lambda e: unsubscribe() if e.widget is widget else None, add="+")
+    if id(feed) in _polling:
+        return
+    _polling.add(id(feed))
+    root = widget.winfo_toplevel()
+
+    def tick() -> None:
+        feed.dispatch()
+        try:
+            root.after(CHANGE_POLL_MS, tick)
+        except tk.TclError:  # janela fechada
+            _polling.discard(id(feed))
+            feed.close()
+
+    root.after(CHANGE_POLL_MS, tick)
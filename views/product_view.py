@@ -10,8 +10,13 @@ from tkinter import ttk, messagebox
 
 from db import Database
 from models.product_model import ProductModel, Product
-from utils.exports import export_csv
+from services.catalog import CatalogService
+from services.changes import feed_for
 from utils.formatting import br_money
+from views.grid import TreeSync
+from views.lazy import BackgroundLoader, watch_changes
+
+LIVE_UPDATE_MAX = 200  # acima disso, recarrega a lista inteira
 
 
 class ProductFrame(ttk.Frame):
@@ -71,6 +76,8 @@ class ProductFrame(ttk.Frame):
         ttk.Button(btns, text="Salvar", command=self._save).pack(side=tk.LEFT, padx=6)
         ttk.Button(btns, text="Excluir", command=self._delete).pack(side=tk.LEFT, padx=6)
         ttk.Button(btns, text="Ajustar Estoque", command=self._adjust_stock).pack(side=tk.LEFT)
+        ttk.Button(btns, text="Contagem", command=self._open_count).pack(side=tk.LEFT, padx=6)
+        ttk.Button(btns, text="Receber Compra", command=self._receive_file).pack(side=tk.LEFT)
 
         # Direita: resumo (margem/markup/alerta)
         summary = ttk.LabelFrame(top, text="Resumo")
@@ -97,6 +104,7 @@ class ProductFrame(ttk.Frame):
         ttk.Entry(filters, textvariable=self.var_fgroup, width=14).grid(row=0, column=7, padx=6)
         ttk.Button(filters, text="Filtrar", command=self.refresh_table).grid(row=0, column=8, padx=6)
         ttk.Button(filters, text="Exportar CSV", command=self._export_csv).grid(row=0, column=9, padx=6)
+        ttk.Button(filters, text="Importar", command=self._import_file).grid(row=0, column=10, padx=6)
 
         # Tabela (Treeview) para listar produtos
         self.tree = ttk.Treeview(
@@ -132,16 +140,23 @@ class ProductFrame(ttk.Frame):
 
         # Cores por tag (abaixo do mínimo)
         self.tree.tag_configure("low", background="#ffecec")
+        self._sync = TreeSync(self.tree)  # iid = id do produto
 
         # Bind seleção
         self.tree.bind("<<TreeviewSelect>>", self._on_select)
 
         # Estado
         self._selected_id: int | None = None
+        self._loader = BackgroundLoader(self)
+        self._changes_loader = BackgroundLoader(self)
 
-        # Carrega dados iniciais
+        # Carrega dados iniciais (em segundo plano)
         self.refresh_table()
 
+        # Ao vivo: produtos alterados (aqui, no caixa ou em outro processo)
+        # são atualizados linha a linha
+        watch_changes(self, db, ("products",), self._on_products_changed)
+
         # Atualiza resumo ao alterar custo/venda/estoques
         for v in (self.var_cost, self.var_sale):
             v.trace_add("write", lambda *_: self._update_margin())
@@ -200,7 +215,7 @@ class ProductFrame(ttk.Frame):
             messagebox.showerror("Erro", f"Falha ao salvar: {e}")
             return
 
-        self.refresh_table()
+        self._after_write()
         self._clear_form()
 
     def _delete(self) -> None:
@@ -214,24 +229,55 @@ class ProductFrame(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Erro", f"Falha ao excluir: {e}")
             return
-        self.refresh_table()
+        self._after_write()
         self._clear_form()
 
     def refresh_table(self) -> None:
-        # Limpa a tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Busca produtos e popula a tabela
-        produtos = self.model.search(self.var_fsku.get(), self.var_fname.get(), self.var_fcat.get(), self.var_fgroup.get())
-        for p in produtos:
-            tag = "low" if p.stock_qty < p.min_stock else ""
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(p.id, p.sku, p.name, p.category or "", p.group_code or "", br_money(p.cost_price), br_money(p.sale_price), p.stock_qty, p.min_stock),
-                tags=(tag,) if tag else (),
-            )
+        """Busca os produtos em segundo plano e repopula a tabela ao terminar."""
+        filters = (self.var_fsku.get(), self.var_fname.get(), self.var_fcat.get(), self.var_fgroup.get())
+        self._loader.submit(lambda: self.model.search(*filters), self._fill_table)
+
+    def _fill_table(self, produtos: list[Product]) -> None:
+        # Diferença contra o que já está na tabela (mantém seleção e rolagem)
+        self._sync.replace_all((str(p.id), self._row_values(p), self._row_tags(p)) for p in produtos)
+
+    @staticmethod
+    def _row_values(p: Product) -> tuple:
+        return (p.id, p.sku, p.name, p.category or "", p.group_code or "", br_money(p.cost_price),
+                br_money(p.sale_price), p.stock_qty, p.min_stock)
+
+    @staticmethod
+    def _row_tags(p: Product) -> tuple:
+        return ("low",) if p.stock_qty < p.min_stock else ()
+
+    # ---------------------------- Ao vivo -----------------------------
+    def _on_products_changed(self, _table: str, ids: set[int] | None) -> None:
+        """Relê só os produtos alterados (com os filtros atuais) e atualiza as linhas."""
+        if ids is None or len(ids) > LIVE_UPDATE_MAX:
+            self.refresh_table()
+            return
+        filters = (self.var_fsku.get(), self.var_fname.get(), self.var_fcat.get(), self.var_fgroup.get())
+        self._changes_loader.submit(
+            lambda: self.model.search(*filters, ids=ids),
+            lambda produtos: self._apply_changes(ids, produtos),
+        )
+
+    def _apply_changes(self, ids: set[int], produtos: list[Product]) -> None:
+        found = {p.id: p for p in produtos}
+        for pid in ids:
+            iid, p = str(pid), found.get(pid)
+            if p is None:  # excluído ou saiu do filtro
+                self._sync.remove(iid)
+                continue
+            if iid in self._sync and self._sync.values(iid)[2] != p.name:
+                self._sync.remove(iid)  # renomeado: volta para a posição certa
+            # Lista ordenada por nome: novos entram na posição (busca binária)
+            index = tk.END if iid in self._sync else self._sync.bisect(2, p.name)
+            self._sync.upsert(iid, self._row_values(p), self._row_tags(p), index)
+
+    def _after_write(self) -> None:
+        """Depois de gravar: aplica as alterações agora, sem esperar o próximo ciclo."""
+        feed_for(self.db).dispatch()
 
     def _update_margin(self) -> None:
         try:
@@ -276,9 +322,53 @@ class ProductFrame(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Falha", str(e))
             return
-        self.refresh_table()
+        self._after_write()
         self._update_stock_alert()
 
+    def _open_count(self) -> None:
+        """Abre a sessão de contagem de inventário (ajustes em lote, ref_type COUNT)."""
+        from views.count_view import CountDialog
+        CountDialog(self, self.db, on_posted=self._after_write)
+
+    def _receive_file(self) -> None:
+        """Recebe mercadoria a partir de arquivo `sku;qtd;custo` (uma transação, ref_type RECEIPT)."""
+        from tkinter import filedialog
+        from models.purchase_model import PurchaseModel
+        fp = filedialog.askopenfilename(
+            title="Receber Compra (arquivo)",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Todos", "*.*")],
+        )
+        if not fp:
+            return
+        model = PurchaseModel(self.db)
+        try:
+            lines, file_errors = model.load_receipt_file(fp)
+        except Exception as e:
+            messagebox.showerror("Falha ao ler arquivo", str(e))
+            return
+        if not lines:
+            messagebox.showinfo("Recebimento", "Nenhuma linha válida no arquivo.")
+            return
+        update_cost = messagebox.askyesno(
+            "Recebimento",
+            f"{len(lines)} linha(s) lidas ({len(file_errors)} com erro).\n\n"
+            "Atualizar o preço de custo pelo custo médio?",
+        )
+        try:
+            result = model.receive(lines, update_cost=update_cost)
+        except Exception as e:
+            messagebox.showerror("Falha", str(e))
+            return
+        errors = [f"Linha {n}: {m}" for n, m in file_errors] + [f"{sku}: {m}" for sku, m in result.errors]
+        if result.receipt_id is None:  # todas as linhas recusadas: nada foi lançado
+            messagebox.showerror("Recebimento não lançado", "Nenhuma linha lançada:\n" + "\n".join(errors[:15]))
+            return
+        msg = f"Recebimento #{result.receipt_id}: {result.lines} produto(s), {result.total_qty} unidade(s)."
+        if errors:
+            msg += "\n\nNão lançados:\n" + "\n".join(errors[:15])
+        messagebox.showinfo("Recebimento concluído", msg)
+        self._after_write()
+
     def _export_csv(self) -> None:
         from tkinter import filedialog
         fp = filedialog.asksaveasfilename(
@@ -289,10 +379,31 @@ class ProductFrame(ttk.Frame):
         )
         if not fp:
             return
-        produtos = self.model.search(self.var_fsku.get(), self.var_fname.get(), self.var_fcat.get())
-        rows = [
-            (p.id, p.sku, p.name, p.category or "", f"{p.cost_price:.2f}", f"{p.sale_price:.2f}", p.stock_qty, p.min_stock)
-            for p in produtos
-        ]
-        export_csv(fp, ("ID", "SKU", "Nome", "Categoria", "Custo", "Venda", "Estoque", "Min"), rows)
+        CatalogService(self.db).export_csv(fp, self.var_fsku.get(), self.var_fname.get(), self.var_fcat.get())
         messagebox.showinfo("Exportado", f"Arquivo salvo em\n{fp}")
+
+    def _import_file(self) -> None:
+        """Importa catálogo (CSV/JSONL) em lote e mostra o resumo com erros por linha."""
+        from tkinter import filedialog
+        fp = filedialog.askopenfilename(
+            title="Importar Produtos",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Todos", "*.*")],
+        )
+        if not fp:
+            return
+        try:
+            result = CatalogService(self.db).import_file(fp)
+        except Exception as e:
+            messagebox.showerror("Falha ao importar", str(e))
+            return
+        msg = (
+            f"Linhas lidas: {result.total}\n"
+            f"Novos: {result.inserted} | Atualizados: {result.updated} | Com erro: {len(result.errors)}"
+        )
+        if result.errors:
+            detail = "\n".join(f"Linha {e.line_no} ({e.sku or '-'}): {e.message}" for e in result.errors[:15])
+            if len(result.errors) > 15:
+                detail += f"\n... e mais {len(result.errors) - 15} linha(s)"
+            msg += "\n\n" + detail
+        messagebox.showinfo("Importação concluída", msg)
+        self._after_write()
@@ -1,18 +1,34 @@
 """
 Relatórios com período intuitivo (intervalos rápidos + dd/mm/aaaa),
 resumo em formato brasileiro e exportações em CSV (separador ';').
+
+As consultas ficam em `services/reports.py` (também usadas pela linha de
+comando); esta tela só lê o período, chama o serviço e exibe.
+
+Resumo e exportações leem a cópia de relatórios (`services.snapshot`), não o
+banco vivo — nada de lock de leitura enquanto os caixas gravam. A cópia é
+renovada quando passa de `STOCK_SNAPSHOT_MAX_AGE` (padrão 15 min) ou pelo
+botão "Atualizar dados"; a idade aparece ao lado. Sugestão de compra e
+curva ABC são a exceção: somam antes o que é novo nos resumos diários do banco
+vivo (`services.replenish`, `services.abc_report`).
 """
 
 from __future__ import annotations
 
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from contextlib import closing
+from tkinter import ttk, messagebox
 
 from db import Database
-from utils.exports import export_csv
-from utils.formatting import br_money, br_number, fmt_datetime_br
-from datetime import date, timedelta
+from services.archive import ArchiveService
+from services.abc_report import AbcReportService
+from services.replenish import ReplenishmentService
+from services.reports import QUICK_RANGES, ReportService, SalesSummary, parse_date, quick_range
+from services.snapshot import SnapshotInfo, SnapshotManager
+from utils.formatting import br_money
+from utils.time import fmt_age
+from views.lazy import BackgroundLoader
+
+AGE_TICK_MS = 30_000  # atualização do rótulo "Dados de ..."
 
 
 class ReportsFrame(ttk.Frame):
@@ -21,6 +37,8 @@ class ReportsFrame(ttk.Frame):
     def __init__(self, parent: tk.Widget, db: Database) -> None:
         super().__init__(parent)
         self.db = db
+        self.snapshot = SnapshotManager(db)
+        self._snapshot_info: SnapshotInfo | None = None
 
         # Cabeçalho
         title = ttk.Label(self, text="Relatórios", font=("Segoe UI", 14, "bold"))
@@ -32,7 +50,7 @@ class ReportsFrame(ttk.Frame):
         self.var_range = tk.StringVar(value="Este mês")
         ttk.Label(period, text="Intervalo:").grid(row=0, column=0, padx=6, pady=6, sticky=tk.W)
         cbo = ttk.Combobox(period, textvariable=self.var_range, state="readonly", width=18,
-                           values=("Hoje", "Ontem", "Últimos 7 dias", "Esta semana", "Este mês", "Mês passado", "Personalizado"))
+                           values=(*QUICK_RANGES, "Personalizado"))
         cbo.grid(row=0, column=1, padx=6, pady=6)
         cbo.bind("<<ComboboxSelected>>", lambda _e: self._apply_quick_range())
 
@@ -62,6 +80,12 @@ class ReportsFrame(ttk.Frame):
 
         ttk.Button(summary_frame, text="Atualizar", command=self.refresh).grid(row=0, column=5, padx=6, pady=6)
 
+        # Idade da cópia de relatórios
+        self.lbl_snapshot = ttk.Label(summary_frame, text="Dados: carregando...", foreground="#555")
+        self.lbl_snapshot.grid(row=1, column=0, columnspan=4, sticky=tk.W, padx=6, pady=(0, 6))
+        ttk.Button(summary_frame, text="Atualizar dados", command=lambda: self.refresh(new_snapshot=True)).grid(
+            row=1, column=5, padx=6, pady=(0, 6))
+
         # Lista de produtos sem estoque
         export_frame = ttk.LabelFrame(self, text="Exportação (CSV)")
         export_frame.pack(fill=tk.X, padx=10, pady=8)
@@ -69,6 +93,10 @@ class ReportsFrame(ttk.Frame):
         ttk.Button(export_frame, text="Exportar Vendas (resumo)", command=self._export_sales_csv).grid(row=0, column=0, padx=6, pady=6)
         ttk.Button(export_frame, text="Exportar Itens (detalhado)", command=self._export_items_csv).grid(row=0, column=1, padx=6, pady=6)
         ttk.Button(export_frame, text="Exportar Pedidos (resumo)", command=self._export_orders_csv).grid(row=0, column=2, padx=6, pady=6)
+        self.btn_replenish = ttk.Button(export_frame, text="Exportar Sugestão de Compra", command=self._export_replenish_csv)
+        self.btn_replenish.grid(row=1, column=0, padx=6, pady=6)
+        self.btn_abc = ttk.Button(export_frame, text="Exportar Curva ABC / Parados", command=self._export_abc_csv)
+        self.btn_abc.grid(row=1, column=1, padx=6, pady=6)
 
         # Lista de produtos em falta
         out_frame = ttk.LabelFrame(self, text="Produtos em falta")
@@ -91,209 +119,142 @@ class ReportsFrame(ttk.Frame):
         self.tree.configure(yscroll=vsb.set)
         vsb.place(in_=self.tree, relx=1.0, rely=0, relheight=1.0, x=-1)
 
-        # Carrega dados iniciais
+        # Carrega dados iniciais (em segundo plano)
+        self._loader = BackgroundLoader(self)
+        self._replenish_loader = BackgroundLoader(self)
+        self._abc_loader = BackgroundLoader(self)
         self.refresh()
+        self.after(AGE_TICK_MS, self._tick_age)
 
-    def refresh(self) -> None:
-        """Atualiza resumo por período e lista de produtos em falta."""
+    def refresh(self, new_snapshot: bool = False) -> None:
+        """Atualiza resumo por período e lista de produtos em falta (em segundo plano)."""
         start_iso, end_iso = self._parse_period()
-        where = []
-        params: list[str] = []
-        if start_iso:
-            where.append("datetime >= ?")
-            params.append(start_iso)
-        if end_iso:
-            where.append("datetime <= ?")
-            params.append(end_iso + "T23:59:59")
-        sql = "SELECT COUNT(*) n, COALESCE(SUM(total_gross),0), COALESCE(SUM(total_discount),0), COALESCE(SUM(total_net),0) FROM sales"
-        if where:
-            sql += " WHERE " + " AND ".join(where)
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute(sql, params)
-            n, bruto, desc, liq = cur.fetchone()
-        self.lbl_vendas.configure(text=f"Vendas: {int(n)}")
-        self.lbl_bruto.configure(text=f"Bruto: {br_money(bruto)}")
-        self.lbl_desc.configure(text=f"Descontos: {br_money(desc)}")
-        self.lbl_liq.configure(text=f"Líquido: {br_money(liq)}")
+        if new_snapshot:
+            self.lbl_snapshot.configure(text="Dados: copiando o banco...")
+        self._loader.submit(lambda: self._load(start_iso, end_iso, new_snapshot), self._fill)
+
+    def _reports(self) -> ReportService:
+        """Serviço de relatórios sobre a cópia (renova se estiver velha)."""
+        self._snapshot_info = self.snapshot.ensure()
+        return ReportService(self.snapshot.database(), ArchiveService(self.db))
+
+    def _load(self, start_iso: str | None, end_iso: str | None,
+              new_snapshot: bool) -> tuple[SalesSummary, list[dict]]:
+        """Consultas do resumo (roda fora da thread do Tk)."""
+        if new_snapshot:
+            self.snapshot.refresh()
+        reports = self._reports()
+        return reports.sales_summary(start_iso, end_iso), reports.missing_products()
+
+    def _tick_age(self) -> None:
+        self._show_age()
+        self.after(AGE_TICK_MS, self._tick_age)
+
+    def _show_age(self) -> None:
+        info = self._snapshot_info
+        if info is None:
+            return
+        self.lbl_snapshot.configure(
+            text=f"Dados de {info.taken_at:%d/%m/%Y %H:%M} ({fmt_age(info.age)}) — cópia para relatórios"
+        )
+
+    def _fill(self, data: tuple[SalesSummary, list[dict]]) -> None:
+        summary, missing = data
+        self._show_age()
+        self.lbl_vendas.configure(text=f"Vendas: {summary.count}")
+        self.lbl_bruto.configure(text=f"Bruto: {br_money(summary.gross)}")
+        self.lbl_desc.configure(text=f"Descontos: {br_money(summary.discount)}")
+        self.lbl_liq.configure(text=f"Líquido: {br_money(summary.net)}")
+        self.lbl_faltando.configure(text=f"Produtos em falta: {len(missing)}")
 
         # Atualiza tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute(
-                "SELECT id, sku, name, category, sale_price, stock_qty FROM products WHERE stock_qty < min_stock ORDER BY name;"
-            )
-            for r in cur.fetchall():
-                self.tree.insert("", tk.END, values=(r["id"], r["sku"], r["name"], r["category"], f"{r['sale_price']:.2f}", r["stock_qty"]))
+        self.tree.delete(*self.tree.get_children())
+        for r in missing:
+            self.tree.insert("", tk.END, values=(r["id"], r["sku"], r["name"], r["category"], f"{r['sale_price']:.2f}", r["stock_qty"]))
 
     def _export_sales_csv(self) -> None:
+        self._export("Exportar Vendas (resumo)", "vendas.csv", ReportService.export_sales)
+
+    def _export_orders_csv(self) -> None:
+        self._export("Exportar Pedidos (resumo)", "pedidos.csv", ReportService.export_orders)
+
+    def _export_items_csv(self) -> None:
+        self._export("Exportar Itens (detalhado)", "venda_itens.csv", ReportService.export_items)
+
+    def _export_replenish_csv(self) -> None:
+        """Ponto de pedido e compra sugerida de cada produto (em segundo plano)."""
         from tkinter import filedialog
-        file_path = filedialog.asksaveasfilename(title="Exportar Vendas (resumo)", defaultextension=".csv",
+        file_path = filedialog.asksaveasfilename(title="Exportar Sugestão de Compra", defaultextension=".csv",
                                                  filetypes=[("Arquivo CSV", "*.csv"), ("Todos os arquivos", "*.*")],
-                                                 initialfile="vendas.csv")
+                                                 initialfile="sugestao_compra.csv")
         if not file_path:
             return
-        start_iso, end_iso = self._parse_period()
-        where = []
-        params: list[str] = []
-        if start_iso:
-            where.append("datetime >= ?")
-            params.append(start_iso)
-        if end_iso:
-            where.append("datetime <= ?")
-            params.append(end_iso + "T23:59:59")
-        sql = "SELECT id, sale_number, datetime, total_gross, total_discount, total_net, items_count FROM sales"
-        if where:
-            sql += " WHERE " + " AND ".join(where)
-        sql += " ORDER BY datetime DESC;"
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute(sql, params)
-            rows = cur.fetchall()
-        try:
-            export_csv(
-                file_path,
-                ("ID", "Número", "Data/Hora", "Bruto", "Descontos", "Líquido", "Itens"),
-                ((r["id"], r["sale_number"], fmt_datetime_br(r["datetime"]), br_number(r["total_gross"]), br_number(r["total_discount"]), br_number(r["total_net"]), r["items_count"]) for r in rows),
-            )
-        except Exception as e:
+        self.btn_replenish.state(["disabled"])
+
+        def done(n: int) -> None:
+            self.btn_replenish.state(["!disabled"])
+            messagebox.showinfo("Exportado", f"{n} produto(s) com compra sugerida.\nArquivo salvo em:\n{file_path}")
+
+        def failed(e: Exception) -> None:
+            self.btn_replenish.state(["!disabled"])
             messagebox.showerror("Falha ao exportar", str(e))
-            return
-        messagebox.showinfo("Exportado", f"Relatório salvo em:\n{file_path}")
 
-    def _export_orders_csv(self) -> None:
+        self._replenish_loader.submit(lambda: ReplenishmentService(self.db).export(file_path), done, failed)
+
+    def _export_abc_csv(self) -> None:
+        """Curva ABC do período (receita e unidades) e produtos parados, em segundo plano."""
         from tkinter import filedialog
-        file_path = filedialog.asksaveasfilename(title="Exportar Pedidos (resumo)", defaultextension=".csv",
+        file_path = filedialog.asksaveasfilename(title="Exportar Curva ABC / Parados", defaultextension=".csv",
                                                  filetypes=[("Arquivo CSV", "*.csv"), ("Todos os arquivos", "*.*")],
-                                                 initialfile="pedidos.csv")
+                                                 initialfile="curva_abc.csv")
         if not file_path:
             return
         start_iso, end_iso = self._parse_period()
-        where = []
-        params: list[str] = []
-        if start_iso:
-            where.append("created_at >= ?")
-            params.append(start_iso)
-        if end_iso:
-            where.append("created_at <= ?")
-            params.append(end_iso + "T23:59:59")
-        sql = "SELECT id, order_number, customer_name, status, total_net, created_at, prepared_at, shipped_at FROM orders"
-        if where:
-            sql += " WHERE " + " AND ".join(where)
-        sql += " ORDER BY created_at DESC;"
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute(sql, params)
-            rows = cur.fetchall()
-        try:
-            export_csv(
-                file_path,
-                ("ID", "Número", "Cliente", "Status", "Total", "Criado", "Preparado", "Enviado"),
-                ((r["id"], r["order_number"], r["customer_name"], r["status"], br_number(r["total_net"]),
-                  fmt_datetime_br(r["created_at"]) if r["created_at"] else "",
-                  fmt_datetime_br(r["prepared_at"]) if r["prepared_at"] else "",
-                  fmt_datetime_br(r["shipped_at"]) if r["shipped_at"] else "") for r in rows),
-            )
-        except Exception as e:
+        self.btn_abc.state(["disabled"])
+
+        def work() -> str:
+            abc = AbcReportService(self.db)
+            res = abc.report(start_iso, end_iso)
+            abc.export_result(res, file_path)
+            return (f"A {res.classes['A']} / B {res.classes['B']} / C {res.classes['C']} produto(s); "
+                    f"{res.slow} parado(s), {br_money(res.slow_value)} a custo.")
+
+        def done(summary: str) -> None:
+            self.btn_abc.state(["!disabled"])
+            messagebox.showinfo("Exportado", f"{summary}\nArquivo salvo em:\n{file_path}")
+
+        def failed(e: Exception) -> None:
+            self.btn_abc.state(["!disabled"])
             messagebox.showerror("Falha ao exportar", str(e))
-            return
-        messagebox.showinfo("Exportado", f"Relatório salvo em:\n{file_path}")
 
-    def _export_items_csv(self) -> None:
+        self._abc_loader.submit(work, done, failed)
+
+    def _export(self, title: str, initialfile: str, export) -> None:
+        """Pergunta o arquivo e chama `export(serviço, caminho, início, fim)` na cópia."""
         from tkinter import filedialog
-        file_path = filedialog.asksaveasfilename(title="Exportar Itens (detalhado)", defaultextension=".csv",
+        file_path = filedialog.asksaveasfilename(title=title, defaultextension=".csv",
                                                  filetypes=[("Arquivo CSV", "*.csv"), ("Todos os arquivos", "*.*")],
-                                                 initialfile="venda_itens.csv")
+                                                 initialfile=initialfile)
         if not file_path:
             return
         start_iso, end_iso = self._parse_period()
-        where = []
-        params: list[str] = []
-        if start_iso:
-            where.append("s.datetime >= ?")
-            params.append(start_iso)
-        if end_iso:
-            where.append("s.datetime <= ?")
-            params.append(end_iso + "T23:59:59")
-        sql = (
-            "SELECT s.sale_number, s.datetime, i.sku, i.name, i.qty, i.unit_price, i.discount_percent, i.discount_value, i.subtotal_gross, i.subtotal_net "
-            "FROM sale_items i JOIN sales s ON s.id = i.sale_id"
-        )
-        if where:
-            sql += " WHERE " + " AND ".join(where)
-        sql += " ORDER BY s.datetime DESC, s.sale_number;"
-        with closing(self.db._connect()) as conn:
-            cur = conn.execute(sql, params)
-            rows = cur.fetchall()
         try:
-            export_csv(
-                file_path,
-                ("Número", "Data/Hora", "SKU", "Produto", "Qtd", "Preço Unit.", "Desc.%", "Desc.R$", "Subtotal Bruto", "Subtotal Líquido"),
-                (
-                    (
-                        r["sale_number"],
-                        fmt_datetime_br(r["datetime"]),
-                        r["sku"],
-                        r["name"],
-                        r["qty"],
-                        br_number(r["unit_price"]),
-                        br_number(r["discount_percent"]),
-                        br_number(r["discount_value"]),
-                        br_number(r["subtotal_gross"]),
-                        br_number(r["subtotal_net"]),
-                    )
-                    for r in rows
-                ),
-            )
+            export(self._reports(), file_path, start_iso, end_iso)
         except Exception as e:
             messagebox.showerror("Falha ao exportar", str(e))
             return
-        messagebox.showinfo("Exportado", f"Relatório salvo em:\n{file_path}")
+        self._show_age()
+        messagebox.showinfo("Exportado", f"Relatório salvo em:\n{file_path}\n\n{self.lbl_snapshot.cget('text')}")
 
     # ------------------------ Helpers de período ------------------------
     def _apply_quick_range(self) -> None:
-        rng = self.var_range.get()
-        today = date.today()
-        if rng == "Hoje":
-            start = end = today
-        elif rng == "Ontem":
-            d = today - timedelta(days=1)
-            start = end = d
-        elif rng == "Últimos 7 dias":
-            start = today - timedelta(days=6)
-            end = today
-        elif rng == "Esta semana":
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-        elif rng == "Este mês":
-            start = today.replace(day=1)
-            if start.month == 12:
-                end = start.replace(year=start.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                end = start.replace(month=start.month + 1, day=1) - timedelta(days=1)
-        elif rng == "Mês passado":
-            if today.month == 1:
-                start = today.replace(year=today.year - 1, month=12, day=1)
-            else:
-                start = today.replace(month=today.month - 1, day=1)
-            if start.month == 12:
-                end = start.replace(year=start.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                end = start.replace(month=start.month + 1, day=1) - timedelta(days=1)
-        else:
+        rng = quick_range(self.var_range.get())
+        if rng is None:
             return
+        start, end = rng
         self.var_start.set(start.strftime("%d/%m/%Y"))
         self.var_end.set(end.strftime("%d/%m/%Y"))
         self.refresh()
 
     def _parse_period(self) -> tuple[str | None, str | None]:
-        def parse_br(d: str) -> str | None:
-            d = d.strip()
-            if not d:
-                return None
-            try:
-                dd, mm, yy = d.split("/")
-                return f"{int(yy):04d}-{int(mm):02d}-{int(dd):02d}"
-            except Exception:
-                return None
-        start_iso = parse_br(self.var_start.get())
-        end_iso = parse_br(self.var_end.get())
-        return start_iso, end_iso
+        return parse_date(self.var_start.get()), parse_date(self.var_end.get())
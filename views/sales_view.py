@@ -3,6 +3,13 @@ Tela de Vendas (simplificada e intuitiva):
 - Topo dividido em 2 colunas: esquerda (busca e adicionar item), direita (totais e ações).
 - Parte inferior: tabela da venda (itens) com atalhos práticos.
 - Mantém: busca com sugestões, Qtd, Desconto%, aplicar desconto geral, remover/limpar, finalizar, exportar CSV.
+- O carrinho é um `models.cart.Cart`: totais incrementais e um evento por linha
+  alterada — a tabela mexe só naquela linha (carrinhos com milhares de itens).
+- Promoções (`models.promotions`) são aplicadas pelo próprio Cart; o livro é
+  recarregado a cada venda nova e `create_sale` recebe `priced_at=cart.at`,
+  então o total gravado é o mesmo da tela.
+- Com a busca vazia, a lista de sugestões começa pelos complementos "comprados
+  juntos" com a cesta atual (marcados com ★; `SaleService.add_ons`).
 """
 
 from __future__ import annotations
@@ -11,10 +18,15 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 
 from db import Database
-from models.product_model import ProductModel
-from models.sale_model import SaleModel, SaleItemInput
-from utils.formatting import br_money, validate_percent, to_decimal, round2
+from models.cart import Cart, CartChange, CartLine
+from models.product_model import Product
+from models.promotions import PromotionBook
+from models.sale_model import SaleItemInput
+from services.remote import get_backend
+from utils.formatting import br_money, validate_percent
 from utils.exports import export_csv
+from views.grid import TreeSync
+from views.lazy import BackgroundLoader
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,8 +38,8 @@ class SalesFrame(ttk.Frame):
     def __init__(self, parent: tk.Widget, db: Database) -> None:
         super().__init__(parent)
         self.db = db
-        self.pmodel = ProductModel(db)
-        self.smodel = SaleModel(db)
+        # Local (SQLite) ou remoto (STOCK_API_URL) — mesma interface
+        self.sales = get_backend(db).sales
 
         # Cabeçalho
         title = ttk.Label(self, text="Registro de Vendas", font=("Segoe UI", 14, "bold"))
@@ -56,6 +68,7 @@ class SalesFrame(ttk.Frame):
         self.listbox.bind("<Double-Button-1>", lambda _: self._select_suggestion())
         # Mantém a lista de produtos correspondentes às linhas do listbox
         self._suggestions: list[Product] = []
+        self._suggest_loader = BackgroundLoader(self)
 
         # Detalhes do produto selecionado + inputs
         details = ttk.Frame(left)
@@ -110,6 +123,7 @@ class SalesFrame(ttk.Frame):
             self.tree.heading(col, text=text)
             self.tree.column(col, width=w, anchor=anchor)
         self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self._sync = TreeSync(self.tree)  # iid = chave da linha no carrinho
 
         vsb = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscroll=vsb.set)
@@ -146,7 +160,10 @@ class SalesFrame(ttk.Frame):
         ttk.Button(right, text="Exportar CSV", command=self._export_csv).pack(fill=tk.X, padx=8, pady=(6, 8))
 
         # Estado da venda atual
-        self._cart: list[dict] = []  # {product_id, sku, name, qty, unit_price, disc_p, disc_v, subtotal}
+        self._cart = Cart(self._load_promotions())
+        self._cart.subscribe(self._on_cart_change)
+        self._totals_pending = False
+        self._basket_changed = False
 
         # Atalhos
         self.bind_all("<F2>", lambda _: self.entry_search.focus_set())
@@ -162,49 +179,48 @@ class SalesFrame(ttk.Frame):
         """Atualiza a lista de sugestões conforme o texto digitado.
 
         Mapa de eventos:
-            Entry de busca (<KeyRelease>) → chama este método → atualiza Listbox
+            Entry de busca (<KeyRelease>) → chama este método → consulta em
+            segundo plano → `_show_suggestions` atualiza a Listbox
 
         Estratégia didática:
             (1) Ler o texto atual; (2) consultar o modelo por múltiplos campos;
             (3) ranquear por relevância (startswith > contém); (4) popular a Listbox.
+            Os passos (2) e (3) ficam em `SaleService.suggest` e rodam fora
+            da thread do Tk; se o operador
+            continuar digitando, só o resultado da última tecla é exibido.
+            Com a busca vazia, os complementos da cesta (últimos 20 produtos
+            do carrinho) vêm antes.
         """
         q = (self.var_search.get() or "").strip()
-        # Busca ampla (se vazio, lista até 50 por nome)
-        candidates = self.pmodel.search(q, q, q, q) if q else self.pmodel.list_all()
-        # Scoring simples: startswith tem prioridade
-        def score(p: Product) -> tuple:
-            s = q.lower()
-            sku = p.sku.lower()
-            name = p.name.lower()
-            cat = (p.category or "").lower()
-            grp = (p.group_code or "").lower()
-            def part_sc(txt: str) -> tuple:
-                if not s:
-                    return (2, 9999)  # menor prioridade quando sem busca
-                if txt.startswith(s):
-                    return (0, len(txt))
-                if s in txt:
-                    return (1, txt.find(s))
-                return (2, 9999)
-            # combina melhor de sku/name/cat/grp
-            parts = [part_sc(sku), part_sc(name), part_sc(cat), part_sc(grp)]
-            best = min(parts)
-            return best + (name,)
-
-        ordered = sorted(candidates, key=score)
-        # Limita tamanho
-        self._suggestions = ordered[:30] if q else ordered[:50]
+        cart_ids = [] if q else list(dict.fromkeys(ln.product_id for ln in self._cart))[-20:]
+        self._suggest_loader.submit(lambda: self._fetch_suggestions(q, cart_ids), self._show_suggestions)
+
+    def _fetch_suggestions(self, q: str, cart_ids: list[int]) -> tuple[list[Product], list[Product]]:
+        """Roda fora da thread do Tk: (complementos, sugestões da busca)."""
+        add_ons: list[Product] = []
+        if cart_ids:
+            try:
+                add_ons = self.sales.add_ons(cart_ids)
+            except Exception:  # sem complementos a busca continua funcionando
+                logger.exception("Falha ao buscar complementos")
+        return add_ons, self.sales.suggest(q)
+
+    def _show_suggestions(self, found: tuple[list[Product], list[Product]]) -> None:
+        add_ons, suggestions = found
+        seen = {p.id for p in add_ons}
+        self._suggestions = add_ons + [p for p in suggestions if p.id not in seen]
         # Atualiza UI
         self.listbox.delete(0, tk.END)
         if not self._suggestions:
             self.listbox.insert(tk.END, "Nenhum produto encontrado")
             return
-        for p in self._suggestions:
+        for i, p in enumerate(self._suggestions):
             cat = p.category or "-"
             grp = p.group_code or "-"
             self.listbox.insert(
                 tk.END,
-                f"{p.sku} | {p.name} | Cat: {cat} | Grupo: {grp} | Est.: {p.stock_qty} | {br_money(p.sale_price)}",
+                ("★ " if i < len(add_ons) else "")
+                + f"{p.sku} | {p.name} | Cat: {cat} | Grupo: {grp} | Est.: {p.stock_qty} | {br_money(p.sale_price)}",
             )
 
     def _select_suggestion(self) -> None:
@@ -227,18 +243,17 @@ class SalesFrame(ttk.Frame):
 
         Fluxo:
             Clique no botão "Adicionar item" → valida Qtd/Desconto → calcula
-            subtotal bruto, desconto R$ e subtotal líquido → insere na Treeview
-            e recalcula os totais da venda.
+            a linha no `Cart` (models.cart) → o evento "add" insere só essa
+            linha na Treeview e os totais são atualizados pela diferença.
         """
         sku = self.var_sku.get().strip().upper()
         if not sku:
             messagebox.showwarning("Atenção", "Selecione um produto pelas sugestões.")
             return
-        prods = self.pmodel.search(sku=sku)
-        if not prods:
+        p = self.sales.find_by_sku(sku)
+        if p is None:
             messagebox.showerror("Erro", "Produto não encontrado.")
             return
-        p = prods[0]
         try:
             qty = int(self.var_qty.get())
         except ValueError:
@@ -247,44 +262,24 @@ class SalesFrame(ttk.Frame):
         if qty <= 0:
             messagebox.showwarning("Quantidade inválida", "Quantidade deve ser >= 1")
             return
-        if qty > p.stock_qty:
-            messagebox.showerror("Estoque insuficiente", f"Estoque atual: {p.stock_qty}")
+        in_cart = self._cart.qty_for(p.id)
+        if qty + in_cart > p.stock_qty:
+            messagebox.showerror("Estoque insuficiente", f"Estoque atual: {p.stock_qty} (no carrinho: {in_cart})")
             return
 
         try:
-            disc_p = float(validate_percent(self.var_disc.get()))
+            disc_p = validate_percent(self.var_disc.get())
         except Exception as e:
             messagebox.showwarning("Desconto inválido", str(e))
             return
 
-        unit = round2(p.sale_price)
-        subtotal_gross = round2(unit * qty)
-        disc_v = round2(subtotal_gross * (round2(disc_p) / 100))
-        subtotal_net = round2(subtotal_gross - disc_v)
-
-        self._cart.append({
-            "product_id": p.id,
-            "sku": p.sku,
-            "name": p.name,
-            "qty": qty,
-            "unit": unit,
-            "disc_p": round2(disc_p),
-            "disc_v": disc_v,
-            "subtotal": subtotal_net,
-        })
-        self._refresh_table()
-        self._refresh_totals()
+        self._cart.add(p.id, p.sku, p.name, qty, p.sale_price, disc_p,
+                       category=p.category, group_code=p.group_code)
         logger.info("Item adicionado: %s x%d (desc%%=%s)", p.sku, qty, self.var_disc.get())
 
     def _remove_item(self) -> None:
-        sel = self.tree.selection()
-        if not sel:
-            return
-        idx = self.tree.index(sel[0])
-        if 0 <= idx < len(self._cart):
-            del self._cart[idx]
-            self._refresh_table()
-            self._refresh_totals()
+        for iid in self.tree.selection():
+            self._cart.remove(int(iid))
 
     def _clear_sale(self) -> None:
         """Limpa carrinho e campos da venda (mesmo se já estiver vazio)."""
@@ -292,9 +287,7 @@ class SalesFrame(ttk.Frame):
         if self._cart:
             if not messagebox.askyesno("Limpar", "Deseja limpar todos os itens da venda?"):
                 return
-            self._cart.clear()
-        self._refresh_table()
-        self._refresh_totals()
+        self._cart.restart(self._load_promotions())
         self._reset_sale_form()
 
     def _reset_sale_form(self) -> None:
@@ -324,38 +317,51 @@ class SalesFrame(ttk.Frame):
         if v is None:
             return
         try:
-            perc = float(validate_percent(v))
+            perc = validate_percent(v)
         except Exception as e:
             messagebox.showwarning("Desconto inválido", str(e))
             return
-        for it in self._cart:
-            unit = round2(it["unit"]) 
-            qty = it["qty"]
-            gross = round2(unit * qty)
-            disc_v = round2(gross * (round2(perc) / 100))
-            net = round2(gross - disc_v)
-            it["disc_p"] = round2(perc)
-            it["disc_v"] = disc_v
-            it["subtotal"] = net
-        self._refresh_table()
-        self._refresh_totals()
-
-    def _refresh_table(self) -> None:
-        self.tree.delete(*self.tree.get_children())
-        for it in self._cart:
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(it["sku"], it["name"], it["qty"], br_money(it["unit"]), f"{float(it['disc_p']):.2f}%", br_money(it["disc_v"]), br_money(it["subtotal"]))
-            )
+        self._cart.apply_discount(perc)
+
+    # ------------------------ Carrinho -> tela -------------------------
+    def _on_cart_change(self, change: CartChange) -> None:
+        """Aplica na Treeview só a linha alterada; totais e complementos uma vez por ciclo do Tk."""
+        line = change.line
+        if change.kind == "clear":
+            self._sync.clear()
+        elif change.kind == "remove" and line is not None:
+            self._sync.remove(str(line.key))
+        elif line is not None:
+            self._sync.upsert(str(line.key), self._row_values(line))
+        if change.kind != "update":
+            self._basket_changed = True  # complementos dependem dos produtos da cesta
+        if not self._totals_pending:
+            self._totals_pending = True
+            self.after_idle(self._refresh_totals)
+
+    def _row_values(self, line: CartLine) -> tuple:
+        promo = self._cart.promotion_of(line)
+        name = f"{line.name} — {promo.name}" if promo is not None else line.name
+        return (line.sku, name, line.qty, br_money(line.unit_price), f"{line.discount_percent:.2f}%",
+                br_money(line.discount), br_money(line.net))
+
+    def _load_promotions(self) -> PromotionBook | None:
+        """Promoções ativas para a próxima venda (sem elas, o caixa continua vendendo)."""
+        try:
+            return self.sales.promotions()
+        except Exception:
+            logger.exception("Falha ao carregar promoções")
+            return None
 
     def _refresh_totals(self) -> None:
-        gross = sum((round2(it["unit"]) * it["qty"]) for it in self._cart)
-        disc = sum((round2(it["disc_v"]) for it in self._cart))
-        net = sum((round2(it["subtotal"]) for it in self._cart))
-        self.var_tot_gross.set(br_money(gross))
-        self.var_tot_disc.set(br_money(disc))
-        self.var_tot_net.set(br_money(net))
+        self._totals_pending = False
+        self.var_tot_gross.set(br_money(self._cart.gross))
+        self.var_tot_disc.set(br_money(self._cart.discount))
+        self.var_tot_net.set(br_money(self._cart.net))
+        if self._basket_changed:
+            self._basket_changed = False
+            if not self.var_search.get().strip():
+                self._update_suggestions()
 
     def _finalize(self) -> None:
         """Finaliza a venda atual.
@@ -369,21 +375,15 @@ class SalesFrame(ttk.Frame):
             messagebox.showinfo("Atenção", "Nenhum item na venda")
             return
         # Constrói itens de entrada para model
-        items = []
-        for it in self._cart:
-            items.append(
-                SaleItemInput(
-                    product_id=it["product_id"],
-                    sku=it["sku"],
-                    name=it["name"],
-                    qty=int(it["qty"]),
-                    unit_price=round2(it["unit"]),
-                    discount_percent=round2(it["disc_p"]),
-                )
-            )
+        items = [
+            SaleItemInput(product_id=ln.product_id, sku=ln.sku, name=ln.name, qty=ln.qty,
+                          unit_price=ln.unit_price, discount_percent=ln.discount_percent)
+            for ln in self._cart
+        ]
         try:
-            sale_id = self.smodel.create_sale(
+            sale_id = self.sales.create_sale(
                 items,
+                priced_at=self._cart.at,
                 customer_name=self.var_cust_name.get().strip() or None,
                 customer_email=self.var_cust_email.get().strip() or None,
                 customer_address=self.var_cust_addr.get().strip() or None,
@@ -393,9 +393,7 @@ class SalesFrame(ttk.Frame):
             return
         messagebox.showinfo("Venda concluída", f"Venda #{sale_id} registrada com sucesso. Pedido criado e definido como AGUARDANDO.")
         logger.info("Venda #%s concluída; pedido criado.", sale_id)
-        self._cart.clear()
-        self._refresh_table()
-        self._refresh_totals()
+        self._cart.restart(self._load_promotions())
         self._reset_sale_form()
         # Navega para a aba de Pedidos
         try:
@@ -418,10 +416,7 @@ class SalesFrame(ttk.Frame):
         )
         if not fp:
             return
-        rows = []
-        for it in self._cart:
-            rows.append([
-                it["sku"], it["name"], it["qty"], f"{float(round2(it['unit'])):.2f}", f"{float(round2(it['disc_p'])):.2f}", f"{float(round2(it['disc_v'])):.2f}", f"{float(round2(it['subtotal'])):.2f}"
-            ])
+        rows = ((ln.sku, ln.name, ln.qty, f"{ln.unit_price:.2f}", f"{ln.discount_percent:.2f}",
+                 f"{ln.discount:.2f}", f"{ln.net:.2f}") for ln in self._cart)
         export_csv(fp, ("SKU", "Produto", "Qtd", "Preço Unit.", "Desc.%", "Desc.R$", "Subtotal"), rows)
         messagebox.showinfo("Exportado", f"Arquivo salvo em\n{fp}")